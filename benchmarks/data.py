@@ -0,0 +1,213 @@
+"""
+Synthetic data generator - fills a database with realistic customers and
+invoices for benchmarks (see benchmarks/workload.py).
+
+Customers are persons and companies with Serbian names, addresses and valid
+MB/PIB check digits; invoices have 1 to 6 line items of common services with
+all VAT rates, spread over the last years. The data depends only on the seed,
+so databases generated with the same arguments are the same:
+
+    python benchmarks/data.py bench.db                      # 100k / 1M
+    python benchmarks/data.py bench.db --customers 10000 --invoices 100000
+
+Invoices are saved with Storage.save_invoices() in batches, so generating
+exercises the same code (numbering, full-text index, revenue summaries) as the
+app. A million invoices take a few minutes.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.models import ID_NO_WEIGHTS, Customer, Invoice  # noqa: E402
+from core.storage import Storage  # noqa: E402
+from core.totals import VAT_RATES, LineItems, line_item  # noqa: E402
+
+CUSTOMERS = 100_000
+INVOICES = 1_000_000
+# invoices saved per transaction
+BATCH_SIZE = 2000
+# invoice dates are spread over this many days before today
+DAYS = 3 * 365
+
+FIRST_NAMES = (
+    "Aleksandar Ana Bojan Biljana Dragan Dragana Dušan Jelena Jovan Jovana Luka "
+    "Marija Marko Milica Milan Milena Miloš Mirjana Nemanja Nikola Nataša Ognjen "
+    "Petar Sanja Srđan Stefan Snežana Tamara Uroš Vesna Vladimir Zoran Željko "
+    "Đorđe Ivana Katarina Nenad Tijana Goran Branka"
+).split()
+LAST_NAMES = (
+    "Jovanović Petrović Nikolić Marković Đorđević Stojanović Ilić Stanković "
+    "Pavlović Milošević Popović Đukić Kovačević Simić Todorović Lukić Mitić "
+    "Stefanović Ristić Savić Živković Tomić Kostić Radovanović Obradović "
+    "Milovanović Vasić Janković Mladenović Petković Zorić Lazić Marinković "
+    "Čolić Šarić Ćirić Bogdanović Vuković Babić"
+).split()
+COMPANY_WORDS = (
+    "Elektro Auto Gradnja Trgovina Servis Promet Agro Drvo Metal Kompjuter "
+    "Transport Info Plast Energo Medika Stil Dizajn Print Kuća Voćar"
+).split()
+COMPANY_FORMS = ("d.o.o.", "a.d.", "preduzetnik", "d.o.o. Beograd")
+CITIES = (
+    "Beograd Novi Sad Niš Kragujevac Subotica Zrenjanin Pančevo Čačak Kraljevo "
+    "Smederevo Leskovac Valjevo Kruševac Vranje Šabac Užice Sombor Požarevac"
+).split()
+STREETS = (
+    "Kralja Petra Cara Dušana Bulevar oslobođenja Njegoševa Kneza Miloša "
+    "Vojvode Stepe Takovska Zmaj Jovina Nemanjina Svetog Save"
+).split()
+# type of service, unit, price range (RSD)
+SERVICES = (
+    ("Servis računara", "kom", 1500, 6000),
+    ("Instalacija softvera", "kom", 1000, 4000),
+    ("Održavanje sajta", "mes", 5000, 30000),
+    ("Izrada web sajta", "kom", 40000, 250000),
+    ("Konsultacije", "h", 2500, 9000),
+    ("Programiranje", "h", 3000, 8000),
+    ("Zamena ekrana", "kom", 4000, 18000),
+    ("Čišćenje od virusa", "kom", 1200, 3500),
+    ("Mrežna instalacija", "m", 80, 300),
+    ("Hosting", "god", 6000, 24000),
+    ("Dizajn logotipa", "kom", 8000, 60000),
+    ("Obuka zaposlenih", "dan", 15000, 45000),
+    ("Prevoz robe", "km", 60, 120),
+    ("Popravka štampača", "kom", 2000, 7000),
+    ("Rezervni delovi", "kom", 300, 12000),
+)
+
+
+def tax_id(base: int) -> str:
+    """Returns valid PIB with the 8 digits of base and the ISO 7064 MOD 11,10
+    check digit."""
+
+    digits = f"{base:08}"
+    product = 10
+    for digit in digits:
+        total = (int(digit) + product) % 10 or 10
+        product = total * 2 % 11
+    return f"{digits}{(11 - product) % 10}"
+
+
+def id_no(base: int) -> str:
+    """Returns valid MB with the 7 digits of base and the MOD 11 check digit."""
+
+    digits = f"{base:07}"
+    total = sum(int(digit) * weight for digit, weight in zip(digits, ID_NO_WEIGHTS))
+    check = 11 - total % 11
+    return f"{digits}{0 if check > 9 else check}"
+
+
+def customers(count: int, seed: int = 1):
+    """Yields count customers, one in three is a company with MB and PIB."""
+
+    rnd = random.Random(seed)
+    for number in range(count):
+        city = rnd.choice(CITIES)
+        address = f"{rnd.choice(STREETS)} {rnd.randint(1, 200)}"
+        first, last = rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES)
+        if number % 3:
+            yield Customer(
+                f"{first} {last}",
+                "Fizičko lice",
+                address,
+                city,
+                f"{first}.{last}{number}@primer.rs".lower(),
+            )
+        else:
+            name = f"{rnd.choice(COMPANY_WORDS)} {last} {rnd.choice(COMPANY_FORMS)}"
+            yield Customer(
+                name,
+                "Pravno lice",
+                address,
+                city,
+                f"office{number}@primer.rs",
+                # unique MB and PIB per customer
+                id_no(1_000_000 + number),
+                tax_id(10_000_000 + number),
+            )
+
+
+def invoices(count: int, customer_list: list, seed: int = 1):
+    """Yields count unsaved invoices (without numbers) of customers from
+    customer_list, oldest first."""
+
+    rnd = random.Random(seed)
+    first_day = date.today() - timedelta(days=DAYS)
+    for number in range(count):
+        customer = rnd.choice(customer_list)
+        lines = LineItems()
+        for _ in range(rnd.randint(1, 6)):
+            name, unit, low, high = rnd.choice(SERVICES)
+            lines.add(
+                line_item(
+                    name,
+                    unit,
+                    Decimal(rnd.randint(1, 10)),
+                    Decimal(rnd.randint(low * 100, high * 100)).scaleb(-2),
+                    rnd.choice(VAT_RATES),
+                )
+            )
+        invoice_date = first_day + timedelta(days=number * DAYS // count)
+        yield Invoice(
+            "",
+            invoice_date,
+            customer.name,
+            date_of_purchase=invoice_date,
+            place_of_purchase=customer.city,
+            customer_address=customer.address,
+            customer_city=customer.city,
+            customer_id_no=customer.id_no,
+            customer_tax_id=customer.tax_id,
+            customer_email=customer.email,
+            items=list(lines),
+            total=lines.total,
+            customer_id=customer.id,
+        )
+
+
+def generate(path: str, customer_count: int, invoice_count: int, seed: int = 1):
+    """Adds customer_count customers and invoice_count invoices to the database
+    at path, printing progress."""
+
+    storage = Storage(path)
+    start = time.perf_counter()
+    try:
+        customer_list = list(customers(customer_count, seed))
+        for offset in range(0, len(customer_list), BATCH_SIZE):
+            storage.upsert_customers(customer_list[offset : offset + BATCH_SIZE])
+        print(f"{customer_count} customers", file=sys.stderr)
+
+        rows = invoices(invoice_count, customer_list, seed)
+        done = 0
+        while batch := list(islice(rows, BATCH_SIZE)):
+            storage.save_invoices(batch)
+            done += len(batch)
+            rate = done / (time.perf_counter() - start)
+            print(f"\r{done} invoices ({rate:.0f}/s)", end="", file=sys.stderr)
+        print(file=sys.stderr)
+        storage.conn.execute("ANALYZE")
+    finally:
+        storage.close()
+    print(f"done in {time.perf_counter() - start:.0f} s", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data generator.")
+    parser.add_argument("path", help="database file (created or added to)")
+    parser.add_argument("--customers", type=int, default=CUSTOMERS)
+    parser.add_argument("--invoices", type=int, default=INVOICES)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    generate(args.path, args.customers, args.invoices, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Startup benchmark - measures how long `python main.py` takes until the window
+is usable.
+
+Every run starts a fresh interpreter (cold module imports, like a real launch)
+and measures:
+    - import_ms - importing main.py and everything it imports
+    - idle_ms - from process launch to the first idle of the Tk main loop,
+      i.e. the first screen is built and the window is ready for input
+It also lists heavy modules (reportlab, tkcalendar, ...) that were loaded by
+then. PDF output modules must be imported on first use, never at startup;
+tkcalendar is only needed by screens with date fields (the first screen,
+Invoices, has them).
+
+Median of the runs is compared with a saved baseline and the script exits with
+status 1 if either time got slower than the threshold:
+
+    python benchmarks/startup.py --save      # record baseline
+    python benchmarks/startup.py             # compare, e.g. after a change
+
+Needs a display (Tk window is opened and closed right away). Runs in the
+directory of main.py, with its database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+# allowed slowdown against the baseline, in percent
+THRESHOLD = 20
+# heavy modules reported as loaded before the first idle
+HEAVY_MODULES = ("reportlab", "tkcalendar", "babel", "PIL", "pypdf")
+# of those, modules whose loading at startup is a regression
+DEFERRED_MODULES = ("reportlab", "PIL", "pypdf")
+
+# runs in a fresh interpreter, prints one JSON line; idle time is wall clock
+# time, so the launching process can include interpreter startup
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+class App(main.App):
+    def mainloop(self):
+        self.after_idle(self.first_idle)
+        super().mainloop()
+
+    def first_idle(self):
+        print(json.dumps({
+            "import_ms": (imported - start) * 1000,
+            "idle_at": time.time(),
+            "loaded": [name for name in %r if name in sys.modules],
+        }))
+        self.close()
+
+App("Invoice Creator v0.1", (960, 1015))
+"""
+
+
+def run_once() -> dict:
+    """Starts the app in a new interpreter and returns its measurements."""
+
+    launched = time.time()
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % (HEAVY_MODULES,)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    result["idle_ms"] = (result.pop("idle_at") - launched) * 1000
+    return result
+
+
+def measure(runs: int) -> dict:
+    """Returns median import_ms and idle_ms of runs, and loaded heavy modules."""
+
+    results = [run_once() for _ in range(runs)]
+    return {
+        "runs": runs,
+        "import_ms": round(statistics.median(r["import_ms"] for r in results), 1),
+        "idle_ms": round(statistics.median(r["idle_ms"] for r in results), 1),
+        "loaded": sorted({name for r in results for name in r["loaded"]}),
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns list of regressions of result against baseline."""
+
+    problems = []
+    for key in ("import_ms", "idle_ms"):
+        limit = baseline[key] * (1 + threshold / 100)
+        if result[key] > limit:
+            problems.append(
+                f"{key} {result[key]:.1f} > {limit:.1f} "
+                f"(baseline {baseline[key]:.1f} + {threshold}%)"
+            )
+    for name in set(result["loaded"]) & set(DEFERRED_MODULES):
+        problems.append(f"{name} is imported at startup")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="App startup benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD, help="allowed slowdown, %%"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="save as baseline")
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs)
+    print(json.dumps(result))
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline, run with --save first", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    problems = compare(result, baseline, args.threshold)
+    for problem in problems:
+        print("REGRESSION:", problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
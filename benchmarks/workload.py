@@ -0,0 +1,270 @@
+"""
+Workload benchmark - times the operations users wait for on a large database
+generated by benchmarks/data.py:
+    - customer_index_load - building the customer search index (startup)
+    - customer_search - search as you type on Invoices (CustomerIndex)
+    - customer_page - first page of the Customers search
+    - invoice_save - saving a new invoice with line items (one transaction)
+    - invoice_delete - deleting it again
+    - review_page - one page of the review list, scrolling 20 pages
+    - review_sorted - the same sorted by a heading (every column, both ways)
+    - invoice_search - first page of the review full-text search
+    - line_totals - totals of a 100 line invoice, adding and editing lines
+    - revenue_report - the reports screen (years, months, top customers)
+    - pdf_render - rendering one invoice to PDF (skipped without reportlab)
+    - export - CSV export of one month of invoices with line items
+Times are medians in milliseconds per operation. Results are printed as JSON,
+compared with a saved baseline like benchmarks/startup.py, and the script exits
+with status 1 if an operation got slower than the threshold:
+
+    python benchmarks/data.py bench.db
+    python benchmarks/workload.py bench.db --save    # record baseline
+    python benchmarks/workload.py bench.db           # compare
+
+Saved invoices are deleted again, but their numbers are used up, so run it on
+a generated database only.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.data import SERVICES, customers, invoices  # noqa: E402
+from core.export import export_invoices  # noqa: E402
+from core.search_index import CustomerIndex  # noqa: E402
+from core.storage import INVOICE_ORDERS, Storage, invoice_key  # noqa: E402
+from core.totals import LineItems, line_item  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "workload_baseline.json")
+# allowed slowdown against the baseline, in percent
+THRESHOLD = 20
+# smaller slowdowns (ms) are timer noise of the sub-millisecond operations
+MIN_SLOWDOWN = 0.05
+# timed repetitions of the fast operations
+REPEAT = 200
+# rows per page of the review list (VirtualTreeview default)
+PAGE_SIZE = 50
+
+
+def timed(func, *args) -> float:
+    """Returns milliseconds func(*args) took."""
+
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def median(times) -> float:
+    """Returns median of times (ms), rounded to microseconds."""
+
+    return round(statistics.median(times), 3)
+
+
+def bench_customers(storage: Storage, rnd: random.Random) -> dict:
+    index = CustomerIndex()
+    load = timed(index.load, storage.customer_index_rows())
+    names = [row[1] for row in storage.page_customers(None, 1000)]
+    # what is typed: a few letters of a name, a whole word, MB/PIB digits
+    queries = [rnd.choice(names)[: rnd.randint(2, 8)] for _ in range(REPEAT)]
+    queries += [str(rnd.randint(10, 99_999)) for _ in range(REPEAT // 4)]
+    return {
+        "customer_index_load": round(load, 3),
+        "customer_search": median(timed(index.search, q, 5) for q in queries),
+        "customer_page": median(
+            timed(storage.page_customers, None, PAGE_SIZE, True, q) for q in queries
+        ),
+    }
+
+
+def bench_save(storage: Storage, rnd: random.Random) -> dict:
+    customer_list = list(customers(100, rnd.randint(0, 1000)))
+    new = list(invoices(REPEAT, customer_list, rnd.randint(0, 1000)))
+    save = [timed(storage.save_invoice, invoice) for invoice in new]
+    delete = [timed(storage.delete_invoice, invoice.id) for invoice in new]
+    return {"invoice_save": median(save), "invoice_delete": median(delete)}
+
+
+def scroll(storage: Storage, order: str = "id", descending: bool = True) -> list:
+    """Returns times (ms) of the first 20 review list pages in order."""
+
+    times = []
+    key = None
+    for _ in range(20):
+        start = time.perf_counter()
+        rows = storage.page_invoices(key, PAGE_SIZE, True, "", order, descending)
+        times.append((time.perf_counter() - start) * 1000)
+        key = invoice_key(order, rows[-1])
+    return times
+
+
+def bench_review(storage: Storage, rnd: random.Random) -> dict:
+    pages = []
+    for _ in range(REPEAT // 20):
+        pages += scroll(storage)
+    sorted_pages = []
+    for order in INVOICE_ORDERS:
+        for descending in (False, True):
+            sorted_pages += scroll(storage, order, descending)
+    words = [name.split()[0] for name, *_ in SERVICES]
+    words += [row[1].split()[-1] for row in storage.page_invoices(None, 100)]
+    queries = [rnd.choice(words)[: rnd.randint(3, 8)] for _ in range(REPEAT // 4)]
+    return {
+        "review_page": median(pages),
+        "review_sorted": median(sorted_pages),
+        "invoice_search": median(
+            timed(storage.search_invoices, q, None, PAGE_SIZE) for q in queries
+        ),
+    }
+
+
+def bench_totals(storage: Storage, rnd: random.Random) -> dict:
+    items = [
+        line_item(name, unit, Decimal(rnd.randint(1, 9)), Decimal(low), 20)
+        for name, unit, low, _ in SERVICES * 7
+    ][:100]
+
+    def totals():
+        lines = LineItems()
+        keys = [lines.add(item) for item in items]
+        for key in keys[::10]:
+            lines.update(key, items[0])
+        return lines.total
+
+    year = date.today().year
+
+    def report():
+        storage.revenue_by_year()
+        storage.revenue_by_month(year)
+        storage.top_customers(year)
+
+    return {
+        "line_totals": median(timed(totals) for _ in range(REPEAT)),
+        "revenue_report": median(timed(report) for _ in range(REPEAT)),
+    }
+
+
+def bench_pdf(storage: Storage, rnd: random.Random) -> dict:
+    try:
+        from core.pdf import render_invoice
+    except ImportError:
+        return {}
+
+    settings = storage.load_settings()
+    key = rnd.randint(1, storage.page_invoices(None, 1)[0][0])
+    ids = [row[0] for row in storage.page_invoices((key,), 20)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "faktura.pdf")
+        # first render loads fonts and the company header
+        render_invoice(storage.get_invoice(ids[0]), settings, path)
+        times = [
+            timed(render_invoice, storage.get_invoice(invoice_id), settings, path)
+            for invoice_id in ids
+        ]
+    return {"pdf_render": median(times)}
+
+
+def bench_export(storage: Storage, rnd: random.Random) -> dict:
+    date_to = date.today()
+    date_from = date_to - timedelta(days=30)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "export.csv")
+        result = export_invoices(storage.path, path, date_from, date_to)
+    return {"export": round(result.seconds * 1000, 3)}
+
+
+BENCHMARKS = (
+    bench_customers,
+    bench_save,
+    bench_review,
+    bench_totals,
+    bench_pdf,
+    bench_export,
+)
+
+
+def measure(path: str, runs: int = 3, seed: int = 1) -> dict:
+    """Runs all benchmarks runs times on the database at path. Returns data size
+    and median results (operation -> ms) of the runs."""
+
+    storage = Storage(path)
+    try:
+        count = "SELECT count(*) FROM {}"
+        customer_count = storage.conn.execute(count.format("customers")).fetchone()
+        invoice_count = storage.conn.execute(count.format("invoices")).fetchone()
+        results = {}
+        for _ in range(runs):
+            for benchmark in BENCHMARKS:
+                for key, value in benchmark(storage, random.Random(seed)).items():
+                    results.setdefault(key, []).append(value)
+    finally:
+        storage.close()
+    return {
+        "runs": runs,
+        "customers": customer_count[0],
+        "invoices": invoice_count[0],
+        "results": {key: median(values) for key, values in results.items()},
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """Returns list of regressions of result against baseline."""
+
+    problems = []
+    for key, value in result["results"].items():
+        if key not in baseline["results"]:
+            continue
+        limit = baseline["results"][key] * (1 + threshold / 100)
+        if value > limit and value - baseline["results"][key] > MIN_SLOWDOWN:
+            problems.append(
+                f"{key} {value:.3f} > {limit:.3f} "
+                f"(baseline {baseline['results'][key]:.3f} + {threshold}%)"
+            )
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Workload benchmark.")
+    parser.add_argument("path", help="database from benchmarks/data.py")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD, help="allowed slowdown, %%"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="save as baseline")
+    args = parser.parse_args(argv)
+
+    result = measure(args.path, args.runs)
+    print(json.dumps(result, indent=2))
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline, run with --save first", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if (result["customers"], result["invoices"]) != (
+        baseline["customers"],
+        baseline["invoices"],
+    ):
+        print("baseline was recorded on a different database", file=sys.stderr)
+    problems = compare(result, baseline, args.threshold)
+    for problem in problems:
+        print("REGRESSION:", problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
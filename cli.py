@@ -0,0 +1,218 @@
+"""
+Command line interface of the invoice app - runs without the GUI (no Tk).
+
+Usage:
+    python cli.py create-invoices fakture.jsonl
+    python cli.py list-invoices --search Petrovic
+    python cli.py render-pdf 42 faktura.pdf
+    python cli.py import-customers komitenti.csv
+    python cli.py export-data --from 2026-01-01 --to 2026-01-31 januar.csv.gz
+    python cli.py export-pdf --from 2026-01-01 --to 2026-01-31 --out fakture/
+    python cli.py export-pdf --from 2026-01-01 --to 2026-01-31 --merge januar.pdf
+    python cli.py rebuild-reports
+"""
+import argparse
+import json
+import sys
+from datetime import date
+
+from core.api import InvoiceBook
+from core.customer_import import import_customers as import_customer_file
+from core.export import export_invoices
+from core.models import Customer, format_amount
+from core.storage import DB_PATH
+
+
+def create_invoices(args):
+    """Creates invoices from a JSON Lines file, one invoice per line:
+
+    {"invoice_no": "1/2026", "invoice_date": "2026-01-15", "customer_id": 3,
+     "items": [["Servis", "kom", "2", "1500,00", 20]], "description": ""}
+
+    Without invoice_no, the invoice gets the next number of its year. Instead of
+    customer_id, "customer" may hold the customer fields (name, address, city,
+    email, id_no, tax_id) of a customer that is not saved."""
+
+    with InvoiceBook(args.db) as book, open(args.file, encoding="utf-8") as lines:
+        customers = {}
+
+        def invoices():
+            for line in lines:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "customer_id" in record:
+                    customer_id = record.pop("customer_id")
+                    if customer_id not in customers:
+                        customers[customer_id] = book.get_customer(customer_id)
+                    customer = customers[customer_id]
+                    if customer is None:
+                        raise SystemExit(f"unknown customer_id {customer_id}")
+                else:
+                    customer = Customer(**record.pop("customer"))
+                for key in ("invoice_date", "date_of_purchase"):
+                    if record.get(key):
+                        record[key] = date.fromisoformat(record[key])
+                yield book.new_invoice(
+                    record.pop("invoice_no", ""),
+                    customer,
+                    record.pop("items"),
+                    **record,
+                )
+
+        count = book.create_invoices(invoices(), args.batch)
+    print(f"{count} invoices created")
+
+
+def list_invoices(args):
+    """Prints newest invoices, tab separated."""
+
+    with InvoiceBook(args.db) as book:
+        for row in book.find_invoices(args.search, args.limit):
+            invoice_id, name, invoice_no, invoice_date, total = row
+            print(
+                invoice_id,
+                invoice_no,
+                invoice_date.strftime("%d/%m/%Y"),
+                name,
+                format_amount(total),
+                sep="\t",
+            )
+
+
+def render_pdf(args):
+    """PDF of a single invoice."""
+
+    with InvoiceBook(args.db) as book:
+        try:
+            book.render_pdf(args.invoice_id, args.path)
+        except KeyError:
+            raise SystemExit(f"unknown invoice id {args.invoice_id}")
+    print(args.path)
+
+
+def import_customers(args):
+    """Bulk customer import from a CSV/XLSX file."""
+
+    def progress(done, rejected, rate):
+        print(f"\r{done} ({rate:.0f} rows/s)", end="", file=sys.stderr)
+
+    result = import_customer_file(args.db, args.file, args.report, progress)
+    print(file=sys.stderr)
+    print(
+        f"{result.inserted} inserted, {result.updated} updated, "
+        f"{result.rejected} rejected in {result.seconds:.1f} s"
+    )
+    if result.report:
+        print(f"rejected rows: {result.report}")
+
+
+def export_data(args):
+    """Invoices with line items as CSV or JSON Lines, for accounting."""
+
+    result = export_invoices(
+        args.db,
+        args.path,
+        args.date_from,
+        args.date_to,
+        customer_id=args.customer,
+        format=args.format,
+    )
+    print(
+        f"{result.invoices} invoices, {result.lines} line items "
+        f"in {result.seconds:.1f} s -> {result.path}"
+    )
+
+
+def export_pdf(args):
+    """Batch PDF export of a date range."""
+
+    def progress(done, total, rate):
+        print(f"\r{done}/{total} ({rate:.1f} fakt/s)", end="", file=sys.stderr)
+
+    with InvoiceBook(args.db) as book:
+        result = book.export_pdfs(
+            args.date_from,
+            args.date_to,
+            out_dir=args.out,
+            merge_path=args.merge,
+            workers=args.workers,
+            progress=progress,
+        )
+    print(file=sys.stderr)
+    print(
+        f"{result.count} invoices in {result.seconds:.1f} s "
+        f"({result.rate:.1f} invoices/s) -> {result.output}"
+    )
+
+
+def rebuild_reports(args):
+    """Recalculates revenue summaries of the reports screen and service uses of the
+    service autocomplete from all invoices."""
+
+    with InvoiceBook(args.db) as book:
+        book.rebuild_revenue()
+    print("revenue summaries and service uses rebuilt")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Invoice app command line.")
+    parser.add_argument("--db", default=DB_PATH, help="database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create-invoices", help="invoices from JSON Lines")
+    create.add_argument("file", help="JSON Lines file, one invoice per line")
+    create.add_argument(
+        "--batch", type=int, default=500, help="invoices per transaction"
+    )
+    create.set_defaults(run=create_invoices)
+
+    listing = commands.add_parser("list-invoices", help="newest invoices")
+    listing.add_argument(
+        "--search", default="", help="words (customer, number, service) or ISO date"
+    )
+    listing.add_argument("--limit", type=int, default=50)
+    listing.set_defaults(run=list_invoices)
+
+    render = commands.add_parser("render-pdf", help="PDF of a single invoice")
+    render.add_argument("invoice_id", type=int)
+    render.add_argument("path", help="PDF file")
+    render.set_defaults(run=render_pdf)
+
+    customers = commands.add_parser("import-customers", help="customers from CSV/XLSX")
+    customers.add_argument("file", help="CSV or XLSX file")
+    customers.add_argument("--report", help="CSV file for rejected rows")
+    customers.set_defaults(run=import_customers)
+
+    data = commands.add_parser("export-data", help="invoices as CSV/JSON Lines")
+    data.add_argument(
+        "--from", dest="date_from", type=date.fromisoformat, required=True
+    )
+    data.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True)
+    data.add_argument("--customer", type=int, help="only invoices of customer id")
+    data.add_argument(
+        "--format", choices=["csv", "jsonl"], help="default from the file extension"
+    )
+    data.add_argument("path", help="output file, .gz for compressed")
+    data.set_defaults(run=export_data)
+
+    export = commands.add_parser("export-pdf", help="PDFs of invoices in a period")
+    export.add_argument(
+        "--from", dest="date_from", type=date.fromisoformat, required=True
+    )
+    export.add_argument("--to", dest="date_to", type=date.fromisoformat, required=True)
+    output = export.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", help="directory for one PDF per invoice")
+    output.add_argument("--merge", help="single PDF file with all invoices")
+    export.add_argument("--workers", type=int, help="worker processes (all cores)")
+    export.set_defaults(run=export_pdf)
+
+    rebuild = commands.add_parser("rebuild-reports", help="recalculate revenue reports")
+    rebuild.set_defaults(run=rebuild_reports)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Core package - invoice app logic that does not depend on the GUI.
+
+Modules in this package must not import tkinter, tkcalendar or layout, so they
+can be used from scripts and batch jobs without a display.
+"""
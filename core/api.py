@@ -0,0 +1,216 @@
+"""
+API - Python interface for creating, querying and rendering invoices without
+the GUI. Only the core package is used, so scripts and the command line
+(cli.py) never import tkinter:
+
+    from core.api import InvoiceBook
+
+    with InvoiceBook("invoices.db") as book:
+        invoice = book.create_invoice(
+            "", customer, [("Servis racunara", "kom", 2, "1500", 20)]
+        )
+        book.render_pdf(invoice.id, "1-2026.pdf")
+
+Bulk creation (create_invoices()) saves invoices in batches, one transaction
+per batch, so thousands of invoices are written in seconds.
+"""
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+
+from core.models import Customer, Invoice, from_cents, parse_decimal
+from core.storage import DB_PATH, Storage
+from core.totals import LineItems, line_item
+
+# invoices saved per transaction by create_invoices()
+BATCH_SIZE = 500
+
+
+class InvoiceBook:
+    """Invoices and customers in one database. For object creation, the following
+    is needed:
+
+    path: str - Database file, created when missing."""
+
+    def __init__(self, path: str = DB_PATH):
+        self.storage = Storage(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the database."""
+
+        self.storage.close()
+
+    # customers
+
+    def add_customer(self, name: str, **fields) -> Customer:
+        """Saves new customer. fields are the other Customer fields (type, address,
+        city, email, id_no, tax_id). Returns saved customer."""
+
+        customer = Customer(name, **fields)
+        self.storage.save_customer(customer)
+        return customer
+
+    def get_customer(self, customer_id: int) -> Customer | None:
+        """Returns customer by id or None."""
+
+        return self.storage.get_customer(customer_id)
+
+    def find_customers(self, search: str = "", limit: int = 50) -> list[Customer]:
+        """Returns customers whose name, MB or PIB starts with search, by name."""
+
+        rows = self.storage.page_customers(None, limit, search=search)
+        return [self.storage.get_customer(row[0]) for row in rows]
+
+    # invoices
+
+    def new_invoice(
+        self,
+        invoice_no: str,
+        customer: Customer,
+        items,
+        invoice_date: date | None = None,
+        **fields,
+    ) -> Invoice:
+        """Returns (unsaved) invoice for customer. For invoice creation, the following
+        is needed:
+
+        invoice_no: str - Empty for the next number of the year when saved;
+        items: iterable - (type_of_service, unit, quantity, price, vat_rate) tuples,
+            quantity and price as Decimal, int or str ("1234,56" is accepted);
+        invoice_date: date | None - Default today;
+        fields: other Invoice fields (date_of_purchase, place_of_purchase,
+            description)."""
+
+        lines = LineItems()
+        for type_of_service, unit, quantity, price, vat_rate in items:
+            lines.add(
+                line_item(
+                    type_of_service,
+                    unit,
+                    _decimal(quantity),
+                    _decimal(price),
+                    _decimal(vat_rate),
+                )
+            )
+        return Invoice(
+            invoice_no,
+            invoice_date or date.today(),
+            customer.name,
+            customer_address=customer.address,
+            customer_city=customer.city,
+            customer_id_no=customer.id_no,
+            customer_tax_id=customer.tax_id,
+            customer_email=customer.email,
+            items=list(lines),
+            total=lines.total,
+            customer_id=customer.id,
+            **fields,
+        )
+
+    def create_invoice(self, *args, series: str = "", **kwargs) -> Invoice:
+        """Creates and saves invoice, takes the same arguments as new_invoice().
+        Invoice without a number gets the next number of series. Raises
+        sqlite3.IntegrityError if the invoice number already exists."""
+
+        invoice = self.new_invoice(*args, **kwargs)
+        self.storage.save_invoice(invoice, series)
+        return invoice
+
+    def create_invoices(
+        self, invoices, batch_size: int = BATCH_SIZE, series: str = ""
+    ) -> int:
+        """Saves invoices (iterable of Invoice, e.g. from new_invoice()) in
+        transactions of batch_size invoices. Returns number of saved invoices.
+        If a batch fails, the earlier batches stay saved."""
+
+        invoices = iter(invoices)
+        count = 0
+        while batch := list(islice(invoices, batch_size)):
+            self.storage.save_invoices(batch, series)
+            count += len(batch)
+        return count
+
+    def get_invoice(self, invoice_id: int) -> Invoice | None:
+        """Returns invoice with line items by id or None."""
+
+        return self.storage.get_invoice(invoice_id)
+
+    def next_invoice_no(self, year: int | None = None, series: str = "") -> str:
+        """Returns the number the next invoice of series in year (default this year)
+        gets when saved without a number."""
+
+        return self.storage.next_invoice_no(year or date.today().year, series)
+
+    def find_invoices(self, search: str = "", limit: int = 50) -> list[tuple]:
+        """Returns (id, customer_name, invoice_no, invoice_date, total) of invoices.
+        search is an ISO date (invoices of that day, newest first) or words matched
+        as prefixes in customer, number, services and description (best match
+        first). total is Decimal."""
+
+        if search and not _is_date(search):
+            ranked = self.storage.search_invoices(search, None, limit)
+            rows = [row[1:] for row in ranked]
+        else:
+            rows = self.storage.page_invoices(None, limit, search=search)
+        return [
+            (id, name, no, date.fromisoformat(day), from_cents(total))
+            for id, name, no, day, total in rows
+        ]
+
+    def iter_invoices(self, date_from: date, date_to: date):
+        """Yields invoices (with line items) dated from date_from to date_to."""
+
+        return self.storage.iter_invoices(date_from, date_to)
+
+    def delete_invoice(self, invoice_id: int):
+        """Deletes invoice and its line items."""
+
+        self.storage.delete_invoice(invoice_id)
+
+    # reports
+
+    def rebuild_revenue(self):
+        """Recalculates revenue summaries (reports) and service uses from all
+        invoices."""
+
+        self.storage.rebuild_revenue()
+
+    # PDF
+
+    def render_pdf(self, invoice_id: int, path: str):
+        """Renders invoice to PDF file at path. Raises KeyError for unknown id."""
+
+        # imported here, reportlab is only needed for PDF output
+        from core.pdf import render_invoice
+
+        invoice = self.storage.get_invoice(invoice_id)
+        if invoice is None:
+            raise KeyError(invoice_id)
+        render_invoice(invoice, self.storage.load_settings(), path)
+
+    def export_pdfs(self, date_from: date, date_to: date, **kwargs):
+        """Renders PDFs of invoices in a date range on a process pool, see
+        core.batch.export_pdfs() for arguments. Returns BatchResult."""
+
+        from core.batch import export_pdfs
+
+        return export_pdfs(self.storage.path, date_from, date_to, **kwargs)
+
+
+def _decimal(value) -> Decimal:
+    # via str, so floats keep their printed value and "1234,56" is accepted
+    return parse_decimal(str(value))
+
+
+def _is_date(text: str) -> bool:
+    try:
+        date.fromisoformat(text)
+    except ValueError:
+        return False
+    return True
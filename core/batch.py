@@ -0,0 +1,174 @@
+"""
+Batch - PDF export of all invoices in a date range across a process pool.
+
+Invoices are streamed from storage one at a time and only a small window of
+them (a few per worker) is in flight, so memory use does not depend on the
+number of invoices. Each worker process renders invoices to separate files;
+with merge_path chunks of invoices are rendered to multi-invoice files (sharing
+one embedded company header) in a temporary directory and joined into one PDF
+(needs pypdf).
+"""
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import date
+
+from core.models import pdf_file_name
+from core.pdf import render_invoices
+from core.storage import Storage
+
+# render tasks in flight per worker process
+WINDOW_PER_WORKER = 4
+# invoices per file rendered for a merged PDF
+MERGE_CHUNK = 25
+
+# company settings of the worker process, set once by _init_worker()
+_settings = {}
+
+
+@dataclass
+class BatchResult:
+    """Result of export_pdfs()."""
+
+    count: int
+    seconds: float
+    output: str
+    cancelled: bool = False
+
+    @property
+    def rate(self) -> float:
+        """Throughput in invoices per second."""
+
+        return self.count / self.seconds if self.seconds else 0.0
+
+
+def _init_worker(settings: dict):
+    global _settings
+    _settings = settings
+
+
+def _render(invoices: list, path: str) -> int:
+    return render_invoices(invoices, _settings, path)
+
+
+def export_pdfs(
+    db_path: str,
+    date_from: date,
+    date_to: date,
+    out_dir: str | None = None,
+    merge_path: str | None = None,
+    workers: int | None = None,
+    progress=None,
+    cancel=None,
+) -> BatchResult:
+    """Renders PDFs of all invoices dated from date_from to date_to. For export,
+    the following is needed:
+
+    db_path: str - Database file (opened separately, so export can run on any thread);
+    out_dir: str | None - Directory for one PDF per invoice;
+    merge_path: str | None - Single PDF with all invoices, instead of out_dir;
+    workers: int | None - Number of worker processes, default all cores;
+    progress: callable | None - Called with (done, total, invoices per second);
+    cancel: threading.Event | None - When set, no new invoices are started."""
+
+    if (out_dir is None) == (merge_path is None):
+        raise ValueError("exactly one of out_dir and merge_path is needed")
+    workers = workers or os.cpu_count() or 1
+
+    storage = Storage(db_path)
+    settings = storage.load_settings()
+    total = storage.count_invoices(date_from, date_to)
+
+    temp_dir = tempfile.TemporaryDirectory() if merge_path else None
+    target = temp_dir.name if temp_dir else out_dir
+    os.makedirs(target, exist_ok=True)
+
+    start = time.perf_counter()
+    done = 0
+    cancelled = False
+    # rendered files in invoice order, for merging
+    files = []
+    try:
+        # spawn - forking a process that runs Tk (GUI export) is not safe
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings,),
+        ) as pool:
+            pending = set()
+            for path, invoices in _tasks(
+                storage, date_from, date_to, target, merge_path
+            ):
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                files.append(path)
+                pending.add(pool.submit(_render, invoices, path))
+
+                # bounded window - wait for a result before streaming more
+                if len(pending) >= workers * WINDOW_PER_WORKER:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    done += _collect(finished)
+                    _report(progress, done, total, start)
+
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                done += _collect(finished)
+                _report(progress, done, total, start)
+
+        if merge_path and not cancelled:
+            merge_pdfs(files, merge_path)
+    finally:
+        storage.close()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    output = merge_path or out_dir
+    return BatchResult(done, time.perf_counter() - start, output, cancelled)
+
+
+def _tasks(storage, date_from, date_to, target: str, merge_path: str | None):
+    """Yields (path, invoices) render tasks - one invoice per file, or chunks of
+    MERGE_CHUNK invoices for a merged PDF."""
+
+    if not merge_path:
+        for invoice in storage.iter_invoices(date_from, date_to):
+            yield os.path.join(target, pdf_file_name(invoice)), [invoice]
+        return
+
+    chunk = []
+    for invoice in storage.iter_invoices(date_from, date_to):
+        chunk.append(invoice)
+        if len(chunk) == MERGE_CHUNK:
+            yield os.path.join(target, f"{invoice.id}.pdf"), chunk
+            chunk = []
+    if chunk:
+        yield os.path.join(target, f"{chunk[-1].id}.pdf"), chunk
+
+
+def merge_pdfs(files: list[str], path: str):
+    """Joins PDF files into one PDF at path."""
+
+    # optional dependency, only needed for merged output
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for file in files:
+        writer.append(file)
+    with open(path, "wb") as output:
+        writer.write(output)
+
+
+def _collect(finished) -> int:
+    # number of rendered invoices, re-raises render errors from worker processes
+    return sum(future.result() for future in finished)
+
+
+def _report(progress, done: int, total: int, start: float):
+    if progress is not None:
+        seconds = time.perf_counter() - start
+        progress(done, total, done / seconds if seconds else 0.0)
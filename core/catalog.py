@@ -0,0 +1,151 @@
+"""
+Service catalog - autocomplete of invoice lines learned from the invoice history.
+
+Every distinct service (type of service and unit, compared folded like the
+customer search) has a score: each use adds 2 ** (months since 2000 /
+HALF_LIFE), so a use HALF_LIFE months later counts twice as much - services
+used often and recently rank first, and no score ever has to be decayed.
+
+For every prefix (up to MAX_PREFIX characters) of every word of the services,
+the TOP best scoring services are kept ranked in advance, so a suggestion is a
+dict lookup plus a short filter. Saving an invoice only re-ranks the prefixes
+of its services: scores only grow, so no other service changes place.
+
+The history comes from the service_uses summary of Storage (uses per service,
+unit and month), a few hundred rows however many invoices there are, so the
+catalog is loaded at startup.
+"""
+from datetime import date
+from decimal import Decimal
+
+from core.models import LineItem, from_cents, service_name
+from core.search_index import fold, tokens
+
+# suggestions shown
+SUGGESTIONS = 8
+# services ranked per prefix
+TOP = 20
+# longest prefix ranked in advance, longer words are checked on the folded text
+MAX_PREFIX = 12
+# months after which a use counts twice as much
+HALF_LIFE = 6
+
+
+class Service:
+    """Catalog entry - the last spelling and price of a service."""
+
+    __slots__ = ("name", "unit", "price", "last", "score", "text")
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.price = Decimal(0)
+        # ISO date of the last use
+        self.last = ""
+        self.score = 0.0
+        # folded words, with a leading space for word prefix checks
+        self.text = " " + " ".join(tokens(name))
+
+    def use(self, name: str, price: Decimal, used: str, count: int = 1):
+        """Adds count uses on ISO date used, keeping name and price of the latest."""
+
+        self.score += count * 2 ** (_months(used) / HALF_LIFE)
+        if used >= self.last:
+            self.name, self.price, self.last = name, price, used
+
+    def prefixes(self) -> set[str]:
+        return {
+            word[:length]
+            for word in self.text.split()
+            for length in range(1, min(len(word), MAX_PREFIX) + 1)
+        }
+
+
+class ServiceCatalog:
+    """Ranked prefix index of services."""
+
+    def __init__(self):
+        # (folded name, unit) -> Service
+        self.services = {}
+        # prefix -> service keys, best first
+        self.ranked = {}
+
+    def __len__(self):
+        return len(self.services)
+
+    def load(self, rows):
+        """Builds the catalog from Storage.service_history() rows, replacing its
+        contents."""
+
+        services = {}
+        for name, unit, count, last, price in rows:
+            key = (fold(name), unit)
+            service = services.get(key)
+            if service is None:
+                service = services[key] = Service(name, unit)
+            service.use(name, from_cents(price), last, count)
+
+        by_prefix = {}
+        for key, service in services.items():
+            for prefix in service.prefixes():
+                by_prefix.setdefault(prefix, []).append(key)
+        ranked = {}
+        for prefix, keys in by_prefix.items():
+            keys.sort(key=lambda key: services[key].score, reverse=True)
+            ranked[prefix] = keys[:TOP]
+        self.services, self.ranked = services, ranked
+
+    def add(self, items: list[LineItem], used: date):
+        """Adds line items of an invoice saved with date used."""
+
+        for item in items:
+            name = service_name(item.type_of_service)
+            if not name:
+                continue
+            key = (fold(name), item.unit)
+            service = self.services.get(key)
+            if service is None:
+                service = self.services[key] = Service(name, item.unit)
+            service.use(name, item.price, used.isoformat())
+            self._rank(key, service)
+
+    def suggest(self, query: str, limit: int = SUGGESTIONS) -> list[tuple]:
+        """Returns up to limit (type_of_service, unit, price) lines of the best
+        ranked services with a word starting with every word of query."""
+
+        words = tokens(query)
+        if not words:
+            return []
+        # the longest word has the shortest ranking
+        longest = max(words, key=len)
+        others = [" " + word for word in words]
+        results = []
+        for key in self.ranked.get(longest[:MAX_PREFIX], ()):
+            service = self.services[key]
+            if all(word in service.text for word in others):
+                results.append((service.name, service.unit, service.price))
+                if len(results) == limit:
+                    break
+        return results
+
+    def _rank(self, key: tuple, service: Service):
+        # the score of service grew, move it up in the rankings of its prefixes
+        for prefix in service.prefixes():
+            keys = self.ranked.setdefault(prefix, [])
+            if key in keys:
+                keys.remove(key)
+            position = 0
+            while (
+                position < len(keys)
+                and self.services[keys[position]].score >= service.score
+            ):
+                position += 1
+            if position < TOP:
+                keys.insert(position, key)
+                del keys[TOP:]
+
+
+def _months(day: str) -> int:
+    """Returns months from January 2000 to the month of ISO date day."""
+
+    return (int(day[:4]) - 2000) * 12 + int(day[5:7]) - 1
@@ -0,0 +1,242 @@
+"""
+Customer import - streaming bulk import of customers from CSV or XLSX files.
+
+Rows are read one at a time (csv module, openpyxl in read-only mode), validated
+and saved in chunks of CHUNK_SIZE rows, one transaction per chunk, so memory use
+does not depend on the size of the file. A customer with the PIB (or MB) of an
+existing customer updates it instead of adding a duplicate.
+
+Columns are type, name, address, city, email, MB, PIB - in this order, or in
+any order when the first row is a header (see HEADERS). Rows that are not
+valid are written to a CSV report with the line number and the reason.
+"""
+import csv
+import os
+import re
+import time
+from dataclasses import dataclass
+from itertools import chain, islice
+
+from core.models import Customer, valid_id_no, valid_tax_id
+from core.storage import Storage
+
+# rows saved per transaction
+CHUNK_SIZE = 2000
+# Customer fields in the order of the columns of a file without a header
+FIELDS = ("type", "name", "address", "city", "email", "id_no", "tax_id")
+# header names (lower case) of the columns
+HEADERS = {
+    "type": "type",
+    "tip": "type",
+    "vrsta": "type",
+    "vrsta lica": "type",
+    "name": "name",
+    "naziv": "name",
+    "ime": "name",
+    "ime/naziv": "name",
+    "address": "address",
+    "adresa": "address",
+    "city": "city",
+    "grad": "city",
+    "mesto": "city",
+    "email": "email",
+    "e-mail": "email",
+    "mb": "id_no",
+    "maticni broj": "id_no",
+    "matični broj": "id_no",
+    "pib": "tax_id",
+}
+# customer types of the Customers screen and how they may be written in a file
+CUSTOMER_TYPES = {
+    "": "",
+    "f": "Fizičko lice",
+    "fl": "Fizičko lice",
+    "fizicko": "Fizičko lice",
+    "fizičko": "Fizičko lice",
+    "fizicko lice": "Fizičko lice",
+    "fizičko lice": "Fizičko lice",
+    "p": "Pravno lice",
+    "pl": "Pravno lice",
+    "pravno": "Pravno lice",
+    "pravno lice": "Pravno lice",
+}
+EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+@dataclass
+class ImportResult:
+    """Result of import_customers()."""
+
+    inserted: int
+    updated: int
+    rejected: int
+    seconds: float
+    report: str | None = None
+    cancelled: bool = False
+
+    @property
+    def rate(self) -> float:
+        """Throughput in rows per second."""
+
+        rows = self.inserted + self.updated + self.rejected
+        return rows / self.seconds if self.seconds else 0.0
+
+
+def import_customers(
+    db_path: str,
+    path: str,
+    report_path: str | None = None,
+    progress=None,
+    cancel=None,
+) -> ImportResult:
+    """Imports customers from a CSV or XLSX file. For import, the following is
+    needed:
+
+    db_path: str - Database file (opened separately, so import can run on any thread);
+    path: str - .csv or .xlsx file;
+    report_path: str | None - CSV file for rejected rows, default next to path;
+    progress: callable | None - Called with (rows done, rows rejected, rows per
+        second) after every chunk;
+    cancel: threading.Event | None - When set, import stops after the current chunk
+        (saved chunks stay saved)."""
+
+    report_path = report_path or os.path.splitext(path)[0] + "-odbijeni.csv"
+    storage = Storage(db_path)
+    start = time.perf_counter()
+    inserted = updated = rejected = done = 0
+    cancelled = False
+    report = None
+    try:
+        lines = enumerate(read_rows(path), start=1)
+        columns, header = FIELDS, list(FIELDS)
+        first = next(lines, None)
+        if first is not None:
+            found = [HEADERS.get(cell.strip().lower()) for cell in first[1]]
+            if "name" in found:
+                columns, header = found, first[1]
+            else:
+                lines = chain([first], lines)
+        rows = _customers(lines, columns)
+
+        while chunk := list(islice(rows, CHUNK_SIZE)):
+            customers = []
+            for line, row, result in chunk:
+                if isinstance(result, Customer):
+                    customers.append(result)
+                    continue
+                if report is None:
+                    report = _Report(report_path, header)
+                report.write(line, result, row)
+                rejected += 1
+
+            added, changed = storage.upsert_customers(customers)
+            inserted += added
+            updated += changed
+            done += len(chunk)
+            if progress is not None:
+                seconds = time.perf_counter() - start
+                progress(done, rejected, done / seconds if seconds else 0.0)
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+    finally:
+        storage.close()
+        if report is not None:
+            report.close()
+
+    return ImportResult(
+        inserted,
+        updated,
+        rejected,
+        time.perf_counter() - start,
+        report_path if report is not None else None,
+        cancelled,
+    )
+
+
+def read_rows(path: str):
+    """Yields rows (lists of str) of a .csv or .xlsx file, including the header."""
+
+    if path.lower().endswith(".xlsx"):
+        yield from _xlsx_rows(path)
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(file, dialect)
+
+
+def _xlsx_rows(path: str):
+    # optional dependency, only needed for Excel files
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for values in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else _cell(value) for value in values]
+    finally:
+        workbook.close()
+
+
+def _cell(value) -> str:
+    # numbers (MB, PIB typed as numbers in Excel) without ".0"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _customers(lines, columns):
+    """Yields (line number, row, Customer or reason it is rejected) for non-empty
+    (line number, row) lines."""
+
+    for line, row in lines:
+        if any(cell.strip() for cell in row):
+            yield line, row, _customer(columns, row)
+
+
+def _customer(columns, row) -> Customer | str:
+    """Returns Customer from row, or reason why it is not valid."""
+
+    values = dict.fromkeys(FIELDS, "")
+    for field, cell in zip(columns, row):
+        if field is not None:
+            values[field] = cell.strip()
+
+    customer_type = CUSTOMER_TYPES.get(values["type"].lower())
+    if customer_type is None:
+        return f"nepoznata vrsta lica: {values['type']}"
+    values["type"] = customer_type
+    if not values["name"]:
+        return "nema imena/naziva"
+    # MB and PIB without leading zeros (numbers in Excel)
+    if values["id_no"].isdigit():
+        values["id_no"] = values["id_no"].zfill(8)
+    if values["tax_id"].isdigit():
+        values["tax_id"] = values["tax_id"].zfill(9)
+    if values["id_no"] and not valid_id_no(values["id_no"]):
+        return f"neispravan matični broj: {values['id_no']}"
+    if values["tax_id"] and not valid_tax_id(values["tax_id"]):
+        return f"neispravan PIB: {values['tax_id']}"
+    if values["email"] and not EMAIL.fullmatch(values["email"]):
+        return f"neispravan e-mail: {values['email']}"
+    return Customer(**values)
+
+
+class _Report:
+    """Rejected rows CSV: line number, reason and the original row."""
+
+    def __init__(self, path: str, header: list[str]):
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["red", "razlog", *header])
+
+    def write(self, line: int, reason: str, row: list[str]):
+        self.writer.writerow([line, reason, *row])
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,97 @@
+"""
+Details - lazily loaded full invoices of the review list.
+
+The review list only holds (id, customer, number, date, total) rows. The full
+invoice (customer block, line items, comment) of a row is loaded when the row
+is selected, the rows PREFETCH above and below it are loaded in the background
+(see ReviewInvoices.show_selected), so browsing with the arrow keys finds them
+already cached. Invoices of rows more than KEEP rows away from the selection
+are dropped, and at most CACHE_SIZE invoices are kept in any case (least
+recently used are dropped first).
+"""
+from collections import OrderedDict
+
+from core.models import Invoice
+
+# rows above and below the selected row loaded in the background
+PREFETCH = 3
+# cached invoices of rows farther from the selection are dropped
+KEEP = 25
+# most invoices kept
+CACHE_SIZE = 64
+
+
+class InvoiceDetails:
+    """LRU cache of full invoices by id. For object creation, the following is
+    needed:
+
+    maxsize: int - Number of kept invoices, least recently used is dropped first."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, invoice_id: int) -> bool:
+        return invoice_id in self.items
+
+    def load(self, storage, invoice_id: int) -> Invoice | None:
+        """Returns invoice by id, from the cache or from storage (None when it
+        was deleted)."""
+
+        invoice = self.items.get(invoice_id)
+        if invoice is not None:
+            self.items.move_to_end(invoice_id)
+            return invoice
+        invoice = storage.get_invoice(invoice_id)
+        if invoice is not None:
+            self.add({invoice_id: invoice})
+        return invoice
+
+    def add(self, invoices: dict):
+        """Caches invoices (id -> Invoice or None), e.g. prefetched ones."""
+
+        for invoice_id, invoice in invoices.items():
+            if invoice is None:
+                continue
+            self.items[invoice_id] = invoice
+            self.items.move_to_end(invoice_id)
+        while len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+
+    def select(self, invoice_ids: list, index: int) -> list[int]:
+        """Drops invoices of rows farther than KEEP from the selected row at index
+        of invoice_ids (ids of the listed rows, in order). Returns ids of the
+        rows around it to prefetch - the nearest first, cached ones left out."""
+
+        near = set(invoice_ids[max(index - KEEP, 0) : index + KEEP + 1])
+        for invoice_id in [key for key in self.items if key not in near]:
+            del self.items[invoice_id]
+
+        missing = []
+        for distance in range(1, PREFETCH + 1):
+            for position in (index + distance, index - distance):
+                if 0 <= position < len(invoice_ids):
+                    invoice_id = invoice_ids[position]
+                    if invoice_id not in self.items and invoice_id not in missing:
+                        missing.append(invoice_id)
+        return missing
+
+    def discard(self, invoice_id: int):
+        """Drops invoice (changed or deleted)."""
+
+        self.items.pop(invoice_id, None)
+
+    def clear(self):
+        """Drops all invoices (e.g. the list was searched again)."""
+
+        self.items.clear()
+
+
+def fetch_invoices(storage, invoice_ids: list) -> dict:
+    """Returns invoices (id -> Invoice or None) of invoice_ids from storage, run on
+    the search thread for prefetching."""
+
+    return {invoice_id: storage.get_invoice(invoice_id) for invoice_id in invoice_ids}
@@ -0,0 +1,177 @@
+"""
+Drafts - crash safe autosave of the unsaved Invoices form.
+
+The form is journaled in an append-only JSON Lines file. Each autosave appends
+only what changed since the previous one:
+    - {"fields": {"customer_name": "Petar", ...}} - changed form fields
+    - {"item": 3, "values": ["Servis", "kom", "2", "1500.00", "20"]} - line item
+      added or edited (by LineItems key)
+    - {"item": 3, "values": null} - line item deleted
+Replaying the file gives the last draft (load()), a torn last line (power loss
+while writing) is skipped.
+
+Writing happens on a worker thread, so the Tk thread only diffs the form and
+queues lines. The worker fsyncs at most once per SYNC_INTERVAL seconds and,
+after COMPACT_AFTER appended records, the journal is compacted - replaced with
+a snapshot of the current draft (written to a temporary file, fsynced and
+renamed over the journal).
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+# default journal file, next to the database
+DRAFT_PATH = "invoice-draft.jsonl"
+# seconds between fsyncs of appended records
+SYNC_INTERVAL = 1.0
+# appended records after which the journal is compacted
+COMPACT_AFTER = 500
+
+
+class DraftJournal:
+    """Journal of the draft invoice. For object creation, the following is needed:
+
+    path: str - Journal file. An existing journal is loaded (see draft);
+    ignore: tuple - Fields with a default value (e.g. today's date), see load()."""
+
+    def __init__(self, path: str = DRAFT_PATH, ignore: tuple = ()):
+        self.path = path
+        # last draft of the previous session, or None
+        self.draft = load(path, ignore)
+        # journaled state - field name -> value, line item key -> values
+        self.fields = {}
+        self.items = {}
+        self.appended = 0
+        if self.draft is not None:
+            self.fields, self.items = self.draft[0].copy(), self.draft[1].copy()
+
+        self.queue = queue.SimpleQueue()
+        self.worker = threading.Thread(target=self._write, name="drafts", daemon=True)
+        self.worker.start()
+
+    def record(self, fields: dict, items: dict):
+        """Journals the form - fields (name -> str) and line items (key -> list of
+        str values). Only differences to the previous record are written."""
+
+        lines = []
+        changed = {
+            name: value
+            for name, value in fields.items()
+            if self.fields.get(name) != value
+        }
+        if changed:
+            self.fields.update(changed)
+            lines.append({"fields": changed})
+        for key, values in items.items():
+            if self.items.get(key) != values:
+                self.items[key] = values
+                lines.append({"item": key, "values": values})
+        for key in self.items.keys() - items.keys():
+            del self.items[key]
+            lines.append({"item": key, "values": None})
+        if not lines:
+            return
+
+        self.appended += len(lines)
+        if self.appended > COMPACT_AFTER:
+            self.rewrite(self.fields, self.items)
+        else:
+            self.queue.put(("append", "".join(_line(record) for record in lines)))
+
+    def rewrite(self, fields: dict, items: dict):
+        """Replaces the journal with a snapshot of fields and items."""
+
+        self.fields, self.items = dict(fields), dict(items)
+        self.appended = 0
+        records = [{"fields": self.fields}] if self.fields else []
+        records += [{"item": key, "values": values} for key, values in items.items()]
+        self.queue.put(("rewrite", "".join(_line(record) for record in records)))
+
+    def clear(self):
+        """Empties the journal (draft saved or discarded)."""
+
+        self.draft = None
+        self.rewrite({}, {})
+
+    def close(self):
+        """Writes and fsyncs queued records and stops the worker."""
+
+        self.queue.put(("stop", None))
+        self.worker.join()
+
+    def _write(self):
+        file = open(self.path, "a", encoding="utf-8")
+        dirty = False
+        synced = time.monotonic()
+        while True:
+            timeout = max(0.0, SYNC_INTERVAL - (time.monotonic() - synced))
+            try:
+                command, text = self.queue.get(timeout=timeout if dirty else None)
+            except queue.Empty:
+                command = None
+
+            if command == "append":
+                file.write(text)
+                file.flush()
+                dirty = True
+            elif command == "rewrite":
+                file.close()
+                _replace(self.path, text)
+                file = open(self.path, "a", encoding="utf-8")
+                dirty = False
+            elif command == "stop":
+                break
+
+            if dirty and time.monotonic() - synced >= SYNC_INTERVAL:
+                os.fsync(file.fileno())
+                dirty = False
+                synced = time.monotonic()
+        if dirty:
+            os.fsync(file.fileno())
+        file.close()
+
+
+def load(path: str, ignore: tuple = ()) -> tuple[dict, dict] | None:
+    """Returns (fields, items) of the draft in the journal at path, or None when
+    there is no draft - no line items and no filled field besides those in
+    ignore (fields the form fills in by itself)."""
+
+    fields, items = {}, {}
+    try:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn write at the end of the journal
+                    break
+                if "fields" in record:
+                    fields.update(record["fields"])
+                elif record["values"] is None:
+                    items.pop(record["item"], None)
+                else:
+                    items[record["item"]] = record["values"]
+    except FileNotFoundError:
+        return None
+    if not items and not any(
+        value for name, value in fields.items() if name not in ignore
+    ):
+        return None
+    return fields, items
+
+
+def _line(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _replace(path: str, text: str):
+    """Atomically replaces file at path with text."""
+
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
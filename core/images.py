@@ -0,0 +1,98 @@
+"""
+Images - decoded and downscaled logo cache shared by the GUI and PDF output.
+
+Every image is resampled once per target size and the result is stored on disk
+(CACHE_DIR), keyed by source path, modification time and size, so a changed
+logo file is picked up automatically and an unchanged one is never resampled
+again. Ready-to-use image objects (Tk PhotoImage, reportlab ImageReader) are
+kept in small in-memory LRU caches (ImageCache).
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# downscaled copies of images, next to main.py
+CACHE_DIR = os.path.join(".cache", "images")
+
+
+class ImageCache:
+    """Thread-safe LRU of image objects. For object creation, the following is needed:
+
+    maxsize: int - Number of kept objects, least recently used is dropped first."""
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, factory):
+        """Returns object for key, creating it with factory() when not cached."""
+
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                return self.items[key]
+
+        value = factory()
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drops all cached objects."""
+
+        with self.lock:
+            self.items.clear()
+
+
+def image_key(path: str, size: tuple[int, int] | None = None) -> tuple:
+    """Returns cache key of image at path resampled to size: (absolute path,
+    modification time, size)."""
+
+    path = os.path.abspath(path)
+    return path, os.stat(path).st_mtime_ns, size
+
+
+def scaled_path(path: str, size: tuple[int, int] | None = None) -> str:
+    """Returns path of the image downscaled to fit in size (width, height) pixels,
+    keeping aspect ratio. Images that already fit (or size None) are not copied."""
+
+    if size is None:
+        return path
+    key = image_key(path, size)
+    name = hashlib.sha1(repr(key).encode()).hexdigest() + ".png"
+    cached = os.path.join(CACHE_DIR, name)
+    if os.path.exists(cached):
+        return cached
+
+    from PIL import Image
+
+    with Image.open(path) as image:
+        if image.width <= size[0] and image.height <= size[1]:
+            return path
+        image.thumbnail(size, Image.LANCZOS)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # written under a temporary name, other processes never see half a file
+        partial = f"{cached}.{os.getpid()}.part"
+        image.save(partial, "PNG", optimize=True)
+    os.replace(partial, cached)
+    return cached
+
+
+# reportlab images for PDF output
+_pdf_images = ImageCache()
+
+
+def pdf_image(path: str, size: tuple[int, int] | None = None):
+    """Returns reportlab ImageReader of the image at path, downscaled to fit size."""
+
+    # imported here, the GUI uses this module without needing reportlab
+    from reportlab.lib.utils import ImageReader
+
+    return _pdf_images.get(
+        image_key(path, size), lambda: ImageReader(scaled_path(path, size))
+    )
@@ -0,0 +1,234 @@
+"""
+Jobs - runs PDF renders and batch exports on worker threads so the GUI never
+waits for them.
+
+Workers only put events in a queue. The GUI drains the queue with poll() from
+an after() callback on the Tk main thread, which is the only thread allowed to
+touch widgets. Events are (kind, job_id, value) tuples:
+    - ("progress", job_id, fraction)
+    - ("done", job_id, path)
+    - ("cancelled", job_id, path)
+    - ("error", job_id, message)
+
+Batch jobs (BatchJob - PDF export, customer import) report ("progress", None,
+progress values) and finish with ("done", None, result) or ("error", None,
+message).
+
+Searches (SearchExecutor) run one at a time on a worker thread with its own
+database connection. A new search on a channel (one search box) supersedes the
+older one: it is dropped before it starts, or interrupted while it runs, and
+poll() only returns results of the newest search of every channel.
+
+The renderer (reportlab) is imported by the first job, so creating RenderJobs
+at app startup costs nothing.
+"""
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.storage import Storage
+
+
+class RenderJobs:
+    """Background PDF renderer. For object creation, the following is needed:
+
+    max_workers: int - Number of renders running at the same time."""
+
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="pdf")
+        self.events = queue.SimpleQueue()
+        # job_id -> cancel event of jobs that did not finish yet
+        self.active = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, invoice, settings: dict, path: str) -> int:
+        """Starts rendering invoice to path. Returns job id."""
+
+        job_id = next(self._ids)
+        cancel = threading.Event()
+        self.active[job_id] = cancel
+        self.executor.submit(self._run, job_id, invoice, dict(settings), path, cancel)
+        return job_id
+
+    def cancel(self, job_id: int):
+        """Requests cancellation of job. Job reports "cancelled" once it stops."""
+
+        cancel = self.active.get(job_id)
+        if cancel is not None:
+            cancel.set()
+
+    def poll(self) -> list[tuple]:
+        """Returns all events that arrived since the last poll (does not block)."""
+
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            if event[0] != "progress":
+                self.active.pop(event[1], None)
+            events.append(event)
+
+    def shutdown(self):
+        """Cancels running jobs and stops worker threads."""
+
+        for cancel in self.active.values():
+            cancel.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id, invoice, settings, path, cancel):
+        try:
+            from core.pdf import RenderCancelled, render_invoice
+        except ImportError as error:  # reportlab missing
+            self.events.put(("error", job_id, str(error)))
+            return
+
+        def progress(fraction):
+            self.events.put(("progress", job_id, fraction))
+
+        try:
+            render_invoice(invoice, settings, path, progress, cancel)
+        except RenderCancelled:
+            self.events.put(("cancelled", job_id, path))
+        except Exception as error:  # reported to the GUI, worker must not die
+            self.events.put(("error", job_id, str(error)))
+        else:
+            self.events.put(("done", job_id, path))
+
+
+class BatchJob:
+    """Batch function (core.batch.export_pdfs, core.customer_import.import_customers)
+    on a background thread. For object creation, the following is needed:
+
+    target: callable - Called with args, kwargs and progress and cancel keyword
+        arguments, returns the result of the job;
+    args, kwargs - Other arguments of target."""
+
+    def __init__(self, target, *args, **kwargs):
+        self.events = queue.SimpleQueue()
+        self.cancel_event = threading.Event()
+        self.finished = False
+        self.thread = threading.Thread(
+            target=self._run, args=(target, *args), kwargs=kwargs, daemon=True
+        )
+        self.thread.start()
+
+    def cancel(self):
+        """Asks the job to stop. Work already started (a rendered invoice, a saved
+        chunk of customers) is finished."""
+
+        self.cancel_event.set()
+
+    def poll(self) -> list[tuple]:
+        """Returns all events that arrived since the last poll (does not block)."""
+
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            if event[0] != "progress":
+                self.finished = True
+            events.append(event)
+
+    def _run(self, target, *args, **kwargs):
+        def progress(*values):
+            self.events.put(("progress", None, values))
+
+        try:
+            result = target(
+                *args, progress=progress, cancel=self.cancel_event, **kwargs
+            )
+        except Exception as error:  # reported to the GUI, thread must not die silently
+            self.events.put(("error", None, str(error)))
+        else:
+            self.events.put(("done", None, result))
+
+
+class SearchExecutor:
+    """Runs searches on a worker thread. For object creation, the following is
+    needed:
+
+    db_path: str - Database file, opened by the worker thread."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.requests = queue.SimpleQueue()
+        self.results = queue.SimpleQueue()
+        # channel -> number of its newest search
+        self.latest = {}
+        self._numbers = itertools.count(1)
+        # (channel, number) of the running search and the worker's storage
+        self.running = None
+        self.storage = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._work, daemon=True, name="search")
+        self.thread.start()
+
+    @property
+    def pending(self) -> bool:
+        """True while any channel waits for results."""
+
+        return bool(self.latest)
+
+    def submit(self, channel: str, func, callback):
+        """Runs func(storage) on the worker thread; callback gets its result from
+        poll(). Supersedes the previous search of channel."""
+
+        number = next(self._numbers)
+        with self.lock:
+            self.latest[channel] = number
+            if self.running is not None and self.running[0] == channel:
+                # older search of the same box is still running
+                self.storage.interrupt()
+        self.requests.put((channel, number, func, callback))
+
+    def poll(self) -> list[tuple]:
+        """Returns (callback, result, error) of finished newest searches (does not
+        block). error is None or the exception raised by the search."""
+
+        finished = []
+        while True:
+            try:
+                channel, number, callback, result, error = self.results.get_nowait()
+            except queue.Empty:
+                return finished
+            with self.lock:
+                if self.latest.get(channel) != number:
+                    continue
+                del self.latest[channel]
+            finished.append((callback, result, error))
+
+    def shutdown(self):
+        """Stops the worker thread after the running search."""
+
+        with self.lock:
+            self.latest.clear()
+            if self.running is not None:
+                self.storage.interrupt()
+        self.requests.put(None)
+
+    def _work(self):
+        self.storage = Storage(self.db_path)
+        try:
+            while (request := self.requests.get()) is not None:
+                channel, number, func, callback = request
+                with self.lock:
+                    if self.latest.get(channel) != number:
+                        continue
+                    self.running = (channel, number)
+                try:
+                    result, error = func(self.storage), None
+                except Exception as failed:  # e.g. interrupted, worker must not die
+                    result, error = None, failed
+                finally:
+                    with self.lock:
+                        self.running = None
+                        current = self.latest.get(channel) == number
+                if current:
+                    self.results.put((channel, number, callback, result, error))
+        finally:
+            self.storage.close()
@@ -0,0 +1,152 @@
+"""
+Models - plain data classes for customers, invoices and invoice line items.
+
+Money values are Decimal in Python and integer cents (para) in the database.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+# invoice number: optional series prefix, sequence number and year, e.g.
+# 123/2026 or A-123/2026
+INVOICE_NO = re.compile(r"(?P<series>\D*?)(?P<number>\d+)/(?P<year>\d{4})")
+# MB (maticni broj) check digit weights of the first 7 digits
+ID_NO_WEIGHTS = (2, 7, 6, 5, 4, 3, 2)
+
+
+@dataclass
+class Customer:
+    """Customer (komitent). Field names follow the Customers screen entries."""
+
+    name: str
+    type: str = ""
+    address: str = ""
+    city: str = ""
+    email: str = ""
+    # MB (maticni broj) and PIB (poreski identifikacioni broj)
+    id_no: str = ""
+    tax_id: str = ""
+    id: int | None = None
+
+
+@dataclass
+class LineItem:
+    """Single row of list_of_services: quantity * price without VAT, plus VAT."""
+
+    type_of_service: str
+    unit: str
+    quantity: Decimal
+    price: Decimal
+    # VAT rate in percent (e.g. 20), VAT amount and total with VAT
+    vat_rate: Decimal = Decimal(0)
+    vat: Decimal = Decimal(0)
+    total: Decimal = Decimal(0)
+
+
+@dataclass
+class Invoice:
+    """Invoice with customer data as printed on it (customer may not be in the DB)."""
+
+    invoice_no: str
+    invoice_date: date
+    customer_name: str
+    date_of_purchase: date | None = None
+    place_of_purchase: str = ""
+    customer_address: str = ""
+    customer_city: str = ""
+    customer_id_no: str = ""
+    customer_tax_id: str = ""
+    customer_email: str = ""
+    description: str = ""
+    items: list[LineItem] = field(default_factory=list)
+    total: Decimal = Decimal(0)
+    customer_id: int | None = None
+    id: int | None = None
+
+
+def to_cents(amount: Decimal) -> int:
+    """Returns amount as integer cents (para), rounded half up."""
+
+    return int((Decimal(amount) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Returns integer cents (para) as Decimal amount with 2 decimal places."""
+
+    return Decimal(cents).scaleb(-2)
+
+
+def parse_decimal(text: str) -> Decimal:
+    """Returns Decimal from user input, accepting both "1234.56" and "1234,56".
+    Raises decimal.InvalidOperation for invalid input."""
+
+    return Decimal(text.strip().replace(" ", "").replace(",", "."))
+
+
+def format_amount(amount: Decimal) -> str:
+    """Returns amount formatted the Serbian way, e.g. 1.234,56."""
+
+    return f"{amount:,.2f}".replace(",", " ").replace(".", ",").replace(" ", ".")
+
+
+def valid_tax_id(tax_id: str) -> bool:
+    """Returns True for a valid PIB: 9 digits, the last one is the ISO 7064
+    MOD 11,10 check digit of the first 8."""
+
+    if len(tax_id) != 9 or not tax_id.isdigit():
+        return False
+    product = 10
+    for digit in tax_id[:8]:
+        total = (int(digit) + product) % 10 or 10
+        product = total * 2 % 11
+    return (11 - product) % 10 == int(tax_id[8])
+
+
+def valid_id_no(id_no: str) -> bool:
+    """Returns True for a valid MB (maticni broj): 8 digits, the last one is the
+    MOD 11 check digit of the first 7 (weights 2, 7, 6, 5, 4, 3, 2). Checked
+    against registered MBs (python -m doctest core/models.py):
+
+    >>> all(map(valid_id_no, ["17162543", "20084693", "17474154"]))
+    True
+    >>> valid_id_no("17162544")
+    False
+    """
+
+    if len(id_no) != 8 or not id_no.isdigit():
+        return False
+    total = sum(int(digit) * weight for digit, weight in zip(id_no, ID_NO_WEIGHTS))
+    check = 11 - total % 11
+    return (0 if check > 9 else check) == int(id_no[7])
+
+
+def pdf_file_name(invoice: Invoice) -> str:
+    """Returns default PDF file name for invoice, e.g. faktura-12-2026.pdf."""
+
+    return f"faktura-{invoice.invoice_no.replace('/', '-')}.pdf"
+
+
+def format_invoice_no(number: int, year: int, series: str = "") -> str:
+    """Returns invoice number text, e.g. 123/2026 (or A-123/2026 for series A-)."""
+
+    return f"{series}{number}/{year}"
+
+
+def parse_invoice_no(text: str) -> tuple[str, int, int] | None:
+    """Returns (series, number, year) of invoice number text, or None if it is not
+    in the format of format_invoice_no()."""
+
+    match = INVOICE_NO.fullmatch(text.strip())
+    if match is None:
+        return None
+    return match["series"], int(match["number"]), int(match["year"])
+
+
+def service_name(type_of_service: str) -> str:
+    """Returns the name a type of service is counted under by the service catalog
+    (core.catalog) and Storage service uses - without surrounding whitespace,
+    empty for a line without a service."""
+
+    return type_of_service.strip()
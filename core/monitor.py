@@ -0,0 +1,161 @@
+"""
+Monitor - optional instrumentation for "the app hangs" reports.
+
+Three sources, all written as JSON lines to a rotating log file (LOG_PATH):
+    - stalls - the Tk main loop runs a heartbeat every HEARTBEAT_INTERVAL ms
+      (App.heartbeat); when it runs late by STALL_MS or more, the main loop was
+      blocked that long: {"event": "stall", "ms": 850.2}
+    - handlers - methods decorated with @timed (button commands) log their
+      duration and number of database queries:
+      {"event": "call", "name": "Invoices.save_invoice", "ms": 12.1, "queries": 9}
+    - queries - statements of every Storage connection are counted by kind
+      (SELECT, INSERT, ...) with the sqlite3 trace callback, a summary with the
+      counts and the longest stall is logged every SUMMARY_INTERVAL seconds
+
+Monitoring is off unless MONITOR.enable() is called (main.py does it when the
+INVOICE_APP_MONITOR environment variable is set). When it is off, no heartbeat
+is scheduled, no trace callback is installed and a @timed method only checks
+one attribute before calling the method.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+# log file, next to the database, and its rotation
+LOG_PATH = "monitor.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+# heartbeat period of the Tk main loop (ms) and the delay logged as a stall
+HEARTBEAT_INTERVAL = 100
+STALL_MS = 100
+# seconds between summaries
+SUMMARY_INTERVAL = 60
+
+
+class Monitor:
+    """Collects stalls, handler timings and query counts while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.logger = logging.getLogger("invoice_app.monitor")
+        self.logger.propagate = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears counters."""
+
+        self.queries = Counter()
+        self.query_count = 0
+        self.stall = 0.0
+        self.max_stall = 0.0
+        self.last_call = None
+        self.summary_at = time.monotonic()
+
+    def enable(self, path: str = LOG_PATH):
+        """Starts monitoring, logging to path. Only storages opened afterwards are
+        counted."""
+
+        if self.enabled:
+            return
+        # imported here, only needed when monitoring
+        from logging.handlers import RotatingFileHandler
+
+        handler = RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+        self.logger.setLevel(logging.INFO)
+        self.reset()
+        self.enabled = True
+        self.log("start")
+
+    def disable(self):
+        """Stops monitoring and closes the log."""
+
+        if not self.enabled:
+            return
+        self.log("stop")
+        self.enabled = False
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+
+    def log(self, event: str, **values):
+        """Writes one JSON line with the time, event and values."""
+
+        record = {"time": round(time.time(), 3), "event": event, **values}
+        self.logger.info(json.dumps(record, ensure_ascii=False))
+
+    def attach(self, conn):
+        """Counts statements executed on sqlite3 connection conn (when enabled)."""
+
+        if self.enabled:
+            conn.set_trace_callback(self.count_query)
+
+    def count_query(self, sql: str):
+        # sqlite3 trace callback, called on the thread of the connection
+        kind = sql.split(None, 1)[0].upper() if sql.strip() else "?"
+        with self.lock:
+            self.queries[kind] += 1
+            self.query_count += 1
+
+    def heartbeat(self, stall: float):
+        """Records stall (ms the heartbeat ran late). Logs a stall of STALL_MS or
+        more, and a summary every SUMMARY_INTERVAL seconds."""
+
+        self.stall = stall
+        self.max_stall = max(self.max_stall, stall)
+        if stall >= STALL_MS:
+            self.log("stall", ms=round(stall, 1))
+        now = time.monotonic()
+        if now - self.summary_at >= SUMMARY_INTERVAL:
+            with self.lock:
+                queries = dict(self.queries)
+            self.log("summary", max_stall_ms=round(self.max_stall, 1), queries=queries)
+            self.max_stall = 0.0
+            self.summary_at = now
+
+    def call(self, name: str, func, *args, **kwargs):
+        """Calls func, logging its duration and number of queries as name."""
+
+        queries = self.query_count
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            # queries of other threads running meanwhile are included
+            self.last_call = (name, ms, self.query_count - queries)
+            self.log("call", name=name, ms=round(ms, 1), queries=self.last_call[2])
+
+    def overview(self) -> str:
+        """Returns text of the debug overlay."""
+
+        lines = [
+            f"Zastoj: {self.stall:.0f} ms (maks. {self.max_stall:.0f} ms)",
+            f"Upiti: {self.query_count}",
+        ]
+        if self.last_call is not None:
+            name, ms, queries = self.last_call
+            lines.append(f"{name}: {ms:.0f} ms, {queries} upita")
+        return "\n".join(lines)
+
+
+MONITOR = Monitor()
+
+
+def timed(func):
+    """Decorator logging duration of each call of func while MONITOR is enabled."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not MONITOR.enabled:
+            return func(*args, **kwargs)
+        return MONITOR.call(func.__qualname__, func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,383 @@
+"""
+PDF - renders invoices to PDF files (A4) with reportlab.
+
+Rendering is split in parts (company header, customer block, line items, totals),
+and between parts the renderer reports progress and checks for cancellation, so
+it can run on a worker thread while the GUI shows progress (see core.jobs).
+
+The company header/footer is the same on every invoice, so it is prepared once
+per settings version (CompanyHeader, company_header()) and only the customer and
+line item parts are laid out per invoice.
+"""
+import hashlib
+import os
+import threading
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from core.images import pdf_image
+from core.models import format_amount
+from core.totals import LineItems
+
+# TrueType fonts with Serbian latin letters (č, ć, đ are missing in Helvetica),
+# first existing pair (regular, bold) is used
+FONT_PATHS = [
+    ("C:/Windows/Fonts/segoeui.ttf", "C:/Windows/Fonts/segoeuib.ttf"),
+    ("C:/Windows/Fonts/arial.ttf", "C:/Windows/Fonts/arialbd.ttf"),
+    (
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    ),
+    ("/Library/Fonts/Arial.ttf", "/Library/Fonts/Arial Bold.ttf"),
+]
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 20 * mm
+LINE = 5 * mm
+
+# logo box in the header, and its size in pixels at 300 dpi
+LOGO_WIDTH, LOGO_HEIGHT = 50 * mm, 19 * mm
+LOGO_PIXELS = (round(LOGO_WIDTH / 72 * 300), round(LOGO_HEIGHT / 72 * 300))
+
+# line items table: (title, x position, right aligned)
+COLUMNS = [
+    ("R.br.", MARGIN, False),
+    ("Vrsta usluge", MARGIN + 12 * mm, False),
+    ("Jedinica", MARGIN + 80 * mm, False),
+    ("Količina", MARGIN + 113 * mm, True),
+    ("Cena bez PDV-a", MARGIN + 138 * mm, True),
+    ("PDV", MARGIN + 152 * mm, True),
+    ("Ukupno", PAGE_WIDTH - MARGIN, True),
+]
+
+
+class RenderCancelled(Exception):
+    """Raised inside render_invoice() when rendering was cancelled."""
+
+
+@lru_cache(maxsize=None)
+def fonts() -> tuple[str, str]:
+    """Registers first available TrueType font pair and returns (regular, bold)
+    font names. Falls back to Helvetica."""
+
+    for regular, bold in FONT_PATHS:
+        if os.path.exists(regular) and os.path.exists(bold):
+            pdfmetrics.registerFont(TTFont("Invoice", regular))
+            pdfmetrics.registerFont(TTFont("Invoice-Bold", bold))
+            return "Invoice", "Invoice-Bold"
+    return "Helvetica", "Helvetica-Bold"
+
+
+def format_date(value) -> str:
+    """Returns date as dd.mm.yyyy. or empty string for None."""
+
+    return value.strftime("%d.%m.%Y.") if value else ""
+
+
+def render_invoice(invoice, settings: dict, path: str, progress=None, cancel=None):
+    """Renders invoice to PDF file at path. For rendering, the following is needed:
+
+    invoice: core.models.Invoice - Invoice with line items;
+    settings: dict - Company settings (see layout.Settings.FIELDS);
+    path: str - Output file path;
+    progress: callable | None - Called with fraction done (0..1) after every part;
+    cancel: threading.Event | None - When set, rendering stops with RenderCancelled
+        and no file is written."""
+
+    def step(fraction):
+        if cancel is not None and cancel.is_set():
+            raise RenderCancelled(path)
+        if progress is not None:
+            progress(fraction)
+
+    # rendered to a temporary file which replaces path only when complete
+    partial = path + ".part"
+    canvas = Canvas(partial, pagesize=A4, pageCompression=1)
+    canvas.setTitle(f"Faktura {invoice.invoice_no}")
+
+    draw_invoice(canvas, invoice, company_header(settings), step)
+    step(0.95)
+    # file is written only here, a cancelled render leaves nothing behind
+    canvas.save()
+    os.replace(partial, path)
+    if progress is not None:
+        progress(1.0)
+
+
+def render_invoices(invoices, settings: dict, path: str) -> int:
+    """Renders several invoices into one PDF file at path, each starting on a new
+    page. The company header is embedded once and reused by every page. Returns
+    number of rendered invoices."""
+
+    partial = path + ".part"
+    canvas = Canvas(partial, pagesize=A4, pageCompression=1)
+    header = company_header(settings)
+    count = 0
+    for count, invoice in enumerate(invoices, start=1):
+        if count > 1:
+            canvas.showPage()
+        draw_invoice(canvas, invoice, header)
+    canvas.save()
+    os.replace(partial, path)
+    return count
+
+
+def draw_invoice(canvas, invoice, header, step=None):
+    """Draws invoice on canvas, starting at the current page. step(fraction) is
+    called between parts (see render_invoice())."""
+
+    step = step or (lambda fraction: None)
+
+    y = header.draw(canvas)
+    step(0.2)
+    y = draw_customer(canvas, invoice, y)
+    step(0.3)
+
+    items = invoice.items
+    y = draw_items_header(canvas, y)
+    for no, item in enumerate(items, start=1):
+        if y < MARGIN + 3 * LINE:
+            canvas.showPage()
+            header.draw_footer(canvas)
+            y = draw_items_header(canvas, PAGE_HEIGHT - MARGIN)
+        y = draw_item(canvas, no, item, y)
+        if no % 25 == 0:
+            step(0.3 + 0.6 * no / len(items))
+
+    draw_totals(canvas, invoice, header, y)
+
+
+class CompanyHeader:
+    """Static part of every invoice built from the company settings: header (logo,
+    name, address, ids, bank accounts) and footer (VAT note). For object
+    creation, the following is needed:
+
+    settings: dict - Company settings (see layout.Settings.FIELDS).
+
+    Text is laid out and the logo decoded once, when the object is created. In
+    every PDF document the header and footer are drawn once as form XObjects and
+    then only referenced, so pages of a multi-invoice document share them."""
+
+    def __init__(self, settings: dict):
+        self.key = self.settings_key(settings)
+        # form names unique per settings version, so a changed header is never
+        # confused with an old one
+        suffix = hashlib.md5(repr(self.key).encode()).hexdigest()[:8]
+        self.header_form = f"CompanyHeader{suffix}"
+        self.footer_form = f"CompanyFooter{suffix}"
+
+        regular, bold = fonts()
+        y = PAGE_HEIGHT - MARGIN
+
+        self.logo = None
+        logo = settings.get("company_logo")
+        if logo and os.path.exists(logo):
+            self.logo = pdf_image(logo, LOGO_PIXELS)
+
+        # (font, size, x, y, text) drawn in the header
+        self.lines = [(bold, 12, MARGIN, y - 4 * mm, settings.get("company_name", ""))]
+        y -= 4 * mm + LINE
+
+        lines = [
+            settings.get("company_address", ""),
+            settings.get("company_city", ""),
+            f"MB: {settings.get('company_id', '')}",
+            f"PIB: {settings.get('company_tax_id', '')}",
+            settings.get("company_bank_name", ""),
+            f"TR (RSD): {settings.get('company_bank_rsd', '')}",
+        ]
+        if settings.get("company_bank_eur"):
+            lines.append(f"TR (EUR): {settings['company_bank_eur']}")
+        if settings.get("company_email"):
+            lines.append(f"E-mail: {settings['company_email']}")
+        for line in lines:
+            self.lines.append((regular, 9, MARGIN, y, line))
+            y -= LINE
+
+        self.rule = y
+        # y position below the header
+        self.bottom = y - 2 * LINE
+
+        self.footer = []
+        if settings.get("company_vat") != "Da":
+            self.footer.append("Obveznik nije u sistemu PDV-a.")
+
+    @staticmethod
+    def settings_key(settings: dict) -> tuple:
+        """Returns key that changes whenever the header would look different,
+        including a change of the logo file itself."""
+
+        logo = settings.get("company_logo")
+        mtime = os.path.getmtime(logo) if logo and os.path.exists(logo) else None
+        return tuple(sorted(settings.items())), mtime
+
+    def draw(self, canvas) -> float:
+        """Draws header and footer on the current page. Returns y position below
+        the header."""
+
+        if not canvas.hasForm(self.header_form):
+            canvas.beginForm(self.header_form)
+            self._draw_header(canvas)
+            canvas.endForm()
+        canvas.doForm(self.header_form)
+        self.draw_footer(canvas)
+        return self.bottom
+
+    def draw_footer(self, canvas):
+        """Draws footer on the current page."""
+
+        if not self.footer:
+            return
+        if not canvas.hasForm(self.footer_form):
+            regular, _ = fonts()
+            canvas.beginForm(self.footer_form)
+            canvas.setFont(regular, 8)
+            y = MARGIN - LINE
+            for line in self.footer:
+                canvas.drawString(MARGIN, y, line)
+                y -= LINE
+            canvas.endForm()
+        canvas.doForm(self.footer_form)
+
+    def _draw_header(self, canvas):
+        if self.logo is not None:
+            canvas.drawImage(
+                self.logo,
+                PAGE_WIDTH - MARGIN - LOGO_WIDTH,
+                PAGE_HEIGHT - MARGIN - LOGO_HEIGHT,
+                width=LOGO_WIDTH,
+                height=LOGO_HEIGHT,
+                preserveAspectRatio=True,
+                anchor="ne",
+                mask="auto",
+            )
+        for font, size, x, y, text in self.lines:
+            canvas.setFont(font, size)
+            canvas.drawString(x, y, text)
+        canvas.line(MARGIN, self.rule, PAGE_WIDTH - MARGIN, self.rule)
+
+
+# last built company header, rebuilt only when settings change
+_header = None
+_header_lock = threading.Lock()
+
+
+def company_header(settings: dict) -> CompanyHeader:
+    """Returns cached company header for settings. A new one is built only after
+    settings (or the logo file) changed."""
+
+    global _header
+    key = CompanyHeader.settings_key(settings)
+    with _header_lock:
+        if _header is None or _header.key != key:
+            _header = CompanyHeader(settings)
+        return _header
+
+
+def draw_customer(canvas, invoice, y: float) -> float:
+    """Draws invoice title, dates and customer block. Returns y position below it."""
+
+    regular, bold = fonts()
+
+    canvas.setFont(bold, 14)
+    canvas.drawString(MARGIN, y, f"FAKTURA br. {invoice.invoice_no}")
+
+    # dates on the right
+    canvas.setFont(regular, 9)
+    right = PAGE_WIDTH - MARGIN
+    canvas.drawRightString(
+        right, y, f"Datum fakture: {format_date(invoice.invoice_date)}"
+    )
+    canvas.drawRightString(
+        right, y - LINE, f"Datum prometa: {format_date(invoice.date_of_purchase)}"
+    )
+    canvas.drawRightString(
+        right, y - 2 * LINE, f"Mesto prometa: {invoice.place_of_purchase}"
+    )
+    y -= 3 * LINE
+
+    canvas.setFont(bold, 10)
+    canvas.drawString(MARGIN, y, invoice.customer_name)
+    y -= LINE
+    canvas.setFont(regular, 9)
+    lines = [
+        invoice.customer_address,
+        invoice.customer_city,
+        f"MB: {invoice.customer_id_no}   PIB: {invoice.customer_tax_id}",
+    ]
+    if invoice.customer_email:
+        lines.append(f"E-mail: {invoice.customer_email}")
+    for line in lines:
+        canvas.drawString(MARGIN, y, line)
+        y -= LINE
+    return y - LINE
+
+
+def draw_items_header(canvas, y: float) -> float:
+    """Draws line items table header. Returns y position of the first row."""
+
+    _, bold = fonts()
+    canvas.setFont(bold, 8)
+    for title, x, right in COLUMNS:
+        if right:
+            canvas.drawRightString(x, y, title)
+        else:
+            canvas.drawString(x, y, title)
+    canvas.line(MARGIN, y - 2 * mm, PAGE_WIDTH - MARGIN, y - 2 * mm)
+    return y - LINE - 2 * mm
+
+
+def draw_item(canvas, no: int, item, y: float) -> float:
+    """Draws one line item row. Returns y position of the next row."""
+
+    regular, _ = fonts()
+    canvas.setFont(regular, 8)
+    values = [
+        str(no),
+        item.type_of_service,
+        item.unit,
+        str(item.quantity),
+        format_amount(item.price),
+        format_amount(item.vat),
+        format_amount(item.total),
+    ]
+    for value, (_, x, right) in zip(values, COLUMNS):
+        if right:
+            canvas.drawRightString(x, y, value)
+        else:
+            canvas.drawString(x, y, value)
+    return y - LINE
+
+
+def draw_totals(canvas, invoice, header, y: float):
+    """Draws VAT recapitulation, invoice total and description below the line items."""
+
+    regular, bold = fonts()
+    rates = LineItems(invoice.items).vat_by_rate()
+    if y < MARGIN + (6 + 2 * len(rates)) * LINE:
+        canvas.showPage()
+        header.draw_footer(canvas)
+        y = PAGE_HEIGHT - MARGIN
+
+    right = PAGE_WIDTH - MARGIN
+    canvas.line(MARGIN, y + LINE - 2 * mm, right, y + LINE - 2 * mm)
+    y -= 2 * mm
+    canvas.setFont(regular, 9)
+    for rate, (net, vat) in sorted(rates.items(), reverse=True):
+        canvas.drawRightString(right, y, f"Osnovica ({rate}%): {format_amount(net)}")
+        canvas.drawRightString(right, y - LINE, f"PDV {rate}%: {format_amount(vat)}")
+        y -= 2 * LINE
+
+    canvas.setFont(bold, 10)
+    canvas.drawRightString(right, y, f"UKUPNO: {format_amount(invoice.total)}")
+    y -= 3 * LINE
+
+    canvas.setFont(regular, 8)
+    for line in invoice.description.splitlines():
+        canvas.drawString(MARGIN, y, line)
+        y -= LINE
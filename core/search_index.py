@@ -0,0 +1,216 @@
+"""
+Customer search index - in-memory prefix index over customer name, MB (id_no)
+and PIB (tax_id) used by the customer search on the new invoice screen.
+
+Text is folded before indexing and searching: lowercase, Cyrillic transliterated
+to Latin and Serbian diacritics removed (č/ć -> c, š -> s, ž -> z, đ/dj -> d), so
+"Đorđević", "Djordjevic", "dordevic" and "Ђорђевић" all match each other.
+
+Exact PIB and MB lookups (auto-fill of the invoice form) use hash maps instead,
+the full customers found are kept in a small LRU (RECENT_SIZE). Several
+customers may share a PIB or MB, the first registered (lowest id) is found.
+"""
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from core.models import Customer, valid_id_no, valid_tax_id
+
+# Cyrillic -> Latin, then Latin diacritics -> ASCII
+_FOLD = str.maketrans(
+    {
+        "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "ђ": "đ", "е": "e",
+        "ж": "ž", "з": "z", "и": "i", "ј": "j", "к": "k", "л": "l", "љ": "lj",
+        "м": "m", "н": "n", "њ": "nj", "о": "o", "п": "p", "р": "r", "с": "s",
+        "т": "t", "ћ": "ć", "у": "u", "ф": "f", "х": "h", "ц": "c", "ч": "č",
+        "џ": "dž", "ш": "š",
+    }
+)
+_DIACRITICS = str.maketrans({"č": "c", "ć": "c", "š": "s", "ž": "z", "đ": "d"})
+_WORD = re.compile(r"\w+")
+# full customers kept by CustomerIndex.lookup()
+RECENT_SIZE = 32
+
+
+def fold(text: str) -> str:
+    """Returns text folded for diacritic/script insensitive matching."""
+
+    text = text.lower().translate(_FOLD).translate(_DIACRITICS)
+    # "dj" is the ASCII spelling of "đ", which is already folded to "d"
+    return text.replace("dj", "d")
+
+
+def tokens(text: str) -> list[str]:
+    """Returns folded words of text."""
+
+    return _WORD.findall(fold(text))
+
+
+class CustomerIndex:
+    """Prefix index of customers. Every word of the name, MB and PIB is kept in a
+    sorted list of (token, customer_id) pairs, so a prefix lookup is two binary
+    searches. Adding and removing a customer updates the index in place.
+
+    Thread-safe - searches may run on a worker thread (core.jobs.SearchExecutor)
+    while the GUI adds and removes customers."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # sorted (token, customer_id) pairs
+        self.entries = []
+        # customer_id -> (name, id_no, tax_id)
+        self.customers = {}
+        # customer_id -> folded searchable text, used to check other query words
+        self.text = {}
+        # PIB / MB -> set of customer ids
+        self.by_tax_id = {}
+        self.by_id_no = {}
+        # recently looked up customers, customer_id -> Customer
+        self.recent = OrderedDict()
+
+    def __len__(self):
+        return len(self.customers)
+
+    def load(self, rows):
+        """Builds index from (customer_id, name, id_no, tax_id) rows, replacing
+        current contents. Faster than calling add() for every row."""
+
+        entries = []
+        customers = {}
+        texts = {}
+        by_tax_id, by_id_no = {}, {}
+        for customer_id, name, id_no, tax_id in rows:
+            customers[customer_id] = (name, id_no, tax_id)
+            text = self._text(name, id_no, tax_id)
+            texts[customer_id] = text
+            entries.extend((token, customer_id) for token in set(text.split()))
+            if tax_id:
+                by_tax_id.setdefault(tax_id, set()).add(customer_id)
+            if id_no:
+                by_id_no.setdefault(id_no, set()).add(customer_id)
+        entries.sort()
+        # built aside, searches meanwhile see the old contents
+        with self.lock:
+            self.entries, self.customers, self.text = entries, customers, texts
+            self.by_tax_id, self.by_id_no = by_tax_id, by_id_no
+            self.recent.clear()
+
+    def add(self, customer_id, name: str, id_no: str, tax_id: str):
+        """Adds customer to the index, or updates it if it is already indexed."""
+
+        text = self._text(name, id_no, tax_id)
+        with self.lock:
+            if customer_id in self.customers:
+                self.remove(customer_id)
+            self.customers[customer_id] = (name, id_no, tax_id)
+            self.text[customer_id] = text
+            for token in set(text.split()):
+                insort(self.entries, (token, customer_id))
+            if tax_id:
+                self.by_tax_id.setdefault(tax_id, set()).add(customer_id)
+            if id_no:
+                self.by_id_no.setdefault(id_no, set()).add(customer_id)
+
+    def remove(self, customer_id):
+        """Removes customer from the index. Unknown customer_id is ignored."""
+
+        with self.lock:
+            text = self.text.pop(customer_id, None)
+            if text is None:
+                return
+            self.recent.pop(customer_id, None)
+            name, id_no, tax_id = self.customers.pop(customer_id)
+            for numbers, number in ((self.by_tax_id, tax_id), (self.by_id_no, id_no)):
+                ids = numbers.get(number)
+                if ids is not None:
+                    ids.discard(customer_id)
+                    if not ids:
+                        del numbers[number]
+            for token in set(text.split()):
+                i = bisect_left(self.entries, (token, customer_id))
+                if i < len(self.entries) and self.entries[i] == (token, customer_id):
+                    del self.entries[i]
+
+    def search(self, query: str, limit: int = 5) -> list[tuple]:
+        """Returns up to limit (customer_id, name, id_no, tax_id) tuples of customers
+        which have a word starting with every word of the query."""
+
+        words = tokens(query)
+        if not words:
+            return []
+        with self.lock:
+            return self._search(words, limit)
+
+    def lookup(self, storage, tax_id: str = "", id_no: str = "") -> Customer | None:
+        """Returns customer with PIB tax_id (or MB id_no when tax_id is empty), or
+        None. A number with a wrong check digit is not looked up at all, a known
+        one is read from storage once and then kept among the recent customers.
+        Of customers sharing the number, the one with the lowest id is returned."""
+
+        if tax_id:
+            if not valid_tax_id(tax_id):
+                return None
+            with self.lock:
+                ids = self.by_tax_id.get(tax_id)
+                customer_id = min(ids) if ids else None
+        elif valid_id_no(id_no):
+            with self.lock:
+                ids = self.by_id_no.get(id_no)
+                customer_id = min(ids) if ids else None
+        else:
+            return None
+        if customer_id is None:
+            return None
+
+        with self.lock:
+            customer = self.recent.get(customer_id)
+            if customer is not None:
+                self.recent.move_to_end(customer_id)
+                return customer
+        customer = storage.get_customer(customer_id)
+        if customer is None:
+            return None
+        with self.lock:
+            # removed or changed while it was read
+            if self.customers.get(customer_id) != (
+                customer.name,
+                customer.id_no,
+                customer.tax_id,
+            ):
+                return customer
+            self.recent[customer_id] = customer
+            while len(self.recent) > RECENT_SIZE:
+                self.recent.popitem(last=False)
+        return customer
+
+    def _search(self, words: list[str], limit: int) -> list[tuple]:
+        # walk the narrowest prefix range, check the rest on folded text
+        ranges = [self._range(word) for word in words]
+        start, end = min(ranges, key=lambda r: r[1] - r[0])
+        others = [" " + word for word in words]
+
+        results = []
+        seen = set()
+        for i in range(start, end):
+            customer_id = self.entries[i][1]
+            if customer_id in seen:
+                continue
+            seen.add(customer_id)
+            text = self.text[customer_id]
+            if all(word in text for word in others):
+                results.append((customer_id, *self.customers[customer_id]))
+                if len(results) == limit:
+                    break
+        return results
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        start = bisect_left(self.entries, (prefix,))
+        # "\uffff" sorts after every character that can follow the prefix
+        end = bisect_left(self.entries, (prefix + "\uffff",), start)
+        return start, end
+
+    @staticmethod
+    def _text(name, id_no, tax_id) -> str:
+        # leading space lets " word" check for a word prefix with a substring search
+        return " " + " ".join(tokens(f"{name} {id_no} {tax_id}"))
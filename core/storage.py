@@ -0,0 +1,1116 @@
+"""
+Storage - SQLite persistence for invoices, line items, customers and settings.
+
+The database runs in WAL mode (readers do not block the writer) with
+synchronous=NORMAL, which is durable across application crashes and needs one
+fsync per checkpoint instead of one per transaction. All SQL is kept in module
+constants so sqlite3's statement cache reuses the prepared statements. Money is
+stored as integer cents (para).
+
+Invoice numbers (123/2026) come from a sequence row per series and year: the
+next number is reserved with one primary key upsert inside the transaction that
+saves the invoice, so two workstations never get the same number and a rolled
+back save leaves no gap. The full-text index of invoices (invoice_search, FTS5)
+is updated in the same transaction as the invoice.
+
+Revenue summaries (revenue_months, revenue_customers) hold invoice count, net
+amount, VAT and total per month and per customer and year. Saving or deleting
+an invoice adds or subtracts its amounts in the same transaction, so reports
+read a few summary rows instead of every invoice and line item. The service
+catalog (core.catalog) reads service_uses the same way - uses and the last price
+of every service and unit per month, kept up to date by the same transactions.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+from core.models import (
+    Customer,
+    Invoice,
+    LineItem,
+    format_invoice_no,
+    from_cents,
+    parse_invoice_no,
+    service_name,
+    to_cents,
+)
+from core.monitor import MONITOR
+from core.search_index import fold, tokens
+
+# default database file, next to main.py
+DB_PATH = "invoices.db"
+# PRAGMA user_version of an up to date database, see Storage.migrate()
+SCHEMA_VERSION = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL,
+    address TEXT NOT NULL DEFAULT '',
+    city TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    id_no TEXT NOT NULL DEFAULT '',
+    tax_id TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS customers_name ON customers (name COLLATE NOCASE);
+-- folded_name (core.search_index.fold() of name) and its index are added by
+-- Storage.migrate(), see SQL_CUSTOMER_FOLDED
+CREATE INDEX IF NOT EXISTS customers_id_no ON customers (id_no);
+CREATE INDEX IF NOT EXISTS customers_tax_id ON customers (tax_id);
+
+CREATE TABLE IF NOT EXISTS invoices (
+    id INTEGER PRIMARY KEY,
+    invoice_no TEXT NOT NULL UNIQUE,
+    invoice_date TEXT NOT NULL,
+    date_of_purchase TEXT,
+    place_of_purchase TEXT NOT NULL DEFAULT '',
+    customer_id INTEGER REFERENCES customers (id) ON DELETE SET NULL,
+    customer_name TEXT NOT NULL,
+    customer_address TEXT NOT NULL DEFAULT '',
+    customer_city TEXT NOT NULL DEFAULT '',
+    customer_id_no TEXT NOT NULL DEFAULT '',
+    customer_tax_id TEXT NOT NULL DEFAULT '',
+    customer_email TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    total INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS invoices_date ON invoices (invoice_date);
+CREATE INDEX IF NOT EXISTS invoices_customer_name
+    ON invoices (customer_name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS invoices_customer_id_no ON invoices (customer_id_no);
+CREATE INDEX IF NOT EXISTS invoices_customer_tax_id ON invoices (customer_tax_id);
+CREATE INDEX IF NOT EXISTS invoices_customer_id ON invoices (customer_id);
+-- sorting of the review list by amount and by number (year, then number -
+-- a shorter number is a smaller one)
+CREATE INDEX IF NOT EXISTS invoices_total ON invoices (total);
+CREATE INDEX IF NOT EXISTS invoices_number
+    ON invoices (substr(invoice_no, -4), length(invoice_no), invoice_no);
+
+CREATE TABLE IF NOT EXISTS line_items (
+    id INTEGER PRIMARY KEY,
+    invoice_id INTEGER NOT NULL REFERENCES invoices (id) ON DELETE CASCADE,
+    no INTEGER NOT NULL,
+    type_of_service TEXT NOT NULL,
+    unit TEXT NOT NULL DEFAULT '',
+    quantity TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    vat_rate TEXT NOT NULL DEFAULT '0',
+    vat INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS line_items_invoice ON line_items (invoice_id, no);
+
+-- last allocated invoice number per series and year
+CREATE TABLE IF NOT EXISTS invoice_sequences (
+    series TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    PRIMARY KEY (series, year)
+) WITHOUT ROWID;
+
+-- full-text index of invoices, rowid is the invoice id; text is folded
+-- (core.search_index.fold) so matching ignores diacritics and script
+CREATE VIRTUAL TABLE IF NOT EXISTS invoice_search USING fts5 (
+    customer, invoice_no, services, description, tokenize = 'unicode61'
+);
+
+-- revenue summaries, amounts in cents; net is the sum of line net amounts,
+-- vat = total - net
+CREATE TABLE IF NOT EXISTS revenue_months (
+    month TEXT PRIMARY KEY,
+    invoices INTEGER NOT NULL,
+    net INTEGER NOT NULL,
+    vat INTEGER NOT NULL,
+    total INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS revenue_customers (
+    year INTEGER NOT NULL,
+    customer_name TEXT NOT NULL,
+    customer_tax_id TEXT NOT NULL,
+    invoices INTEGER NOT NULL,
+    net INTEGER NOT NULL,
+    vat INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (year, customer_name, customer_tax_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS revenue_customers_total
+    ON revenue_customers (year, total);
+
+-- uses of every service and unit per month, with date and price (cents) of the
+-- last use
+CREATE TABLE IF NOT EXISTS service_uses (
+    type_of_service TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    month TEXT NOT NULL,
+    uses INTEGER NOT NULL,
+    last_date TEXT NOT NULL,
+    last_price INTEGER NOT NULL,
+    PRIMARY KEY (type_of_service, unit, month)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# customers
+SQL_CUSTOMER_INSERT = """
+INSERT INTO customers (type, name, address, city, email, id_no, tax_id, folded_name)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_CUSTOMER_UPDATE = """
+UPDATE customers SET type = ?, name = ?, address = ?, city = ?, email = ?,
+    id_no = ?, tax_id = ?, folded_name = ?
+WHERE id = ?
+"""
+# folded name, searched by the customer list like the customer search index
+SQL_CUSTOMER_FOLDED = (
+    "ALTER TABLE customers ADD COLUMN folded_name TEXT NOT NULL DEFAULT ''",
+    "CREATE INDEX IF NOT EXISTS customers_folded_name ON customers (folded_name)",
+)
+SQL_CUSTOMER_NAMES = "SELECT id, name FROM customers"
+SQL_CUSTOMER_FOLD = "UPDATE customers SET folded_name = ? WHERE id = ?"
+SQL_CUSTOMER_DELETE = "DELETE FROM customers WHERE id = ?"
+SQL_CUSTOMER_GET = """
+SELECT name, type, address, city, email, id_no, tax_id, id FROM customers WHERE id = ?
+"""
+SQL_CUSTOMER_INDEX_ROWS = "SELECT id, name, id_no, tax_id FROM customers"
+SQL_CUSTOMER_BY_TAX_ID = "SELECT id FROM customers WHERE tax_id = ? LIMIT 1"
+SQL_CUSTOMER_BY_ID_NO = "SELECT id FROM customers WHERE id_no = ? LIMIT 1"
+
+# invoices
+SQL_INVOICE_INSERT = """
+INSERT INTO invoices (invoice_no, invoice_date, date_of_purchase, place_of_purchase,
+    customer_id, customer_name, customer_address, customer_city, customer_id_no,
+    customer_tax_id, customer_email, description, total)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_INVOICE_UPDATE = """
+UPDATE invoices SET invoice_no = ?, invoice_date = ?, date_of_purchase = ?,
+    place_of_purchase = ?, customer_id = ?, customer_name = ?, customer_address = ?,
+    customer_city = ?, customer_id_no = ?, customer_tax_id = ?, customer_email = ?,
+    description = ?, total = ?
+WHERE id = ?
+"""
+SQL_INVOICE_DELETE = "DELETE FROM invoices WHERE id = ?"
+SQL_INVOICE_GET = """
+SELECT invoice_no, invoice_date, customer_name, date_of_purchase, place_of_purchase,
+    customer_address, customer_city, customer_id_no, customer_tax_id, customer_email,
+    description, total, customer_id, id
+FROM invoices WHERE id = ?
+"""
+SQL_INVOICE_IDS_BY_DATE = """
+SELECT id FROM invoices WHERE invoice_date BETWEEN ? AND ? ORDER BY invoice_date, id
+"""
+SQL_INVOICE_COUNT_BY_DATE = """
+SELECT count(*) FROM invoices WHERE invoice_date BETWEEN ? AND ?
+"""
+SQL_ITEMS_DELETE = "DELETE FROM line_items WHERE invoice_id = ?"
+SQL_ITEMS_INSERT = """
+INSERT INTO line_items (invoice_id, no, type_of_service, unit, quantity, price,
+    vat_rate, vat, total)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_ITEMS_GET = """
+SELECT type_of_service, unit, quantity, price, vat_rate, vat, total
+FROM line_items WHERE invoice_id = ? ORDER BY no
+"""
+
+SQL_INVOICE_NUMBERS = "SELECT invoice_no FROM invoices"
+
+# full-text search - ranked by bm25 with customer and number weighted highest,
+# keyset on (rank, id)
+SQL_SEARCH_RANK = """
+INSERT INTO invoice_search (invoice_search, rank)
+VALUES ('rank', 'bm25(10.0, 10.0, 4.0, 1.0)')
+"""
+SQL_SEARCH_PUT = """
+INSERT OR REPLACE INTO invoice_search (rowid, customer, invoice_no, services,
+    description)
+VALUES (?, ?, ?, ?, ?)
+"""
+SQL_SEARCH_DELETE = "DELETE FROM invoice_search WHERE rowid = ?"
+SQL_SEARCH_ALL = """
+SELECT i.id, i.customer_name, i.customer_city, i.customer_id_no, i.customer_tax_id,
+    i.invoice_no, i.description, (
+        SELECT group_concat(type_of_service, ' ') FROM line_items
+        WHERE invoice_id = i.id
+    )
+FROM invoices AS i
+"""
+_SEARCH_PAGE = """
+SELECT s.rank, i.id, i.customer_name, i.invoice_no, i.invoice_date, i.total
+FROM invoice_search AS s JOIN invoices AS i ON i.id = s.rowid
+WHERE invoice_search MATCH ? AND (s.rank, s.rowid) {op} (?, ?)
+ORDER BY s.rank {order}, s.rowid {order} LIMIT ?
+"""
+SQL_SEARCH_RESULTS = """
+SELECT i.id, i.customer_name, i.invoice_no, i.invoice_date, i.total
+FROM invoice_search AS s JOIN invoices AS i ON i.id = s.rowid
+WHERE invoice_search MATCH ? ORDER BY s.rank, s.rowid LIMIT ?
+"""
+SQL_SEARCH_PAGE = {
+    forward: _SEARCH_PAGE.format(
+        op=">" if forward else "<", order="ASC" if forward else "DESC"
+    )
+    for forward in (True, False)
+}
+
+# invoices with their line items for export, in date order - rows come from the
+# date index and line item index without sorting
+_EXPORT_ROWS = """
+SELECT i.id, i.invoice_no, i.invoice_date, i.date_of_purchase, i.place_of_purchase,
+    i.customer_id, i.customer_name, i.customer_address, i.customer_city,
+    i.customer_id_no, i.customer_tax_id, i.customer_email, i.description, i.total,
+    l.no, l.type_of_service, l.unit, l.quantity, l.price, l.vat_rate, l.vat, l.total
+FROM invoices AS i LEFT JOIN line_items AS l ON l.invoice_id = i.id
+WHERE i.invoice_date BETWEEN ? AND ? {customer}
+ORDER BY i.invoice_date, i.id, l.no
+"""
+SQL_EXPORT_ROWS = {
+    customer: _EXPORT_ROWS.format(customer="AND +i.customer_id = ?" if customer else "")
+    for customer in (True, False)
+}
+
+# invoice number sequences - one primary key row per series and year
+SQL_SEQUENCE_NEXT = """
+INSERT INTO invoice_sequences (series, year, last) VALUES (?, ?, 1)
+ON CONFLICT (series, year) DO UPDATE SET last = last + 1
+RETURNING last
+"""
+SQL_SEQUENCE_BUMP = """
+INSERT INTO invoice_sequences (series, year, last) VALUES (?, ?, ?)
+ON CONFLICT (series, year) DO UPDATE SET last = max(last, excluded.last)
+"""
+SQL_SEQUENCE_LAST = """
+SELECT last FROM invoice_sequences WHERE series = ? AND year = ?
+"""
+
+# revenue summaries - amounts of one invoice added with count 1 (save) or
+# subtracted with count -1 (delete, before update), emptied rows are removed
+SQL_REVENUE_MONTH_ADD = """
+INSERT INTO revenue_months (month, invoices, net, vat, total) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (month) DO UPDATE SET invoices = invoices + excluded.invoices,
+    net = net + excluded.net, vat = vat + excluded.vat, total = total + excluded.total
+"""
+SQL_REVENUE_CUSTOMER_ADD = """
+INSERT INTO revenue_customers (year, customer_name, customer_tax_id, invoices, net,
+    vat, total)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (year, customer_name, customer_tax_id) DO UPDATE SET
+    invoices = invoices + excluded.invoices, net = net + excluded.net,
+    vat = vat + excluded.vat, total = total + excluded.total
+"""
+SQL_REVENUE_MONTH_PRUNE = "DELETE FROM revenue_months WHERE month = ? AND invoices = 0"
+SQL_REVENUE_CUSTOMER_PRUNE = """
+DELETE FROM revenue_customers
+WHERE year = ? AND customer_name = ? AND customer_tax_id = ? AND invoices = 0
+"""
+# summary amounts of a saved invoice, as they were added
+SQL_REVENUE_OF_INVOICE = """
+SELECT invoice_date, customer_name, customer_tax_id, total, (
+        SELECT coalesce(sum(total - vat), 0) FROM line_items WHERE invoice_id = i.id
+    )
+FROM invoices AS i WHERE id = ?
+"""
+_REVENUE_INVOICES = """
+WITH amounts AS (
+    SELECT i.invoice_date, i.customer_name, i.customer_tax_id, i.total, coalesce((
+            SELECT sum(total - vat) FROM line_items WHERE invoice_id = i.id
+        ), 0) AS net
+    FROM invoices AS i
+)
+"""
+SQL_REVENUE_MONTHS_REBUILD = f"""
+{_REVENUE_INVOICES}
+INSERT INTO revenue_months (month, invoices, net, vat, total)
+SELECT substr(invoice_date, 1, 7), count(*), sum(net), sum(total - net), sum(total)
+FROM amounts GROUP BY 1
+"""
+SQL_REVENUE_CUSTOMERS_REBUILD = f"""
+{_REVENUE_INVOICES}
+INSERT INTO revenue_customers (year, customer_name, customer_tax_id, invoices, net,
+    vat, total)
+SELECT CAST(substr(invoice_date, 1, 4) AS INTEGER), customer_name, customer_tax_id,
+    count(*), sum(net), sum(total - net), sum(total)
+FROM amounts GROUP BY 1, 2, 3
+"""
+SQL_REVENUE_MONTHS = """
+SELECT month, invoices, net, vat, total FROM revenue_months
+WHERE month BETWEEN ? AND ? ORDER BY month
+"""
+SQL_REVENUE_YEARS = """
+SELECT CAST(substr(month, 1, 4) AS INTEGER), sum(invoices), sum(net), sum(vat),
+    sum(total)
+FROM revenue_months GROUP BY 1 ORDER BY 1
+"""
+SQL_REVENUE_TOP_CUSTOMERS = """
+SELECT customer_name, customer_tax_id, invoices, net, vat, total
+FROM revenue_customers WHERE year = ? ORDER BY total DESC LIMIT ?
+"""
+
+# service catalog (core.catalog) - uses of every service and unit per month
+SQL_SERVICE_HISTORY = """
+SELECT type_of_service, unit, uses, last_date, last_price
+FROM service_uses ORDER BY last_date
+"""
+# a line item of a saved invoice is one use, the newest one gives the last price;
+# services are counted under core.models.service_name() (SQL function service_name)
+SQL_SERVICE_USE_ADD = """
+INSERT INTO service_uses (type_of_service, unit, month, uses, last_date, last_price)
+VALUES (?, ?, ?, 1, ?, ?)
+ON CONFLICT (type_of_service, unit, month) DO UPDATE SET uses = uses + 1,
+    last_price = iif(excluded.last_date >= last_date, excluded.last_price, last_price),
+    last_date = max(last_date, excluded.last_date)
+"""
+# uses of a saved invoice, as they were added
+SQL_SERVICE_USES_OF_INVOICE = """
+SELECT service_name(l.type_of_service), l.unit, substr(i.invoice_date, 1, 7),
+    count(*)
+FROM line_items l JOIN invoices i ON i.id = l.invoice_id
+WHERE i.id = ? AND service_name(l.type_of_service) != ''
+GROUP BY 1, 2, 3
+"""
+SQL_SERVICE_USES_REMOVE = """
+UPDATE service_uses SET uses = uses - ?
+WHERE type_of_service = ? AND unit = ? AND month = ?
+"""
+SQL_SERVICE_USES_PRUNE = """
+DELETE FROM service_uses
+WHERE type_of_service = ? AND unit = ? AND month = ? AND uses = 0
+"""
+# last use of a service and unit in a month after invoice ? is removed - the newest
+# line item of the other invoices of the month
+SQL_SERVICE_USES_LAST = """
+UPDATE service_uses SET (last_date, last_price) = (
+    SELECT i.invoice_date, l.price
+    FROM invoices i JOIN line_items l ON l.invoice_id = i.id
+    WHERE i.invoice_date BETWEEN :month || '-01' AND :month || '-31'
+        AND i.id != :invoice
+        AND service_name(l.type_of_service) = service_uses.type_of_service
+        AND l.unit = service_uses.unit
+    ORDER BY i.invoice_date DESC, l.id DESC LIMIT 1
+)
+WHERE type_of_service = :service AND unit = :unit AND month = :month
+"""
+SQL_SERVICE_USES_REBUILD = """
+INSERT INTO service_uses (type_of_service, unit, month, uses, last_date, last_price)
+SELECT type_of_service, unit, month, uses, invoice_date, price FROM (
+    SELECT service_name(l.type_of_service) AS type_of_service, l.unit,
+        substr(i.invoice_date, 1, 7) AS month,
+        i.invoice_date, l.price, count(*) OVER service AS uses,
+        row_number() OVER (service ORDER BY i.invoice_date DESC, l.id DESC) AS newest
+    FROM line_items l JOIN invoices i ON i.id = l.invoice_id
+    WHERE service_name(l.type_of_service) != ''
+    WINDOW service AS (
+        PARTITION BY service_name(l.type_of_service), l.unit,
+            substr(i.invoice_date, 1, 7)
+    )
+)
+WHERE newest = 1
+"""
+
+
+# list pages - keyset on the sort columns, every order is an index scan; the
+# first page (no key) has no keyset condition. A search reads its matches from a
+# UNION of index range searches, one per searched column, and sorts only them.
+def _page_sql(select: str, table: str, columns: tuple, search: str) -> dict:
+    """Returns page statements of select for every (ascending, search, first).
+    select reads from {source} - table, or the search subquery."""
+
+    statements = {}
+    for ascending in (True, False):
+        direction = "ASC" if ascending else "DESC"
+        order = ", ".join(f"{column} {direction}" for column in columns)
+        operator = ">" if ascending else "<"
+        keyset = "({}) {} ({})".format(
+            ", ".join(columns), operator, ", ".join("?" * len(columns))
+        )
+        if len(columns) > 1:
+            # range on the first column - the row value alone is not an index
+            # search for expression and NOCASE columns
+            keyset = f"{columns[0]} {operator}= ? AND {keyset}"
+        for has_search in (True, False):
+            for first in (True, False):
+                statements[ascending, has_search, first] = select.format(
+                    source=f"({search})" if has_search else table,
+                    keyset="1" if first else keyset,
+                    order=order,
+                )
+    return statements
+
+
+# review list pages, sortable by the INVOICE_ORDERS columns
+INVOICE_ORDERS = {
+    "id": ("id",),
+    "customer_name": ("customer_name COLLATE NOCASE", "id"),
+    "invoice_no": ("substr(invoice_no, -4)", "length(invoice_no)", "invoice_no", "id"),
+    "invoice_date": ("invoice_date", "id"),
+    "total": ("total", "id"),
+}
+_INVOICE_COLUMNS = "id, customer_name, invoice_no, invoice_date, total"
+_INVOICE_PAGE = f"""
+SELECT {_INVOICE_COLUMNS} FROM {{source}} WHERE {{keyset}} ORDER BY {{order}} LIMIT ?
+"""
+# start of the customer name (case-insensitive) or invoice number, or ISO date
+_INVOICE_SEARCH = f"""
+SELECT {_INVOICE_COLUMNS} FROM invoices
+WHERE customer_name COLLATE NOCASE >= ? AND customer_name COLLATE NOCASE < ?
+UNION SELECT {_INVOICE_COLUMNS} FROM invoices
+WHERE invoice_no >= ? AND invoice_no < ?
+UNION SELECT {_INVOICE_COLUMNS} FROM invoices WHERE invoice_date = ?
+"""
+SQL_INVOICE_PAGE = {
+    order: _page_sql(_INVOICE_PAGE, "invoices", columns, _INVOICE_SEARCH)
+    for order, columns in INVOICE_ORDERS.items()
+}
+
+# customer list pages, alphabetical or by id
+CUSTOMER_ORDERS = {"name": ("name COLLATE NOCASE", "id"), "id": ("id",)}
+_CUSTOMER_PAGE = """
+SELECT id, name FROM {source} WHERE {keyset} ORDER BY {order} LIMIT ?
+"""
+# start of the folded name (core.search_index.fold()), MB or PIB
+_CUSTOMER_SEARCH = """
+SELECT id, name FROM customers WHERE folded_name >= ? AND folded_name < ?
+UNION SELECT id, name FROM customers WHERE id_no >= ? AND id_no < ?
+UNION SELECT id, name FROM customers WHERE tax_id >= ? AND tax_id < ?
+"""
+SQL_CUSTOMER_PAGE = {
+    order: _page_sql(_CUSTOMER_PAGE, "customers", columns, _CUSTOMER_SEARCH)
+    for order, columns in CUSTOMER_ORDERS.items()
+}
+
+# settings
+SQL_SETTINGS_GET = "SELECT key, value FROM settings"
+SQL_SETTINGS_PUT = """
+INSERT INTO settings (key, value) VALUES (?, ?)
+ON CONFLICT (key) DO UPDATE SET value = excluded.value
+"""
+
+
+class Storage:
+    """SQLite storage. For object creation, the following is needed:
+
+    path: str - Database file path, ":memory:" for a temporary database."""
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        # autocommit mode, transactions are opened explicitly with transaction()
+        self.conn = sqlite3.connect(path, isolation_level=None, cached_statements=256)
+        # query counters, only when monitoring is on
+        MONITOR.attach(self.conn)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.create_function("service_name", 1, service_name, deterministic=True)
+        self.conn.executescript(SCHEMA)
+        self.migrate()
+
+    def close(self):
+        """Closes the database connection."""
+
+        self.conn.close()
+
+    def interrupt(self):
+        """Aborts the query running on this connection (callable from any thread),
+        it raises sqlite3.OperationalError."""
+
+        self.conn.interrupt()
+
+    def migrate(self):
+        """Fills data added by newer versions in a database created by an older one
+        (tracked with PRAGMA user_version)."""
+
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self.transaction() as conn:
+            if version < 1:
+                self._rebuild_sequences(conn)
+            if version < 2:
+                conn.execute(SQL_SEARCH_RANK)
+                self._rebuild_search(conn)
+            if version < 3:
+                self._rebuild_revenue(conn)
+            if version < 5:
+                # version 4 counted services by their unstripped names
+                self._rebuild_service_uses(conn)
+            if version < 6:
+                for statement in SQL_CUSTOMER_FOLDED:
+                    conn.execute(statement)
+                names = conn.execute(SQL_CUSTOMER_NAMES).fetchall()
+                conn.executemany(
+                    SQL_CUSTOMER_FOLD,
+                    ((fold(name), customer_id) for customer_id, name in names),
+                )
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self):
+        """Context manager running the block in one write transaction. Rolls back
+        on exception."""
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    # customers
+
+    def save_customer(self, customer: Customer) -> int:
+        """Inserts new (customer.id is None) or updates existing customer. Returns
+        customer id and sets it on the customer."""
+
+        values = (
+            customer.type,
+            customer.name,
+            customer.address,
+            customer.city,
+            customer.email,
+            customer.id_no,
+            customer.tax_id,
+            fold(customer.name),
+        )
+        with self.transaction() as conn:
+            if customer.id is None:
+                customer.id = conn.execute(SQL_CUSTOMER_INSERT, values).lastrowid
+            else:
+                conn.execute(SQL_CUSTOMER_UPDATE, (*values, customer.id))
+        return customer.id
+
+    def upsert_customers(self, customers: list[Customer]) -> tuple[int, int]:
+        """Saves customers in one transaction, updating the existing customer with
+        the same PIB (or MB, for customers without PIB) instead of adding a new
+        one. Returns number of (inserted, updated) customers."""
+
+        inserted = updated = 0
+        with self.transaction() as conn:
+            for customer in customers:
+                row = None
+                if customer.tax_id:
+                    row = conn.execute(SQL_CUSTOMER_BY_TAX_ID, (customer.tax_id,))
+                    row = row.fetchone()
+                elif customer.id_no:
+                    row = conn.execute(SQL_CUSTOMER_BY_ID_NO, (customer.id_no,))
+                    row = row.fetchone()
+
+                values = (
+                    customer.type,
+                    customer.name,
+                    customer.address,
+                    customer.city,
+                    customer.email,
+                    customer.id_no,
+                    customer.tax_id,
+                    fold(customer.name),
+                )
+                if row is None:
+                    customer.id = conn.execute(SQL_CUSTOMER_INSERT, values).lastrowid
+                    inserted += 1
+                else:
+                    customer.id = row[0]
+                    conn.execute(SQL_CUSTOMER_UPDATE, (*values, customer.id))
+                    updated += 1
+        return inserted, updated
+
+    def delete_customer(self, customer_id: int):
+        """Deletes customer. Invoices keep their copy of the customer data."""
+
+        with self.transaction() as conn:
+            conn.execute(SQL_CUSTOMER_DELETE, (customer_id,))
+
+    def get_customer(self, customer_id: int) -> Customer | None:
+        """Returns customer by id or None."""
+
+        row = self.conn.execute(SQL_CUSTOMER_GET, (customer_id,)).fetchone()
+        return Customer(*row) if row else None
+
+    def customer_index_rows(self):
+        """Returns cursor over (id, name, id_no, tax_id) of all customers, used to
+        build the customer search index."""
+
+        return self.conn.execute(SQL_CUSTOMER_INDEX_ROWS)
+
+    def page_customers(
+        self,
+        key,
+        limit: int,
+        forward: bool = True,
+        search: str = "",
+        order: str = "name",
+        descending: bool = False,
+    ):
+        """Returns page of (id, name) rows sorted by order ("name" or "id"), after
+        (forward) or before key - customer_key() of the last row of the previous
+        page, None for the first (or with forward=False, last) page. search
+        matches the start of the name (folded like the customer search index, so
+        case, diacritics and script are ignored), MB or PIB."""
+
+        params = (*_prefix(fold(search)), *_prefix(search) * 2) if search else ()
+        statement = SQL_CUSTOMER_PAGE[order][
+            forward != descending, bool(search), key is None
+        ]
+        return self.conn.execute(statement, (*params, *_keyset(key), limit)).fetchall()
+
+    # invoices
+
+    def save_invoice(self, invoice: Invoice, series: str = "") -> int:
+        """Inserts new (invoice.id is None) or updates existing invoice together with
+        all of its line items in one transaction. Returns invoice id and sets it
+        on the invoice.
+
+        Invoice without a number gets the next number of series in the year of
+        the invoice date (see next_invoice_no()). The number is reserved in the
+        same transaction, so a failed save does not use it up."""
+
+        with self.transaction() as conn:
+            invoice_id, invoice_no = self._write_invoice(conn, invoice, series)
+        invoice.id, invoice.invoice_no = invoice_id, invoice_no
+        return invoice_id
+
+    def save_invoices(self, invoices: list[Invoice], series: str = ""):
+        """Saves many invoices (see save_invoice()) in one transaction - either all
+        of them are saved or none."""
+
+        with self.transaction() as conn:
+            saved = [self._write_invoice(conn, invoice, series) for invoice in invoices]
+        for invoice, (invoice_id, invoice_no) in zip(invoices, saved):
+            invoice.id, invoice.invoice_no = invoice_id, invoice_no
+
+    def _write_invoice(self, conn, invoice: Invoice, series: str) -> tuple[int, str]:
+        """Writes invoice and its line items inside an open transaction. Returns
+        invoice id and number."""
+
+        invoice_no = invoice.invoice_no
+        if invoice_no:
+            # typed number in the sequence format moves the sequence past it
+            parsed = parse_invoice_no(invoice_no)
+            if parsed is not None:
+                series_no, number, year = parsed
+                conn.execute(SQL_SEQUENCE_BUMP, (series_no, year, number))
+        else:
+            year = invoice.invoice_date.year
+            (number,) = conn.execute(SQL_SEQUENCE_NEXT, (series, year)).fetchone()
+            invoice_no = format_invoice_no(number, year, series)
+
+        values = (
+            invoice_no,
+            invoice.invoice_date.isoformat(),
+            invoice.date_of_purchase.isoformat() if invoice.date_of_purchase else None,
+            invoice.place_of_purchase,
+            invoice.customer_id,
+            invoice.customer_name,
+            invoice.customer_address,
+            invoice.customer_city,
+            invoice.customer_id_no,
+            invoice.customer_tax_id,
+            invoice.customer_email,
+            invoice.description,
+            to_cents(invoice.total),
+        )
+        if invoice.id is None:
+            invoice_id = conn.execute(SQL_INVOICE_INSERT, values).lastrowid
+        else:
+            invoice_id = invoice.id
+            self._remove_revenue(conn, invoice_id)
+            self._remove_service_uses(conn, invoice_id)
+            conn.execute(SQL_INVOICE_UPDATE, (*values, invoice_id))
+            conn.execute(SQL_ITEMS_DELETE, (invoice_id,))
+        conn.executemany(
+            SQL_ITEMS_INSERT,
+            (
+                (
+                    invoice_id,
+                    no,
+                    item.type_of_service,
+                    item.unit,
+                    str(item.quantity),
+                    to_cents(item.price),
+                    str(item.vat_rate),
+                    to_cents(item.vat),
+                    to_cents(item.total),
+                )
+                for no, item in enumerate(invoice.items, start=1)
+            ),
+        )
+        services = " ".join(item.type_of_service for item in invoice.items)
+        conn.execute(
+            SQL_SEARCH_PUT,
+            _search_text(
+                invoice_id,
+                invoice.customer_name,
+                invoice.customer_city,
+                invoice.customer_id_no,
+                invoice.customer_tax_id,
+                invoice_no,
+                invoice.description,
+                services,
+            ),
+        )
+        invoice_date, total = values[1], values[-1]
+        net = sum(to_cents(item.total) - to_cents(item.vat) for item in invoice.items)
+        self._add_revenue(
+            conn,
+            invoice_date,
+            invoice.customer_name,
+            invoice.customer_tax_id,
+            net,
+            total,
+        )
+        conn.executemany(
+            SQL_SERVICE_USE_ADD,
+            (
+                (
+                    service_name(item.type_of_service),
+                    item.unit,
+                    invoice_date[:7],
+                    invoice_date,
+                    to_cents(item.price),
+                )
+                for item in invoice.items
+                if service_name(item.type_of_service)
+            ),
+        )
+        return invoice_id, invoice_no
+
+    def _add_revenue(self, conn, invoice_date, name, tax_id, net, total, count=1):
+        """Adds amounts (cents) of one invoice to the revenue summaries, or
+        subtracts them with count=-1."""
+
+        month, year = invoice_date[:7], int(invoice_date[:4])
+        vat = total - net
+        amounts = (count, count * net, count * vat, count * total)
+        conn.execute(SQL_REVENUE_MONTH_ADD, (month, *amounts))
+        conn.execute(SQL_REVENUE_CUSTOMER_ADD, (year, name, tax_id, *amounts))
+        if count < 0:
+            conn.execute(SQL_REVENUE_MONTH_PRUNE, (month,))
+            conn.execute(SQL_REVENUE_CUSTOMER_PRUNE, (year, name, tax_id))
+
+    def _remove_revenue(self, conn, invoice_id: int):
+        """Subtracts saved invoice from the revenue summaries (before it is
+        updated or deleted)."""
+
+        row = conn.execute(SQL_REVENUE_OF_INVOICE, (invoice_id,)).fetchone()
+        if row is not None:
+            invoice_date, name, tax_id, total, net = row
+            self._add_revenue(conn, invoice_date, name, tax_id, net, total, -1)
+
+    def _remove_service_uses(self, conn, invoice_id: int):
+        """Subtracts line items of saved invoice from the service uses (before it is
+        updated or deleted), the last use of a month goes to the other invoices."""
+
+        uses = conn.execute(SQL_SERVICE_USES_OF_INVOICE, (invoice_id,)).fetchall()
+        conn.executemany(
+            SQL_SERVICE_USES_REMOVE,
+            ((count, service, unit, month) for service, unit, month, count in uses),
+        )
+        conn.executemany(SQL_SERVICE_USES_PRUNE, (use[:3] for use in uses))
+        conn.executemany(
+            SQL_SERVICE_USES_LAST,
+            (
+                dict(service=service, unit=unit, month=month, invoice=invoice_id)
+                for service, unit, month, count in uses
+            ),
+        )
+
+    def last_invoice_no(self, year: int, series: str = "") -> str | None:
+        """Returns last used invoice number of series in year, or None."""
+
+        row = self.conn.execute(SQL_SEQUENCE_LAST, (series, year)).fetchone()
+        return format_invoice_no(row[0], year, series) if row else None
+
+    def next_invoice_no(self, year: int, series: str = "") -> str:
+        """Returns the number the next invoice of series in year will get. Another
+        workstation may take it first - the number is only reserved by
+        save_invoice()."""
+
+        row = self.conn.execute(SQL_SEQUENCE_LAST, (series, year)).fetchone()
+        return format_invoice_no(row[0] + 1 if row else 1, year, series)
+
+    def _rebuild_search(self, conn):
+        """Rebuilds full-text index of all invoices."""
+
+        conn.execute("DELETE FROM invoice_search")
+        conn.executemany(
+            SQL_SEARCH_PUT,
+            (_search_text(*row) for row in conn.execute(SQL_SEARCH_ALL).fetchall()),
+        )
+
+    def rebuild_revenue(self):
+        """Recalculates revenue summaries and service uses from all invoices, e.g. to
+        repair them after invoices were changed outside the app."""
+
+        with self.transaction() as conn:
+            self._rebuild_revenue(conn)
+            self._rebuild_service_uses(conn)
+
+    def _rebuild_revenue(self, conn):
+        """Fills revenue summaries from all invoices inside an open transaction."""
+
+        conn.execute("DELETE FROM revenue_months")
+        conn.execute("DELETE FROM revenue_customers")
+        conn.execute(SQL_REVENUE_MONTHS_REBUILD)
+        conn.execute(SQL_REVENUE_CUSTOMERS_REBUILD)
+
+    def _rebuild_service_uses(self, conn):
+        """Fills service uses from all line items inside an open transaction."""
+
+        conn.execute("DELETE FROM service_uses")
+        conn.execute(SQL_SERVICE_USES_REBUILD)
+
+    def _rebuild_sequences(self, conn):
+        """Sets invoice number sequences from numbers of all saved invoices (used
+        once, for databases from before the sequences)."""
+
+        conn.execute("DELETE FROM invoice_sequences")
+        for (invoice_no,) in conn.execute(SQL_INVOICE_NUMBERS).fetchall():
+            parsed = parse_invoice_no(invoice_no)
+            if parsed is not None:
+                series, number, year = parsed
+                conn.execute(SQL_SEQUENCE_BUMP, (series, year, number))
+
+    def delete_invoice(self, invoice_id: int):
+        """Deletes invoice and its line items."""
+
+        with self.transaction() as conn:
+            self._remove_revenue(conn, invoice_id)
+            self._remove_service_uses(conn, invoice_id)
+            conn.execute(SQL_INVOICE_DELETE, (invoice_id,))
+            conn.execute(SQL_SEARCH_DELETE, (invoice_id,))
+
+    def get_invoice(self, invoice_id: int) -> Invoice | None:
+        """Returns invoice with line items by id or None."""
+
+        row = self.conn.execute(SQL_INVOICE_GET, (invoice_id,)).fetchone()
+        if row is None:
+            return None
+        return self._invoice(row)
+
+    def page_invoices(
+        self,
+        key,
+        limit: int,
+        forward: bool = True,
+        search: str = "",
+        order: str = "id",
+        descending: bool = True,
+    ):
+        """Returns page of (id, customer_name, invoice_no, invoice_date, total) rows
+        sorted by order (an INVOICE_ORDERS key, default newest first), after
+        (forward) or before key - invoice_key() of the last row of the previous
+        page, None for the first (or with forward=False, last) page. search
+        matches the start of the customer name (case-insensitive) or invoice
+        number, or exact ISO date."""
+
+        params = (*_prefix(search) * 2, search) if search else ()
+        statement = SQL_INVOICE_PAGE[order][
+            forward != descending, bool(search), key is None
+        ]
+        return self.conn.execute(statement, (*params, *_keyset(key), limit)).fetchall()
+
+    def iter_invoices(self, date_from: date, date_to: date):
+        """Yields invoices (with line items) dated from date_from to date_to
+        inclusive, in date order. Invoices are loaded one at a time."""
+
+        ids = self.conn.execute(
+            SQL_INVOICE_IDS_BY_DATE, (date_from.isoformat(), date_to.isoformat())
+        )
+        for (invoice_id,) in ids:
+            invoice = self.get_invoice(invoice_id)
+            if invoice is not None:
+                yield invoice
+
+    def search_invoices(self, query: str, key, limit: int, forward: bool = True):
+        """Returns page of (rank, id, customer_name, invoice_no, invoice_date, total)
+        rows of invoices matching every word of query as a prefix (in customer
+        name, city, MB, PIB, invoice number, services or description), best match
+        first, after (forward) or before key - the (rank, id) of the last row of
+        the previous page."""
+
+        match = _match_query(query)
+        if match is None:
+            return []
+        if key is None:
+            key = (float("-inf"), 0) if forward else (float("inf"), 2**63 - 1)
+        return self.conn.execute(
+            SQL_SEARCH_PAGE[forward], (match, *key, limit)
+        ).fetchall()
+
+    def search_results(self, query: str, limit: int):
+        """Returns cursor over (id, customer_name, invoice_no, invoice_date, total)
+        rows of up to limit invoices matching query (see search_invoices()), best
+        match first - the whole result set in one query, e.g. for
+        core.rowsets.InvoiceRows."""
+
+        match = _match_query(query)
+        if match is None:
+            return iter(())
+        return self.conn.execute(SQL_SEARCH_RESULTS, (match, limit))
+
+    def export_rows(self, date_from: date, date_to: date, customer_id=None):
+        """Returns cursor over invoice and line item rows (see SQL_EXPORT_ROWS) of
+        invoices dated from date_from to date_to, optionally of one customer. Rows
+        are read from the database as the cursor is iterated."""
+
+        params = (date_from.isoformat(), date_to.isoformat())
+        if customer_id is not None:
+            params += (customer_id,)
+        return self.conn.execute(SQL_EXPORT_ROWS[customer_id is not None], params)
+
+    def count_invoices(self, date_from: date, date_to: date) -> int:
+        """Returns number of invoices dated from date_from to date_to inclusive."""
+
+        return self.conn.execute(
+            SQL_INVOICE_COUNT_BY_DATE, (date_from.isoformat(), date_to.isoformat())
+        ).fetchone()[0]
+
+    def _invoice(self, row) -> Invoice:
+        """Builds Invoice from SQL_INVOICE_GET row, loading its line items."""
+
+        # first 11 columns are in the order of Invoice fields
+        invoice = Invoice(
+            *row[:11], total=from_cents(row[11]), customer_id=row[12], id=row[13]
+        )
+        invoice.invoice_date = date.fromisoformat(invoice.invoice_date)
+        if invoice.date_of_purchase:
+            invoice.date_of_purchase = date.fromisoformat(invoice.date_of_purchase)
+
+        for name, unit, quantity, price, vat_rate, vat, total in self.conn.execute(
+            SQL_ITEMS_GET, (invoice.id,)
+        ):
+            invoice.items.append(
+                LineItem(
+                    name,
+                    unit,
+                    Decimal(quantity),
+                    from_cents(price),
+                    Decimal(vat_rate),
+                    from_cents(vat),
+                    from_cents(total),
+                )
+            )
+        return invoice
+
+    # revenue reports
+
+    def revenue_by_year(self) -> list[tuple]:
+        """Returns (year, invoices, net, vat, total) rows of all years, amounts in
+        cents."""
+
+        return self.conn.execute(SQL_REVENUE_YEARS).fetchall()
+
+    def revenue_by_month(self, year: int) -> list[tuple]:
+        """Returns (month, invoices, net, vat, total) rows of months of year that
+        have invoices, month as "2026-01", amounts in cents."""
+
+        return self.conn.execute(
+            SQL_REVENUE_MONTHS, (f"{year:04}-01", f"{year:04}-12")
+        ).fetchall()
+
+    def top_customers(self, year: int, limit: int = 10) -> list[tuple]:
+        """Returns (customer_name, customer_tax_id, invoices, net, vat, total) rows
+        of customers with the highest total in year, amounts in cents."""
+
+        return self.conn.execute(SQL_REVENUE_TOP_CUSTOMERS, (year, limit)).fetchall()
+
+    def service_history(self):
+        """Returns cursor over (type_of_service, unit, uses, last date, last price in
+        cents) of line items per service, unit and month, oldest first (read from
+        the service_uses summary)."""
+
+        return self.conn.execute(SQL_SERVICE_HISTORY)
+
+    # settings
+
+    def load_settings(self) -> dict[str, str]:
+        """Returns all settings as a dict."""
+
+        return dict(self.conn.execute(SQL_SETTINGS_GET))
+
+    def save_settings(self, settings: dict[str, str]):
+        """Saves (inserts or updates) settings in one transaction."""
+
+        with self.transaction() as conn:
+            conn.executemany(SQL_SETTINGS_PUT, settings.items())
+
+
+def _search_text(
+    invoice_id, name, city, id_no, tax_id, invoice_no, description, services
+) -> tuple:
+    """Returns SQL_SEARCH_PUT parameters, text folded like search queries."""
+
+    customer = " ".join((name, city, id_no, tax_id))
+    return (
+        invoice_id,
+        fold(customer),
+        fold(invoice_no),
+        fold(services or ""),
+        fold(description),
+    )
+
+
+def _match_query(query: str) -> str | None:
+    """Returns FTS5 query matching all words of query as prefixes, or None when
+    query has no words. A whole word match ranks above a prefix match."""
+
+    words = tokens(query)
+    if not words:
+        return None
+    return " AND ".join(f'("{word}" OR "{word}"*)' for word in words)
+
+
+def _prefix(text: str) -> tuple[str, str]:
+    """Returns (low, high) range of the strings starting with text."""
+
+    return text, text + chr(0x10FFFF)
+
+
+def _keyset(key) -> tuple:
+    """Returns parameters of the keyset condition of key (see _page_sql)."""
+
+    if key is None:
+        return ()
+    return (key[0], *key) if len(key) > 1 else key
+
+
+def invoice_key(order: str, row) -> tuple:
+    """Returns keyset key of a page_invoices() row in order."""
+
+    invoice_id, name, invoice_no, invoice_date, total = row
+    if order == "customer_name":
+        return name, invoice_id
+    if order == "invoice_no":
+        return invoice_no[-4:], len(invoice_no), invoice_no, invoice_id
+    if order == "invoice_date":
+        return invoice_date, invoice_id
+    if order == "total":
+        return total, invoice_id
+    return (invoice_id,)
+
+
+def customer_key(order: str, row) -> tuple:
+    """Returns keyset key of a page_customers() row in order."""
+
+    customer_id, name = row
+    return (name, customer_id) if order == "name" else (customer_id,)
+
+
+def rebuild_reports(db_path: str, progress=None, cancel=None):
+    """Recalculates revenue summaries and service uses of the database db_path
+    (see Storage.rebuild_revenue()), opened separately so the rebuild can run as a
+    core.jobs.BatchJob. It is one transaction, cancel is not checked."""
+
+    storage = Storage(db_path)
+    try:
+        storage.rebuild_revenue()
+    finally:
+        storage.close()
@@ -0,0 +1,127 @@
+"""
+Totals - exact Decimal line item model of an invoice with running totals.
+
+Rounding (half up, to 0.01 RSD):
+    - line net amount = quantity * price, rounded per line
+    - VAT per rate = sum of line net amounts with that rate * rate, rounded once
+      per rate (as in the VAT recapitulation on the invoice)
+    - invoice total = sum of net amounts + sum of VAT per rate
+The VAT amount shown on a line is rounded per line for display only, totals
+never add up rounded line VAT, so there is no cent drift however many lines an
+invoice has.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from core.models import LineItem
+
+CENT = Decimal("0.01")
+# VAT rates in percent: general, reduced, exempt
+VAT_RATES = (Decimal(20), Decimal(10), Decimal(0))
+
+
+def round_cents(amount: Decimal) -> Decimal:
+    """Returns amount rounded half up to 2 decimal places."""
+
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def vat_of(net: Decimal, rate: Decimal) -> Decimal:
+    """Returns VAT of net amount at rate (percent), rounded to cents."""
+
+    return round_cents(net * rate / 100)
+
+
+def line_item(
+    type_of_service: str, unit: str, quantity: Decimal, price: Decimal, vat_rate
+) -> LineItem:
+    """Returns line item with VAT amount and total (with VAT) calculated."""
+
+    vat_rate = Decimal(vat_rate)
+    net = round_cents(quantity * price)
+    vat = vat_of(net, vat_rate)
+    return LineItem(type_of_service, unit, quantity, price, vat_rate, vat, net + vat)
+
+
+class LineItems:
+    """Ordered line items with running subtotal, VAT per rate and total. Adding,
+    editing or deleting a line updates the totals in O(1), independently of the
+    number of lines."""
+
+    def __init__(self, items=()):
+        self.clear()
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    @property
+    def total(self) -> Decimal:
+        """Invoice total with VAT."""
+
+        return self.subtotal + self.vat_total
+
+    def keys(self) -> list[int]:
+        """Returns keys of the lines in order."""
+
+        return list(self.items)
+
+    def add(self, item: LineItem) -> int:
+        """Adds line item (see line_item()). Returns its key."""
+
+        key = self._next_key
+        self._next_key += 1
+        self.items[key] = item
+        self._change(item.vat_rate, round_cents(item.quantity * item.price), 1)
+        return key
+
+    def update(self, key: int, item: LineItem):
+        """Replaces line item with key."""
+
+        old = self.items[key]
+        self._change(old.vat_rate, -round_cents(old.quantity * old.price), -1)
+        self.items[key] = item
+        self._change(item.vat_rate, round_cents(item.quantity * item.price), 1)
+
+    def remove(self, key: int) -> LineItem:
+        """Removes line item with key. Returns removed item."""
+
+        item = self.items.pop(key)
+        self._change(item.vat_rate, -round_cents(item.quantity * item.price), -1)
+        return item
+
+    def clear(self):
+        """Removes all line items."""
+
+        # key -> LineItem, in insertion order
+        self.items = {}
+        # rate -> number of lines, sum of their net amounts, VAT of that sum
+        self.count = {}
+        self.base = {}
+        self.vat = {}
+        self.subtotal = Decimal("0.00")
+        self.vat_total = Decimal("0.00")
+        self._next_key = 1
+
+    def vat_by_rate(self) -> dict[Decimal, tuple[Decimal, Decimal]]:
+        """Returns rate -> (net amount, VAT) for every rate used on the invoice."""
+
+        return {rate: (self.base[rate], self.vat[rate]) for rate in self.base}
+
+    def _change(self, rate: Decimal, net: Decimal, lines: int):
+        """Adds net amount of lines (1 added or -1 removed) to the sums of rate."""
+
+        count = self.count.get(rate, 0) + lines
+        base = self.base.get(rate, Decimal("0.00")) + net
+        vat = vat_of(base, rate)
+        self.subtotal += net
+        self.vat_total += vat - self.vat.get(rate, Decimal("0.00"))
+
+        if count:
+            self.count[rate], self.base[rate], self.vat[rate] = count, base, vat
+        else:
+            # last line with this rate removed
+            del self.count[rate], self.base[rate], self.vat[rate]
@@ -6,16 +6,98 @@ Contains following classes (layouts):
     - Invoices
     - Review Invoices
     - Customers
+    - Reports
     - Settings
 
 Every class has following functions:
     - __init__() - initialize and place part of layout(sidebar, settings, etc.)
     - create_widgets() - creates widgets for the class
     - create_layout() - creates layout for the class (placement using pack, grid,...)
+
+Screens with behaviour also have create_bindings() - binds events and commands of
+the widgets. Shared services (storage, search index, ...) are attributes of the
+master (App) window.
 """
+import os
+import sqlite3
 import tkinter as tk
-from tkinter import ttk
-from tkcalendar import DateEntry as ttkDateEntry
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from tkinter import filedialog, messagebox, ttk
+
+from core.models import (
+    Customer,
+    Invoice,
+    LineItem,
+    format_amount,
+    from_cents,
+    parse_decimal,
+    pdf_file_name,
+)
+from core.customer_import import import_customers
+from core.details import InvoiceDetails, fetch_invoices
+from core.export import export_invoices
+from core.jobs import BatchJob
+from core.monitor import timed
+from core.rowsets import InvoiceRows
+from core.storage import customer_key, invoice_key, rebuild_reports
+from core.totals import VAT_RATES, LineItems, line_item
+from widgets import (
+    Debouncer,
+    SuggestionList,
+    VirtualTreeview,
+    date_entry,
+    set_entry,
+    sort_headings,
+    tk_image,
+)
+
+# placement of the main screens (everything right of the sidebar)
+SCREEN_PLACE = {"relx": 0.225, "y": 5, "relwidth": 0.75}
+
+# how often (ms) a running batch job (export, import) is checked for progress
+JOB_POLL_INTERVAL = 250
+
+
+def service_values(no, item: LineItem) -> tuple:
+    """Returns list_of_services row values of line item."""
+
+    return (
+        no,
+        item.type_of_service,
+        item.unit,
+        item.quantity,
+        format_amount(item.price),
+        f"{format_amount(item.vat)} ({item.vat_rate}%)",
+        format_amount(item.total),
+    )
+
+
+def invoice_values(invoice_id, name, invoice_no, invoice_date, total: int) -> tuple:
+    """Returns search_results row values of an invoice (total in cents,
+    invoice_date as date or ISO text)."""
+
+    if isinstance(invoice_date, str):
+        invoice_date = date.fromisoformat(invoice_date)
+    return (
+        invoice_id,
+        name,
+        invoice_no,
+        invoice_date.strftime("%d/%m/%Y"),
+        format_amount(from_cents(total)),
+    )
+
+
+def revenue_values(period: str, invoices: int, net: int, vat: int, total: int):
+    """Returns row values of a revenue summary row (amounts in cents)."""
+
+    return (
+        period,
+        invoices,
+        format_amount(from_cents(net)),
+        format_amount(from_cents(vat)),
+        format_amount(from_cents(total)),
+    )
 
 
 class Sidebar(ttk.Frame):
@@ -38,37 +120,112 @@ class Sidebar(ttk.Frame):
         self.btn_invoice_new = ttk.Button(self, text="Nova faktura")
         self.btn_invoice_review = ttk.Button(self, text="Pregled faktura")
         self.btn_customers = ttk.Button(self, text="Komitenti")
+        self.btn_reports = ttk.Button(self, text="Izveštaji")
         self.btn_settings = ttk.Button(self, text="Podešavanja")
         self.btn_quit = ttk.Button(self, text="Izlaz")
 
         # pyxl logo
-        self.pyxl_img = tk.PhotoImage(file="static/pyxl-med-logo-150x57.png")
+        self.pyxl_img = tk_image("static/pyxl-med-logo-150x57.png")
         self.l_pyxl_img = ttk.Label(self, image=self.pyxl_img, anchor="center")
 
+        # PDF files being rendered in the background
+        self.l_pdf_jobs = ttk.Label(self, text="PDF fakture:", anchor="w")
+        self.pdf_jobs = ttk.Treeview(
+            self, columns=["file", "status"], show="headings", height=4
+        )
+        self.pdf_jobs.heading("file", text="FAJL")
+        self.pdf_jobs.heading("status", text="STATUS")
+        self.pdf_jobs.column("status", minwidth=0, width=60, stretch=False)
+        self.btn_pdf_cancel = ttk.Button(self, text="Otkaži PDF")
+
+        # debug overlay of the monitor (core.monitor), placed by show_monitor()
+        self.l_monitor = ttk.Label(
+            self, text="", anchor="w", justify="left", font=("Consolas", 8)
+        )
+
     def create_layout(self):
         """Places created widgets in the window (from the create_widgets() method)."""
 
         self.btn_invoice_new.pack(fill="both")
         self.btn_invoice_review.pack(fill="both")
         self.btn_customers.pack(fill="both")
+        self.btn_reports.pack(fill="both")
         self.btn_settings.pack(fill="both")
         self.btn_quit.pack(fill="both")
         self.l_pyxl_img.pack(fill="both", pady=25)
+        self.l_pdf_jobs.pack(fill="x")
+        self.pdf_jobs.pack(fill="x")
+        self.btn_pdf_cancel.pack(fill="x")
+
+    def add_pdf_job(self, job_id: int, path: str):
+        """Adds started PDF render to the list of PDF jobs."""
+
+        self.pdf_jobs.insert(
+            "", 0, iid=str(job_id), values=(os.path.basename(path), "0%")
+        )
+
+    def update_pdf_job(self, kind: str, job_id: int, value):
+        """Shows PDF job event (see core.jobs) in the list of PDF jobs."""
+
+        status = {"done": "gotovo", "cancelled": "otkazano", "error": "greška"}
+        if kind == "progress":
+            text = f"{value:.0%}"
+        else:
+            text = status[kind]
+        if self.pdf_jobs.exists(str(job_id)):
+            self.pdf_jobs.set(str(job_id), "status", text)
+
+    def show_monitor(self, text: str):
+        """Shows text in the monitor debug overlay under the PDF jobs."""
+
+        if not self.l_monitor.winfo_ismapped():
+            self.l_monitor.pack(fill="x", pady=(25, 0))
+        self.l_monitor.configure(text=text)
+
+    def selected_pdf_job(self) -> int | None:
+        """Returns id of the PDF job selected in the list or None."""
+
+        selection = self.pdf_jobs.selection()
+        return int(selection[0]) if selection else None
 
 
 class Invoices(ttk.Frame):
     """Invoices window. Requires master as parameter."""
 
+    # delay (ms) after the last keystroke before customer search runs
+    SEARCH_DELAY = 150
+    # delay (ms) after the last change before the draft is autosaved
+    AUTOSAVE_DELAY = 1000
+    # draft fields filled in without typing (today's dates), they alone do not
+    # make a draft worth restoring
+    DRAFT_DEFAULTS = ("invoice_date", "date_of_purchase")
+    # entries journaled by autosave (core.drafts): draft field -> entry attribute
+    DRAFT_ENTRIES = {
+        "invoice_no": "e_invoice_id",
+        "invoice_date": "e_invoice_date",
+        "date_of_purchase": "e_invoice_date_of_purchase",
+        "place_of_purchase": "e_invoice_place_of_purchase",
+        "customer_in_db": "combo_customer_in_db",
+        "customer_name": "e_customer_name",
+        "customer_address": "e_customer_address",
+        "customer_city": "e_customer_city",
+        "customer_id_no": "e_customer_id_no",
+        "customer_tax_id": "e_customer_tax_id",
+        "customer_email": "e_customer_email",
+    }
+
     def __init__(self, master):
         super().__init__(master)
         # sidebar occupies 200px of the window width
         # self.place(relx=0.225, y=5, relwidth=0.75, relheight=0.95)
-        self.place(relx=0.225, y=5, relwidth=0.75)
+        self.place(**SCREEN_PLACE)
 
         # create widgets
         self.create_widgets()
         # place widgets in window
         self.create_layout()
+        # bind events
+        self.create_bindings()
 
     def create_widgets(self):
         """Create widgets in Review Invoices window. Does not place them in the window. To place
@@ -128,13 +285,13 @@ class Invoices(ttk.Frame):
 
         # invoice dates
         self.l_invoice_date = ttk.Label(self, text="Datum fakture:", anchor="center")
-        self.e_invoice_date = ttkDateEntry(self, date_pattern="dd/MM/yyyy")
+        self.e_invoice_date = date_entry(self)
 
         # date of purchase
         self.l_invoice_date_of_purchase = ttk.Label(
             self, text="Datum prometa:", anchor="center"
         )
-        self.e_invoice_date_of_purchase = ttkDateEntry(self, date_pattern="dd/MM/yyyy")
+        self.e_invoice_date_of_purchase = date_entry(self)
 
         # place of purchase
         self.l_invoice_place_of_purchase = ttk.Label(
@@ -187,8 +344,16 @@ class Invoices(ttk.Frame):
         )
         self.e_price_of_service = ttk.Entry(self)
 
-        # add service
+        # VAT rate of the service
+        self.l_vat_rate = ttk.Label(self, text="PDV stopa (%):", anchor="center")
+        self.combo_vat_rate = ttk.Combobox(
+            self, values=[str(rate) for rate in VAT_RATES], width=5
+        )
+
+        # add, edit and delete service
         self.btn_add_service = ttk.Button(self, text="Dodaj stavku")
+        self.btn_edit_service = ttk.Button(self, text="Izmeni stavku")
+        self.btn_delete_service = ttk.Button(self, text="Obriši stavku")
 
         # list of services
         self.list_of_services = ttk.Treeview(
@@ -341,7 +506,13 @@ class Invoices(ttk.Frame):
         self.l_price_of_service.grid(row=12, column=4, sticky="ew", pady=2)
         self.e_price_of_service.grid(row=12, column=5, sticky="ew", pady=2)
 
-        # add service button
+        # VAT rate
+        self.l_vat_rate.grid(row=13, column=0, sticky="ew", pady=2)
+        self.combo_vat_rate.grid(row=13, column=1, sticky="ew", pady=2)
+
+        # add, edit and delete service buttons
+        self.btn_edit_service.grid(row=13, column=3, sticky="ew", pady=2)
+        self.btn_delete_service.grid(row=13, column=4, sticky="ew", pady=2)
         self.btn_add_service.grid(row=13, column=5, sticky="ew", pady=2)
 
         # list of service
@@ -362,20 +533,533 @@ class Invoices(ttk.Frame):
         self.btn_invoice_save_pdf.grid(row=18, column=4, sticky="ew", pady=10, ipadx=3)
         self.btn_invoice_print.grid(row=18, column=5, sticky="ew", pady=10)
 
+    def create_bindings(self):
+        """Binds events and button commands of the widgets (from the create_widgets() method)."""
+
+        # database ids of the selected customer and of the saved invoice
+        self.customer_id = None
+        self.saved_invoice_id = None
+        # customer entries as the selected customer filled them (see customer_edited)
+        self.customer_values = None
+
+        # customer search - debounced, runs once typing pauses
+        self.customer_search = Debouncer(self, self.SEARCH_DELAY, self.search_customers)
+        self.e_customer_search_db.bind("<KeyRelease>", self.customer_search)
+
+        self.btn_select_customer_from_db.configure(command=self.select_customer)
+        self.btn_customer_save_in_db.configure(command=self.save_customer)
+        # auto-fill of the customer from a typed PIB or MB
+        self.e_customer_tax_id.bind("<KeyRelease>", self.fill_customer, add="+")
+        self.e_customer_id_no.bind("<KeyRelease>", self.fill_customer, add="+")
+        for entry in self.customer_entries():
+            entry.bind("<KeyRelease>", self.customer_edited, add="+")
+        self.btn_invoice_save_db.configure(command=self.save_invoice)
+        self.btn_invoice_save_pdf.configure(command=self.save_pdf)
+
+        # line items - model behind list_of_services, row iid is the line key
+        self.line_items = LineItems()
+        settings = self.master.storage.load_settings()
+        self.combo_vat_rate.set("20" if settings.get("company_vat") == "Da" else "0")
+        self.btn_add_service.configure(command=self.add_service)
+        self.btn_edit_service.configure(command=self.edit_service)
+        self.btn_delete_service.configure(command=self.delete_service)
+        self.list_of_services.bind("<<TreeviewSelect>>", self.load_service)
+        self.update_total()
+        # service catalog - whole lines (service, unit, price) suggested while typing
+        self.service_suggestions = SuggestionList(
+            self.e_type_of_service, self.suggest_services, self.fill_service
+        )
+
+        # invoice number - empty entry gets the next number of the year on save
+        self.e_invoice_date.bind("<<DateEntrySelected>>", self.show_invoice_no)
+        self.show_invoice_no()
+
+        # autosave of the draft - debounced, only changes are journaled; the form
+        # is dirty from the first edit until it is saved or the draft discarded
+        self.draft_dirty = False
+        self.autosave_later = Debouncer(self, self.AUTOSAVE_DELAY, self.autosave)
+        for name in (*self.DRAFT_ENTRIES.values(), "e_desc"):
+            getattr(self, name).bind("<KeyRelease>", self.form_changed, add="+")
+        for widget, event in (
+            (self.combo_customer_in_db, "<<ComboboxSelected>>"),
+            (self.e_invoice_date, "<<DateEntrySelected>>"),
+            (self.e_invoice_date_of_purchase, "<<DateEntrySelected>>"),
+        ):
+            widget.bind(event, self.form_changed, add="+")
+        if self.master.drafts.draft is not None:
+            self.after_idle(self.restore_draft)
+
+    def search_customers(self):
+        """Searches top 5 customers matching the search entry in the background,
+        see show_customers()."""
+
+        query = self.e_customer_search_db.get()
+        index = self.master.customer_index
+        self.master.search(
+            "invoices.customers",
+            lambda storage: index.search(query, limit=5),
+            self.show_customers,
+        )
+
+    def show_customers(self, results: list[tuple]):
+        """Shows customer search results in customer_search_db_results."""
+
+        tree = self.customer_search_db_results
+        tree.delete(*tree.get_children())
+        for no, (customer_id, name, id_no, tax_id) in enumerate(results, start=1):
+            tree.insert(
+                "", "end", iid=str(customer_id), values=(no, name, id_no, tax_id)
+            )
+
+    def select_customer(self):
+        """Fills customer entries with the customer selected in search results."""
+
+        selection = self.customer_search_db_results.selection()
+        if not selection:
+            return
+        customer = self.master.storage.get_customer(int(selection[0]))
+        if customer is None:
+            return
+        self.set_customer(customer)
+
+    def fill_customer(self, event):
+        """Fills customer entries with the customer whose PIB or MB was typed in
+        the entry of event (hash lookup in the customer index)."""
+
+        number = event.widget.get().strip()
+        if event.widget is self.e_customer_tax_id:
+            customer = self.master.customer_index.lookup(
+                self.master.storage, tax_id=number
+            )
+        else:
+            customer = self.master.customer_index.lookup(
+                self.master.storage, id_no=number
+            )
+        if customer is not None and customer.id != self.customer_id:
+            self.set_customer(customer, typed=event.widget)
+
+    def set_customer(self, customer: Customer, typed=None):
+        """Fills customer entries with customer from the database, except the entry
+        typed (being typed in)."""
+
+        self.combo_customer_in_db.set("Da")
+        for entry, value in zip(
+            self.customer_entries(),
+            (
+                customer.name,
+                customer.address,
+                customer.city,
+                customer.id_no,
+                customer.tax_id,
+                customer.email,
+            ),
+        ):
+            if entry is not typed:
+                set_entry(entry, value)
+        self.select_customer_id(customer.id)
+        self.form_changed()
+
+    def customer_entries(self) -> tuple:
+        """Returns the customer entries (name, address, city, MB, PIB, e-mail)."""
+
+        return (
+            self.e_customer_name,
+            self.e_customer_address,
+            self.e_customer_city,
+            self.e_customer_id_no,
+            self.e_customer_tax_id,
+            self.e_customer_email,
+        )
+
+    def select_customer_id(self, customer_id):
+        """Links the form to the database customer customer_id (None for none),
+        filled in the customer entries as they are now."""
+
+        self.customer_id = customer_id
+        self.customer_values = (
+            None
+            if customer_id is None
+            else [entry.get().strip() for entry in self.customer_entries()]
+        )
+
+    def customer_edited(self, event=None):
+        """Forgets the selected customer once its entries are changed by hand, so
+        saving the customer adds a new one instead of overwriting it."""
+
+        values = [entry.get().strip() for entry in self.customer_entries()]
+        if self.customer_id is not None and values != self.customer_values:
+            self.select_customer_id(None)
+            self.combo_customer_in_db.set("Ne")
+
+    def get_customer(self) -> Customer:
+        """Returns customer from the customer entries."""
+
+        return Customer(
+            name=self.e_customer_name.get().strip(),
+            address=self.e_customer_address.get().strip(),
+            city=self.e_customer_city.get().strip(),
+            email=self.e_customer_email.get().strip(),
+            id_no=self.e_customer_id_no.get().strip(),
+            tax_id=self.e_customer_tax_id.get().strip(),
+            id=self.customer_id,
+        )
+
+    @timed
+    def save_customer(self):
+        """Saves customer from the customer entries in the database."""
+
+        customer = self.get_customer()
+        if not customer.name:
+            messagebox.showwarning("Komitent", "Unesite ime/naziv komitenta.")
+            return
+
+        self.master.storage.save_customer(customer)
+        self.master.customer_index.add(
+            customer.id, customer.name, customer.id_no, customer.tax_id
+        )
+        self.select_customer_id(customer.id)
+        self.combo_customer_in_db.set("Da")
+        self.form_changed()
+
+    def get_service(self) -> LineItem:
+        """Returns line item from the service entries. Raises
+        decimal.InvalidOperation if quantity, price or VAT rate is not a number."""
+
+        return line_item(
+            self.e_type_of_service.get().strip(),
+            self.e_unit_of_service.get().strip(),
+            parse_decimal(self.e_quantity_of_service.get()),
+            parse_decimal(self.e_price_of_service.get()),
+            parse_decimal(self.combo_vat_rate.get()),
+        )
+
+    def suggest_services(self, text: str) -> list[tuple]:
+        """Returns (label, line) suggestions of the service catalog for text."""
+
+        return [
+            (f"{name} | {unit} | {format_amount(price)}", (name, unit, price))
+            for name, unit, price in self.master.service_catalog.suggest(text)
+        ]
+
+    def fill_service(self, line: tuple):
+        """Fills service entries with a suggested (service, unit, price) line, the
+        quantity is typed next."""
+
+        name, unit, price = line
+        set_entry(self.e_type_of_service, name)
+        set_entry(self.e_unit_of_service, unit)
+        set_entry(self.e_price_of_service, price)
+        if not self.e_quantity_of_service.get().strip():
+            set_entry(self.e_quantity_of_service, 1)
+        self.e_quantity_of_service.focus_set()
+        self.e_quantity_of_service.select_range(0, "end")
+
+    def add_service(self):
+        """Adds service from the service entries to list_of_services."""
+
+        try:
+            item = self.get_service()
+        except InvalidOperation:
+            messagebox.showerror("Greška", "Neispravna količina, cena ili PDV stopa.")
+            return
+
+        key = self.line_items.add(item)
+        no = len(self.line_items)
+        self.list_of_services.insert(
+            "", "end", iid=str(key), values=service_values(no, item)
+        )
+        self.update_total()
+        self.form_changed()
+        for entry in (
+            self.e_type_of_service,
+            self.e_unit_of_service,
+            self.e_quantity_of_service,
+            self.e_price_of_service,
+        ):
+            set_entry(entry, "")
+
+    def load_service(self, event=None):
+        """Fills the service entries with the service selected in list_of_services."""
+
+        selection = self.list_of_services.selection()
+        if not selection:
+            return
+        item = self.line_items.items[int(selection[0])]
+        set_entry(self.e_type_of_service, item.type_of_service)
+        set_entry(self.e_unit_of_service, item.unit)
+        set_entry(self.e_quantity_of_service, item.quantity)
+        set_entry(self.e_price_of_service, item.price)
+        self.combo_vat_rate.set(str(item.vat_rate))
+
+    def edit_service(self):
+        """Replaces service selected in list_of_services with the service entries."""
+
+        selection = self.list_of_services.selection()
+        if not selection:
+            return
+        try:
+            item = self.get_service()
+        except InvalidOperation:
+            messagebox.showerror("Greška", "Neispravna količina, cena ili PDV stopa.")
+            return
+
+        iid = selection[0]
+        self.line_items.update(int(iid), item)
+        no = self.list_of_services.set(iid, "no")
+        self.list_of_services.item(iid, values=service_values(no, item))
+        self.update_total()
+        self.form_changed()
+
+    def delete_service(self):
+        """Deletes service selected in list_of_services."""
+
+        selection = self.list_of_services.selection()
+        if not selection:
+            return
+
+        iid = selection[0]
+        index = self.list_of_services.index(iid)
+        self.line_items.remove(int(iid))
+        self.list_of_services.delete(iid)
+        # only rows below the deleted one get a new number
+        rows = self.list_of_services.get_children()
+        for no, row in enumerate(rows[index:], start=index + 1):
+            self.list_of_services.set(row, "no", no)
+        self.update_total()
+        self.form_changed()
+
+    def update_total(self):
+        """Shows invoice total (with VAT) of list_of_services."""
+
+        self.l_total_amount_var.configure(text=format_amount(self.line_items.total))
+
+    def show_invoice_no(self, event=None):
+        """Shows last used and next invoice number in the year of the invoice date."""
+
+        year = self.e_invoice_date.get_date().year
+        last = self.master.storage.last_invoice_no(year) or "-"
+        next_no = self.master.storage.next_invoice_no(year)
+        self.l_invoice_id_check.configure(
+            text=f"Poslednji broj fakture: {last}, sledeći: {next_no}"
+        )
+
+    def get_invoice(self) -> Invoice:
+        """Returns invoice from the form."""
+
+        customer = self.get_customer()
+        return Invoice(
+            invoice_no=self.e_invoice_id.get().strip(),
+            invoice_date=self.e_invoice_date.get_date(),
+            customer_name=customer.name,
+            date_of_purchase=self.e_invoice_date_of_purchase.get_date(),
+            place_of_purchase=self.e_invoice_place_of_purchase.get().strip(),
+            customer_address=customer.address,
+            customer_city=customer.city,
+            customer_id_no=customer.id_no,
+            customer_tax_id=customer.tax_id,
+            customer_email=customer.email,
+            description=self.e_desc.get("1.0", "end-1c").strip(),
+            items=list(self.line_items),
+            total=self.line_items.total,
+            customer_id=(
+                self.customer_id if self.combo_customer_in_db.get() == "Da" else None
+            ),
+            id=self.saved_invoice_id,
+        )
+
+    @timed
+    def save_invoice(self):
+        """Saves invoice from the form (with all line items) in the database."""
+
+        invoice = self.get_invoice()
+        if not invoice.customer_name:
+            messagebox.showwarning("Faktura", "Unesite komitenta.")
+            return
+
+        try:
+            self.master.storage.save_invoice(invoice)
+        except sqlite3.IntegrityError:
+            messagebox.showerror(
+                "Greška", f"Faktura broj {invoice.invoice_no} već postoji."
+            )
+            return
+        self.saved_invoice_id = invoice.id
+        self.master.service_catalog.add(invoice.items, invoice.invoice_date)
+        # number given by the sequence when the entry was empty
+        set_entry(self.e_invoice_id, invoice.invoice_no)
+        self.show_invoice_no()
+        # saved, nothing to restore - later edits start a new draft
+        self.draft_dirty = False
+        self.autosave_later.cancel()
+        self.master.drafts.clear()
+        if messagebox.askyesno(
+            "Faktura",
+            f"Faktura broj {invoice.invoice_no} je sačuvana. Započeti novu fakturu?",
+        ):
+            self.new_invoice()
+
+    def new_invoice(self):
+        """Empties the form for a new invoice - entries, line items, the selected
+        customer and the saved invoice (the next save inserts a new invoice) - and
+        the draft journal. Unsaved changes are discarded after confirmation."""
+
+        if self.draft_dirty and not messagebox.askyesno(
+            "Nova faktura", "Odbaciti nesačuvane izmene fakture?"
+        ):
+            return
+
+        for name, entry in self.DRAFT_ENTRIES.items():
+            if name not in self.DRAFT_DEFAULTS:
+                set_entry(getattr(self, entry), "")
+        for entry in (self.e_invoice_date, self.e_invoice_date_of_purchase):
+            entry.set_date(date.today())
+        for entry in (
+            self.e_desc,
+            self.e_customer_search_db,
+            self.e_type_of_service,
+            self.e_unit_of_service,
+            self.e_quantity_of_service,
+            self.e_price_of_service,
+        ):
+            set_entry(entry, "")
+        self.customer_search_db_results.delete(
+            *self.customer_search_db_results.get_children()
+        )
+        self.service_suggestions.hide()
+
+        self.line_items.clear()
+        self.list_of_services.delete(*self.list_of_services.get_children())
+        self.update_total()
+        self.select_customer_id(None)
+        self.saved_invoice_id = None
+        self.show_invoice_no()
+
+        self.draft_dirty = False
+        self.autosave_later.cancel()
+        self.master.drafts.clear()
+
+    def draft_fields(self) -> dict[str, str]:
+        """Returns form fields of the draft (see core.drafts)."""
+
+        fields = {
+            name: getattr(self, entry).get()
+            for name, entry in self.DRAFT_ENTRIES.items()
+        }
+        fields["description"] = self.e_desc.get("1.0", "end-1c")
+        for name in ("customer_id", "saved_invoice_id"):
+            value = getattr(self, name)
+            fields[name] = "" if value is None else str(value)
+        return fields
+
+    def draft_items(self) -> dict[int, list[str]]:
+        """Returns line items of the draft by LineItems key."""
+
+        return {
+            key: [
+                item.type_of_service,
+                item.unit,
+                str(item.quantity),
+                str(item.price),
+                str(item.vat_rate),
+            ]
+            for key, item in self.line_items.items.items()
+        }
+
+    def form_changed(self, event=None):
+        """Marks the form dirty and schedules its autosave."""
+
+        self.draft_dirty = True
+        self.autosave_later()
+
+    def autosave(self):
+        """Journals changes of the form since the last autosave."""
+
+        self.master.drafts.record(self.draft_fields(), self.draft_items())
+
+    def restore_draft(self):
+        """Offers to restore the draft left by the previous session (crash or
+        closing with an unsaved invoice) and fills the form with it."""
+
+        drafts = self.master.drafts
+        if not messagebox.askyesno(
+            "Nesačuvana faktura",
+            "Pronađena je nesačuvana faktura iz prethodnog rada. Vratiti je?",
+        ):
+            self.draft_dirty = False
+            drafts.clear()
+            return
+
+        fields, items = drafts.draft
+        for name, entry in self.DRAFT_ENTRIES.items():
+            set_entry(getattr(self, entry), fields.get(name, ""))
+        set_entry(self.e_desc, fields.get("description", ""))
+        for name in ("customer_id", "saved_invoice_id"):
+            value = fields.get(name, "")
+            setattr(self, name, int(value) if value else None)
+        self.select_customer_id(self.customer_id)
+
+        self.line_items.clear()
+        self.list_of_services.delete(*self.list_of_services.get_children())
+        # keys grow with every added line, so they give the order of the lines
+        for no, key in enumerate(sorted(items), start=1):
+            type_of_service, unit, quantity, price, vat_rate = items[key]
+            item = line_item(
+                type_of_service, unit, Decimal(quantity), Decimal(price), vat_rate
+            )
+            new_key = self.line_items.add(item)
+            self.list_of_services.insert(
+                "", "end", iid=str(new_key), values=service_values(no, item)
+            )
+        self.update_total()
+        self.show_invoice_no()
+        # lines got new keys, journal starts again from the restored form
+        drafts.rewrite(self.draft_fields(), self.draft_items())
+        self.draft_dirty = True
+
+    @timed
+    def save_pdf(self):
+        """Asks for file name and renders invoice from the form to PDF in the
+        background. The form can be used (e.g. for the next invoice) meanwhile."""
+
+        invoice = self.get_invoice()
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf")],
+            initialfile=pdf_file_name(invoice),
+        )
+        if path:
+            self.master.render_pdf(invoice, path)
+
 
 class ReviewInvoices(ttk.Frame):
     """Review invoices window. Requiers master as parameter."""
 
+    # delay (ms) after the last keystroke before invoice search runs
+    SEARCH_DELAY = 250
+    # most full-text search results kept in memory (core.rowsets)
+    SEARCH_LIMIT = 200_000
+    # search_results column -> sort order of page_invoices() / InvoiceRows.sorted()
+    SORT_ORDERS = {
+        "id": "id",
+        "name": "customer_name",
+        "invoice_id": "invoice_no",
+        "invoice_date": "invoice_date",
+        "invoice_amount": "total",
+    }
+
     def __init__(self, master):
         super().__init__(master)
         # sidebar occupies 200px of the window width
         # self.place(relx=0.225, y=5, relwidth=0.75, relheight=0.95)
-        self.place(relx=0.225, y=5, relwidth=0.75)
+        self.place(**SCREEN_PLACE)
 
         # create widgets
         self.create_widgets()
         # place widgets in window
         self.create_layout()
+        # bind events
+        self.create_bindings()
 
     def create_widgets(self):
         """Create widgets in Review Invoices window. Does not place them in the window. To place
@@ -410,6 +1094,12 @@ class ReviewInvoices(ttk.Frame):
         self.search_results.column(
             "invoice_amount", minwidth=0, width=120, stretch=False
         )
+        self.search_results_scroll = ttk.Scrollbar(self, orient="vertical")
+        # virtual list mode - only visible rows (plus buffer) exist as tree items,
+        # page source is set with search_results_view.set_source()
+        self.search_results_view = VirtualTreeview(
+            self.search_results, scrollbar=self.search_results_scroll
+        )
 
         # buttons
         self.btn_invoice_edit = ttk.Button(self, text="Prikaži ili izmeni")
@@ -426,13 +1116,13 @@ class ReviewInvoices(ttk.Frame):
 
         # invoice dates
         self.l_invoice_date = ttk.Label(self, text="Datum fakture:", anchor="center")
-        self.e_invoice_date = ttkDateEntry(self, date_pattern="dd/MM/yyyy")
+        self.e_invoice_date = date_entry(self)
 
         # date of purchase
         self.l_invoice_date_of_purchase = ttk.Label(
             self, text="Datum prometa:", anchor="center"
         )
-        self.e_invoice_date_of_purchase = ttkDateEntry(self, date_pattern="dd/MM/yyyy")
+        self.e_invoice_date_of_purchase = date_entry(self)
 
         # place of purchase
         self.l_invoice_place_of_purchase = ttk.Label(
@@ -532,6 +1222,17 @@ class ReviewInvoices(ttk.Frame):
         self.btn_invoice_save_pdf = ttk.Button(self, text="Sačuvaj fakturu (PDF)")
         self.btn_invoice_print = ttk.Button(self, text="Štampaj fakturu")
 
+        # batch PDF export of a period
+        self.l_export_from = ttk.Label(self, text="Izvoz od:", anchor="center")
+        self.e_export_from = date_entry(self)
+        self.l_export_to = ttk.Label(self, text="do:", anchor="center")
+        self.e_export_to = date_entry(self)
+        self.btn_export_pdf = ttk.Button(self, text="Izvezi PDF")
+        self.l_export_status = ttk.Label(self, text="", anchor="center")
+        # export of the same period for accounting (CSV/JSON Lines)
+        self.btn_export_data = ttk.Button(self, text="Izvezi CSV")
+        self.l_export_data_status = ttk.Label(self, text="", anchor="center")
+
     def create_layout(self):
         """Places created widgets in the window (from the create_widgets() method)."""
 
@@ -539,8 +1240,8 @@ class ReviewInvoices(ttk.Frame):
         for _ in range(6):
             self.columnconfigure(_, weight=1)
 
-        # 16 rows
-        for _ in range(17):
+        # 19 rows
+        for _ in range(19):
             self.rowconfigure(_, weight=1)
 
         # GRID
@@ -556,6 +1257,7 @@ class ReviewInvoices(ttk.Frame):
 
         # search results
         self.search_results.grid(row=2, column=0, columnspan=6, sticky="ew")
+        self.search_results_scroll.grid(row=2, column=6, sticky="ns")
 
         # buttons - edit or delete
         self.btn_invoice_edit.grid(row=3, column=4, sticky="ew", pady=(3, 15))
@@ -643,15 +1345,348 @@ class ReviewInvoices(ttk.Frame):
         self.btn_invoice_save_pdf.grid(row=16, column=4, sticky="ew", pady=10)
         self.btn_invoice_print.grid(row=16, column=5, sticky="ew", pady=10)
 
+        # batch PDF export
+        self.l_export_from.grid(row=17, column=0, sticky="ew", pady=(20, 2))
+        self.e_export_from.grid(row=17, column=1, sticky="ew", pady=(20, 2))
+        self.l_export_to.grid(row=17, column=2, sticky="ew", pady=(20, 2))
+        self.e_export_to.grid(row=17, column=3, sticky="ew", pady=(20, 2))
+        self.btn_export_pdf.grid(row=17, column=4, sticky="ew", pady=(20, 2))
+        self.l_export_status.grid(row=17, column=5, sticky="ew", pady=(20, 2))
+        # export for accounting
+        self.btn_export_data.grid(row=18, column=4, sticky="ew", pady=2)
+        self.l_export_data_status.grid(row=18, column=5, sticky="ew", pady=2)
+
+    def create_bindings(self):
+        """Binds events and button commands of the widgets (from the create_widgets() method)."""
+
+        # invoice search - debounced, runs once typing pauses
+        self.invoice_search = Debouncer(self, self.SEARCH_DELAY, self.search_invoices)
+        self.e_search.bind("<KeyRelease>", self.invoice_search)
+
+        # sorting by heading click, sort_column None is the default order
+        self.sort_column = None
+        self.sort_descending = False
+        # full-text search results in the order of relevance while a column is
+        # sorted, otherwise None
+        self.ranked_results = None
+        self.headings = {
+            column: self.search_results.heading(column, "text")
+            for column in self.SORT_ORDERS
+        }
+        for column in self.SORT_ORDERS:
+            self.search_results.heading(
+                column, command=lambda column=column: self.sort_results(column)
+            )
+
+        self.btn_invoice_delete.configure(command=self.delete_invoice)
+
+        # full invoice of the selected row, rows around it are prefetched
+        self.details = InvoiceDetails()
+        self.search_results.bind("<<TreeviewSelect>>", self.show_selected)
+        self.btn_invoice_edit.configure(command=self.show_selected)
+
+        # running batch export (core.jobs.BatchJob) or None
+        self.export_job = None
+        self.btn_export_pdf.configure(command=self.export_pdf)
+        self.data_export_job = None
+        self.btn_export_data.configure(command=self.export_data)
+
+        self.search_invoices()
+
+    def search_invoices(self):
+        """Reloads search_results with invoices matching the search entry - date as
+        dd/mm/yyyy, otherwise full-text search (customer, number, services,
+        comment), best match first - or in the order of the sorted column. Row keys
+        are tuples ending with invoice id."""
+
+        search = self.e_search.get().strip()
+        try:
+            day = datetime.strptime(search, "%d/%m/%Y").date().isoformat()
+        except ValueError:
+            day = None
+        self.details.clear()
+
+        self.ranked_results = None
+        if search and day is None:
+            self.search_ranked(search)
+            return
+
+        # newest first by default, every order is an indexed keyset query
+        order = self.SORT_ORDERS.get(self.sort_column, "id")
+        descending = self.sort_descending if self.sort_column else True
+
+        def fetch(key, limit, forward, storage=self.master.storage):
+            rows = storage.page_invoices(
+                key, limit, forward, day or "", order, descending
+            )
+            return [(invoice_key(order, row), invoice_values(*row)) for row in rows]
+
+        # first page on the search thread, further pages on scroll
+        page_size = self.search_results_view.page_size
+        self.master.search(
+            "review_invoices",
+            lambda storage: fetch(None, page_size, True, storage),
+            lambda rows: self.search_results_view.set_source(fetch, rows),
+        )
+
+    def search_ranked(self, search: str):
+        """Loads full-text search results, best match first, page by page from the
+        ranked query - row keys are (rank, invoice id). Only a sorted column needs
+        the whole result set in memory, see show_results()."""
+
+        if self.sort_column is not None:
+            limit = self.SEARCH_LIMIT
+            self.master.search(
+                "review_invoices",
+                lambda storage: InvoiceRows(storage.search_results(search, limit)),
+                self.show_results,
+            )
+            return
+
+        def fetch(key, limit, forward, storage=self.master.storage):
+            rows = storage.search_invoices(search, key, limit, forward)
+            return [(row[:2], invoice_values(*row[1:])) for row in rows]
+
+        page_size = self.search_results_view.page_size
+        self.master.search(
+            "review_invoices",
+            lambda storage: fetch(None, page_size, True, storage),
+            lambda rows: self.search_results_view.set_source(fetch, rows),
+        )
+
+    def show_results(self, results: InvoiceRows):
+        """Shows full-text search results in search_results, sorted by the sorted
+        column. They are kept in compact columns (core.rowsets), sorting and pages
+        when scrolling come from memory. Row keys are (position, invoice id)."""
+
+        self.ranked_results = results
+        if self.sort_column is not None:
+            order = self.SORT_ORDERS[self.sort_column]
+            results = results.sorted(order, self.sort_descending)
+
+        def fetch(key, limit, forward):
+            return [
+                (
+                    (position, row.id),
+                    invoice_values(
+                        row.id,
+                        row.customer_name,
+                        row.invoice_no,
+                        row.invoice_date,
+                        row.total,
+                    ),
+                )
+                for position, row in results.page(key and key[0], limit, forward)
+            ]
+
+        self.search_results_view.set_source(fetch)
+
+    def sort_results(self, column: str):
+        """Sorts search_results by column (heading click) - ascending, descending on
+        the second click and back to the default order on the third. Only the
+        first page is fetched again, full-text results are sorted in memory."""
+
+        if column != self.sort_column:
+            self.sort_column, self.sort_descending = column, False
+        elif not self.sort_descending:
+            self.sort_descending = True
+        else:
+            self.sort_column, self.sort_descending = None, False
+        sort_headings(
+            self.search_results, self.headings, self.sort_column, self.sort_descending
+        )
+        if self.ranked_results is not None and self.sort_column is not None:
+            self.show_results(self.ranked_results)
+        else:
+            # the default order pages the ranked query again, the result set is
+            # dropped
+            self.search_invoices()
+
+    def show_selected(self, event=None):
+        """Shows full invoice of the row selected in search_results and prefetches
+        the invoices of the rows around it on the search thread."""
+
+        key = self.search_results_view.selected_key()
+        if key is None:
+            return
+        invoice = self.details.load(self.master.storage, key[-1])
+        if invoice is None:
+            return
+        self.show_invoice(invoice)
+
+        # rows of the tree window (not the whole list) in order
+        children = self.search_results.get_children()
+        ids = [self.search_results_view.key_of(iid)[-1] for iid in children]
+        index = children.index(self.search_results.selection()[0])
+        missing = self.details.select(ids, index)
+        if missing:
+            self.master.search(
+                "invoice_details",
+                lambda storage: fetch_invoices(storage, missing),
+                self.details.add,
+            )
+
+    def show_invoice(self, invoice: Invoice):
+        """Fills the invoice entries and list_of_services with invoice."""
+
+        set_entry(self.e_invoice_id, invoice.invoice_no)
+        self.e_invoice_date.set_date(invoice.invoice_date)
+        if invoice.date_of_purchase:
+            self.e_invoice_date_of_purchase.set_date(invoice.date_of_purchase)
+        else:
+            set_entry(self.e_invoice_date_of_purchase, None)
+        set_entry(self.e_invoice_place_of_purchase, invoice.place_of_purchase)
+        set_entry(self.e_customer_name, invoice.customer_name)
+        set_entry(self.e_customer_address, invoice.customer_address)
+        set_entry(self.e_customer_city, invoice.customer_city)
+        set_entry(self.e_customer_id_no, invoice.customer_id_no)
+        set_entry(self.e_customer_tax_id, invoice.customer_tax_id)
+        set_entry(self.e_customer_email, invoice.customer_email)
+        set_entry(self.e_desc, invoice.description)
+
+        self.list_of_services.delete(*self.list_of_services.get_children())
+        for no, item in enumerate(invoice.items, start=1):
+            self.list_of_services.insert("", "end", values=service_values(no, item))
+        self.l_total_amount_var.configure(text=format_amount(invoice.total))
+
+    @timed
+    def delete_invoice(self):
+        """Deletes invoice selected in search_results after confirmation."""
+
+        key = self.search_results_view.selected_key()
+        if key is None:
+            return
+        invoice_id = key[-1]
+        if not messagebox.askyesno("Brisanje", "Obrisati izabranu fakturu?"):
+            return
+        self.master.storage.delete_invoice(invoice_id)
+        self.details.discard(invoice_id)
+        self.search_invoices()
+
+    def job_running(self) -> bool:
+        """Returns True while an export runs - the screen is not evicted, its poll
+        still uses the widgets (see ScreenManager.evict_idle())."""
+
+        return self.export_job is not None or self.data_export_job is not None
+
+    @timed
+    def export_pdf(self):
+        """Starts batch PDF export of the chosen period to a directory, or cancels
+        the running export."""
+
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.l_export_status.configure(text="otkazivanje...")
+            return
+
+        out_dir = filedialog.askdirectory(title="Izvoz PDF faktura")
+        if not out_dir:
+            return
+        # imported here, reportlab is loaded by the first export, not at startup
+        from core.batch import export_pdfs
+
+        self.export_job = BatchJob(
+            export_pdfs,
+            self.master.storage.path,
+            self.e_export_from.get_date(),
+            self.e_export_to.get_date(),
+            out_dir=out_dir,
+        )
+        self.btn_export_pdf.configure(text="Otkaži izvoz")
+        self.l_export_status.configure(text="0")
+        self.after(JOB_POLL_INTERVAL, self.poll_export)
+
+    def poll_export(self):
+        """Shows progress of the running batch export."""
+
+        for kind, _, value in self.export_job.poll():
+            if kind == "progress":
+                done, total, rate = value
+                self.l_export_status.configure(
+                    text=f"{done}/{total} ({rate:.1f} fakt/s)"
+                )
+            elif kind == "done":
+                self.l_export_status.configure(
+                    text=f"{value.count} fakt. ({value.rate:.1f} fakt/s)"
+                )
+            else:
+                self.l_export_status.configure(text="greška")
+                messagebox.showerror("Greška", f"Izvoz nije uspeo: {value}")
+
+        if self.export_job.finished:
+            self.export_job = None
+            self.btn_export_pdf.configure(text="Izvezi PDF")
+        else:
+            self.after(JOB_POLL_INTERVAL, self.poll_export)
+
+    @timed
+    def export_data(self):
+        """Starts export of invoices with line items of the chosen period to a CSV
+        or JSON Lines file (.gz compressed), or cancels the running export."""
+
+        if self.data_export_job is not None:
+            self.data_export_job.cancel()
+            self.l_export_data_status.configure(text="otkazivanje...")
+            return
+
+        path = filedialog.asksaveasfilename(
+            title="Izvoz za knjigovodstvo",
+            defaultextension=".csv",
+            filetypes=[
+                ("CSV", "*.csv"),
+                ("CSV (gzip)", "*.csv.gz"),
+                ("JSON Lines", "*.jsonl"),
+                ("JSON Lines (gzip)", "*.jsonl.gz"),
+            ],
+        )
+        if not path:
+            return
+        self.data_export_job = BatchJob(
+            export_invoices,
+            self.master.storage.path,
+            path,
+            self.e_export_from.get_date(),
+            self.e_export_to.get_date(),
+        )
+        self.btn_export_data.configure(text="Otkaži izvoz")
+        self.l_export_data_status.configure(text="0")
+        self.after(JOB_POLL_INTERVAL, self.poll_data_export)
+
+    def poll_data_export(self):
+        """Shows progress of the running export for accounting."""
+
+        for kind, _, value in self.data_export_job.poll():
+            if kind == "progress":
+                invoices, lines = value
+                self.l_export_data_status.configure(text=f"{invoices} fakt.")
+            elif kind == "done":
+                self.l_export_data_status.configure(
+                    text=f"{value.invoices} fakt., {value.lines} stavki"
+                )
+            else:
+                self.l_export_data_status.configure(text="greška")
+                messagebox.showerror("Greška", f"Izvoz nije uspeo: {value}")
+
+        if self.data_export_job.finished:
+            self.data_export_job = None
+            self.btn_export_data.configure(text="Izvezi CSV")
+        else:
+            self.after(JOB_POLL_INTERVAL, self.poll_data_export)
+
 
 class Customers(ttk.Frame):
     """Customers window. Requiers master as parameter."""
 
+    # delay (ms) after the last keystroke before customer search runs
+    SEARCH_DELAY = 250
+    # search_results column -> sort order of page_customers()
+    SORT_ORDERS = {"id": "id", "name": "name"}
+
     def __init__(self, master):
         super().__init__(master)
         # sidebar occupies 200px of the window width
         # self.place(relx=0.225, y=5, relwidth=0.75, relheight=0.95)
-        self.place(relx=0.225, y=5, relwidth=0.75)
+        self.place(**SCREEN_PLACE)
 
         # create widgets
         self.create_widgets()
@@ -659,6 +1694,9 @@ class Customers(ttk.Frame):
         # place widgets in window
         self.create_layout()
 
+        # bind events
+        self.create_bindings()
+
     def create_widgets(self):
         """Create sidebar widgets. Does not place them in the window. To place
         widgets, call create_layout() method."""
@@ -670,6 +1708,9 @@ class Customers(ttk.Frame):
         # buttons - 'new customer' and 'edit customer'
         self.btn_customer_new = ttk.Button(self, text="Unos novog komitenta")
         self.btn_customer_edit = ttk.Button(self, text="Izmeni/obriši komitenta")
+        # bulk import from CSV/XLSX and its progress
+        self.btn_customer_import = ttk.Button(self, text="Uvoz (CSV/XLSX)")
+        self.l_import_status = ttk.Label(self, text="", anchor="w")
         # search -disabled by default until edit is pressed
         self.l_search = ttk.Label(self, text="Pretraži:", anchor="center")
         self.e_search = ttk.Entry(self)
@@ -680,6 +1721,7 @@ class Customers(ttk.Frame):
         self.search_results.heading("id", text="ID")
         self.search_results.column("id", minwidth=0, width=40, stretch=False)
         self.search_results.heading("name", text="IME/NAZIV")
+        self.search_results_view = VirtualTreeview(self.search_results)
         # type of customer
         self.l_customer_type = ttk.Label(self, text="Vrsta lica", anchor="center")
         self.combo_customer_type = ttk.Combobox(
@@ -727,6 +1769,9 @@ class Customers(ttk.Frame):
         self.l_customers.grid(row=0, column=0, columnspan=3, sticky="ew", pady=2)
         # button
         self.btn_customer_new.grid(row=1, column=0, sticky="ew", pady=10)
+        # import
+        self.btn_customer_import.grid(row=1, column=1, sticky="w", padx=10, pady=10)
+        self.l_import_status.grid(row=1, column=2, sticky="ew", pady=10)
         # search
         self.l_search.grid(row=2, column=0, sticky="ew", pady=(15, 2))
         self.e_search.grid(row=2, column=1, columnspan=2, sticky="ew", pady=(15, 2))
@@ -760,20 +1805,425 @@ class Customers(ttk.Frame):
             row=12, column=1, columnspan=2, sticky="ew", pady=10
         )
 
+    def create_bindings(self):
+        """Binds events and button commands of the widgets (from the create_widgets() method)."""
+
+        # database id of the customer being edited, None for a new customer
+        self.customer_id = None
+        self.l_customer_save_or_delete.configure(text="")
+
+        # customer search - debounced, runs once typing pauses
+        self.customer_search = Debouncer(self, self.SEARCH_DELAY, self.search_customers)
+        self.e_search.bind("<KeyRelease>", self.customer_search)
+
+        # sorting by heading click, sort_column None is alphabetical
+        self.sort_column = None
+        self.sort_descending = False
+        self.headings = {
+            column: self.search_results.heading(column, "text")
+            for column in self.SORT_ORDERS
+        }
+        for column in self.SORT_ORDERS:
+            self.search_results.heading(
+                column, command=lambda column=column: self.sort_customers(column)
+            )
+
+        self.btn_customer_new.configure(command=self.new_customer)
+        self.btn_customer_edit.configure(command=self.edit_customer)
+        self.btn_customer_save.configure(command=self.save_customer)
+        self.btn_customer_delete.configure(command=self.delete_customer)
+
+        # running customer import (core.jobs.BatchJob) or None
+        self.import_job = None
+        self.btn_customer_import.configure(command=self.import_customers)
+
+        self.search_customers()
+
+    def search_customers(self):
+        """Reloads search_results with customers matching the search entry (start of
+        name, MB or PIB), in the order of the sorted column. Row keys are tuples
+        ending with customer id."""
+
+        search = self.e_search.get().strip()
+        order = self.SORT_ORDERS.get(self.sort_column, "name")
+        descending = self.sort_descending
+
+        def fetch(key, limit, forward, storage=self.master.storage):
+            rows = storage.page_customers(
+                key, limit, forward, search, order, descending
+            )
+            return [(customer_key(order, row), row) for row in rows]
+
+        # first page on the search thread, further pages on scroll
+        page_size = self.search_results_view.page_size
+        self.master.search(
+            "customers",
+            lambda storage: fetch(None, page_size, True, storage),
+            lambda rows: self.search_results_view.set_source(fetch, rows),
+        )
+
+    def sort_customers(self, column: str):
+        """Sorts search_results by column (heading click) - ascending, descending on
+        the second click and back to alphabetical on the third."""
+
+        if column != self.sort_column:
+            self.sort_column, self.sort_descending = column, False
+        elif not self.sort_descending:
+            self.sort_descending = True
+        else:
+            self.sort_column, self.sort_descending = None, False
+        sort_headings(
+            self.search_results, self.headings, self.sort_column, self.sort_descending
+        )
+        self.search_customers()
+
+    def show_customer(self, customer: Customer | None):
+        """Fills customer entries with customer, or clears them for None."""
+
+        customer = customer or Customer("")
+        self.customer_id = customer.id
+        self.combo_customer_type.set(customer.type)
+        set_entry(self.e_customer_name, customer.name)
+        set_entry(self.e_customer_address, customer.address)
+        set_entry(self.e_customer_city, customer.city)
+        set_entry(self.e_customer_email, customer.email)
+        set_entry(self.e_customer_id_no, customer.id_no)
+        set_entry(self.e_customer_tax_id, customer.tax_id)
+
+    def new_customer(self):
+        """Clears the form for entering a new customer."""
+
+        self.show_customer(None)
+        self.l_customer_save_or_delete.configure(text="")
+
+    def edit_customer(self):
+        """Loads customer selected in search_results in the form."""
+
+        key = self.search_results_view.selected_key()
+        if key is None:
+            return
+        self.show_customer(self.master.storage.get_customer(key[-1]))
+        self.l_customer_save_or_delete.configure(text="")
+
+    @timed
+    def save_customer(self):
+        """Saves (inserts or updates) customer from the form."""
+
+        customer = Customer(
+            name=self.e_customer_name.get().strip(),
+            type=self.combo_customer_type.get(),
+            address=self.e_customer_address.get().strip(),
+            city=self.e_customer_city.get().strip(),
+            email=self.e_customer_email.get().strip(),
+            id_no=self.e_customer_id_no.get().strip(),
+            tax_id=self.e_customer_tax_id.get().strip(),
+            id=self.customer_id,
+        )
+        if not customer.name:
+            self.l_customer_save_or_delete.configure(text="unesite ime/naziv")
+            return
+
+        self.master.storage.save_customer(customer)
+        self.master.customer_index.add(
+            customer.id, customer.name, customer.id_no, customer.tax_id
+        )
+        self.customer_id = customer.id
+        self.l_customer_save_or_delete.configure(text="uspešno sačuvano")
+        self.search_results_view.reload()
+
+    @timed
+    def delete_customer(self):
+        """Deletes customer loaded in the form after confirmation."""
+
+        if self.customer_id is None:
+            return
+        if not messagebox.askyesno("Brisanje", "Obrisati komitenta?"):
+            return
+
+        self.master.storage.delete_customer(self.customer_id)
+        self.master.customer_index.remove(self.customer_id)
+        self.show_customer(None)
+        self.l_customer_save_or_delete.configure(text="uspešno obrisano")
+        self.search_results_view.reload()
+
+    def job_running(self) -> bool:
+        """Returns True while an import runs (see ScreenManager.evict_idle())."""
+
+        return self.import_job is not None
+
+    @timed
+    def import_customers(self):
+        """Starts import of customers from a CSV/XLSX file, or cancels the running
+        import."""
+
+        if self.import_job is not None:
+            self.import_job.cancel()
+            self.l_import_status.configure(text="otkazivanje...")
+            return
+
+        path = filedialog.askopenfilename(
+            title="Uvoz komitenata",
+            filetypes=[
+                ("CSV/Excel", "*.csv *.xlsx"),
+                ("CSV", "*.csv"),
+                ("Excel", "*.xlsx"),
+            ],
+        )
+        if not path:
+            return
+        self.import_job = BatchJob(import_customers, self.master.storage.path, path)
+        self.btn_customer_import.configure(text="Otkaži uvoz")
+        self.l_import_status.configure(text="0")
+        self.after(JOB_POLL_INTERVAL, self.poll_import)
+
+    def poll_import(self):
+        """Shows progress of the running customer import. Once it is done, reloads
+        the customer search index and search results."""
+
+        for kind, _, value in self.import_job.poll():
+            if kind == "progress":
+                done, rejected, rate = value
+                self.l_import_status.configure(
+                    text=f"{done} redova, odbijeno {rejected} ({rate:.0f} red/s)"
+                )
+            elif kind == "done":
+                text = f"novih {value.inserted}, izmenjenih {value.updated}"
+                if value.rejected:
+                    text += f", odbijeno {value.rejected}"
+                    messagebox.showwarning(
+                        "Uvoz komitenata",
+                        f"Odbijeno redova: {value.rejected}\nIzveštaj: {value.report}",
+                    )
+                self.l_import_status.configure(text=text)
+            else:
+                self.l_import_status.configure(text="greška")
+                messagebox.showerror("Greška", f"Uvoz nije uspeo: {value}")
+
+        if self.import_job.finished:
+            self.import_job = None
+            self.btn_customer_import.configure(text="Uvoz (CSV/XLSX)")
+            self.master.customer_index.load(self.master.storage.customer_index_rows())
+            self.search_results_view.reload()
+        else:
+            self.after(JOB_POLL_INTERVAL, self.poll_import)
+
+
+class Reports(ttk.Frame):
+    """Revenue reports window - revenue and VAT by year and month, top customers.
+    Requiers master as parameter."""
+
+    # number of customers in the top customers list
+    TOP_CUSTOMERS = 10
+    # columns of the revenue tables
+    REVENUE_COLUMNS = {
+        "period": "PERIOD",
+        "invoices": "BR. FAKTURA",
+        "net": "OSNOVICA",
+        "vat": "PDV",
+        "total": "UKUPNO",
+    }
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.place(**SCREEN_PLACE)
+
+        # create widgets
+        self.create_widgets()
+        # place widgets in window
+        self.create_layout()
+        # bind events
+        self.create_bindings()
+
+    def create_widgets(self):
+        """Create widgets in Reports window. Does not place them in the window. To
+        place widgets, call create_layout() method."""
+
+        # reports title
+        self.l_reports = ttk.Label(
+            self, text="IZVEŠTAJI", anchor="center", font=("Segoe UI", 14, "bold")
+        )
+        # year of the monthly report and top customers
+        self.l_year = ttk.Label(self, text="Godina:", anchor="center")
+        self.combo_year = ttk.Combobox(self, state="readonly", width=8)
+        # recalculate summaries from all invoices
+        self.btn_rebuild = ttk.Button(self, text="Preračunaj izveštaje")
+        # revenue by year
+        self.l_years = ttk.Label(self, text="Po godinama:", anchor="w")
+        self.years = ttk.Treeview(
+            self, columns=list(self.REVENUE_COLUMNS), show="headings", height=4
+        )
+        # revenue by month of the selected year, with the year total
+        self.l_months = ttk.Label(self, text="Po mesecima:", anchor="w")
+        self.months = ttk.Treeview(
+            self, columns=list(self.REVENUE_COLUMNS), show="headings", height=13
+        )
+        for tree in (self.years, self.months):
+            for column, text in self.REVENUE_COLUMNS.items():
+                tree.heading(column, text=text)
+                tree.column(column, minwidth=0, width=100, anchor="e")
+            tree.column("period", anchor="w")
+        # customers with the highest total in the selected year
+        self.l_top_customers = ttk.Label(self, text="Najveći kupci:", anchor="w")
+        self.top_customers = ttk.Treeview(
+            self,
+            columns=["name", "tax_id", "invoices", "total"],
+            show="headings",
+            height=self.TOP_CUSTOMERS,
+        )
+        self.top_customers.heading("name", text="IME/NAZIV")
+        self.top_customers.heading("tax_id", text="PIB")
+        self.top_customers.column("tax_id", minwidth=0, width=90, stretch=False)
+        self.top_customers.heading("invoices", text="BR. FAKTURA")
+        self.top_customers.column("invoices", minwidth=0, width=90, stretch=False)
+        self.top_customers.heading("total", text="UKUPNO")
+        self.top_customers.column("total", minwidth=0, width=110, anchor="e")
+
+    def create_layout(self):
+        """Places created widgets in the window (from the create_widgets() method)."""
+
+        # 3 columns
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=1)
+        self.columnconfigure(2, weight=10)
+
+        # GRID
+        # reports title
+        self.l_reports.grid(row=0, column=0, columnspan=3, sticky="ew", pady=2)
+        # year and rebuild
+        self.l_year.grid(row=1, column=0, sticky="ew", pady=10)
+        self.combo_year.grid(row=1, column=1, sticky="w", pady=10)
+        self.btn_rebuild.grid(row=1, column=2, sticky="e", pady=10)
+        # revenue by year
+        self.l_years.grid(row=2, column=0, columnspan=3, sticky="ew", pady=(10, 2))
+        self.years.grid(row=3, column=0, columnspan=3, sticky="ew", pady=2)
+        # revenue by month
+        self.l_months.grid(row=4, column=0, columnspan=3, sticky="ew", pady=(10, 2))
+        self.months.grid(row=5, column=0, columnspan=3, sticky="ew", pady=2)
+        # top customers
+        self.l_top_customers.grid(
+            row=6, column=0, columnspan=3, sticky="ew", pady=(10, 2)
+        )
+        self.top_customers.grid(row=7, column=0, columnspan=3, sticky="ew", pady=2)
+
+    def create_bindings(self):
+        """Binds events and button commands of the widgets (from the create_widgets() method)."""
+
+        self.combo_year.bind("<<ComboboxSelected>>", self.show_year)
+        # running rebuild of the summaries (core.jobs.BatchJob) or None
+        self.rebuild_job = None
+        self.btn_rebuild.configure(command=self.rebuild)
+        # summaries are read every time the screen is shown - a few rows per year,
+        # so invoices saved meanwhile are always included
+        self.bind("<Map>", self.load_reports)
+
+    def load_reports(self, event=None):
+        """Shows revenue by year and the report of the selected year (the current
+        year by default)."""
+
+        years = self.master.storage.revenue_by_year()
+        self.years.delete(*self.years.get_children())
+        for year, *amounts in years:
+            self.years.insert("", "end", values=revenue_values(str(year), *amounts))
+
+        values = [str(year) for year, *_ in reversed(years)]
+        self.combo_year.configure(values=values)
+        if self.combo_year.get() not in values:
+            # current year, or the latest year with invoices
+            current = str(datetime.now().year)
+            latest = values[0] if values else ""
+            self.combo_year.set(current if current in values else latest)
+        self.show_year()
+
+    def show_year(self, event=None):
+        """Shows revenue by month and top customers of the selected year."""
+
+        self.months.delete(*self.months.get_children())
+        self.top_customers.delete(*self.top_customers.get_children())
+        year = self.combo_year.get()
+        if not year:
+            return
+
+        storage = self.master.storage
+        total = [0, 0, 0, 0]
+        for month, *amounts in storage.revenue_by_month(int(year)):
+            period = f"{month[5:]}/{month[:4]}"
+            self.months.insert("", "end", values=revenue_values(period, *amounts))
+            total = [a + b for a, b in zip(total, amounts)]
+        self.months.insert("", "end", values=revenue_values("Ukupno", *total))
+
+        for name, tax_id, invoices, net, vat, amount in storage.top_customers(
+            int(year), self.TOP_CUSTOMERS
+        ):
+            self.top_customers.insert(
+                "",
+                "end",
+                values=(name, tax_id, invoices, format_amount(from_cents(amount))),
+            )
+
+    def job_running(self) -> bool:
+        """Returns True while the rebuild runs (see ScreenManager.evict_idle())."""
+
+        return self.rebuild_job is not None
+
+    @timed
+    def rebuild(self):
+        """Starts recalculation of revenue summaries from all invoices in the
+        background, after confirmation."""
+
+        if self.rebuild_job is not None or not messagebox.askyesno(
+            "Izveštaji", "Preračunati izveštaje iz svih faktura? Može potrajati."
+        ):
+            return
+        self.rebuild_job = BatchJob(rebuild_reports, self.master.storage.path)
+        self.btn_rebuild.configure(text="Preračunavanje...", state="disabled")
+        self.after(JOB_POLL_INTERVAL, self.poll_rebuild)
+
+    def poll_rebuild(self):
+        """Waits for the running rebuild. Once it is done, shows the recalculated
+        reports and reloads the service catalog from the rebuilt service uses."""
+
+        for kind, _, value in self.rebuild_job.poll():
+            if kind == "error":
+                messagebox.showerror("Greška", f"Preračunavanje nije uspelo: {value}")
+
+        if self.rebuild_job.finished:
+            self.rebuild_job = None
+            self.btn_rebuild.configure(text="Preračunaj izveštaje", state="normal")
+            self.master.service_catalog.load(self.master.storage.service_history())
+            self.load_reports()
+        else:
+            self.after(JOB_POLL_INTERVAL, self.poll_rebuild)
+
 
 class Settings(ttk.Frame):
     """Settings window. Requiers master as parameter."""
 
+    # settings key -> entry (attribute name) holding its value
+    FIELDS = {
+        "company_name": "e_company_name",
+        "company_address": "e_company_address",
+        "company_city": "e_company_city",
+        "company_email": "e_company_email",
+        "company_id": "e_company_id",
+        "company_tax_id": "e_company_tax_id",
+        "company_vat": "combo_company_vat",
+        "company_bank_name": "e_company_bank_name",
+        "company_bank_rsd": "e_company_bank_rsd",
+        "company_bank_eur": "e_company_bank_eur",
+    }
+
     def __init__(self, master):
         super().__init__(master)
         # sidebar occupies 200px of the window width
         # self.place(relx=0.225, y=5, relwidth=0.75, relheight=0.95)
-        self.place(relx=0.225, y=5, relwidth=0.75)
+        self.place(**SCREEN_PLACE)
 
         # create widgets
         self.create_widgets()
         # place widgets in window
         self.create_layout()
+        # bind events
+        self.create_bindings()
 
     def create_widgets(self):
         """Create sidebar widgets. Does not place them in the window. To place
@@ -879,3 +2329,45 @@ class Settings(ttk.Frame):
         # save button
         self.btn_save_settings.grid(row=13, column=1, pady=(15, 3))
         self.l_save_settings.grid(row=14, column=1)
+
+    def create_bindings(self):
+        """Binds events and button commands of the widgets (from the create_widgets() method)."""
+
+        self.btn_company_logo.configure(command=self.choose_logo)
+        self.btn_save_settings.configure(command=self.save_settings)
+
+        self.load_settings()
+
+    def load_settings(self):
+        """Fills the form with settings saved in the database."""
+
+        settings = self.master.storage.load_settings()
+        for key, name in self.FIELDS.items():
+            set_entry(getattr(self, name), settings.get(key, ""))
+        self.logo_path = settings.get("company_logo", "")
+        self.l_company_logo_message.configure(text=self.logo_path)
+        self.l_save_settings.configure(text="")
+
+    def choose_logo(self):
+        """Opens file dialog for choosing company logo."""
+
+        path = filedialog.askopenfilename(
+            title="Logo", filetypes=[("Slike", "*.png *.gif"), ("Svi fajlovi", "*.*")]
+        )
+        if path:
+            self.logo_path = path
+            self.l_company_logo_message.configure(text=path)
+
+    @timed
+    def save_settings(self):
+        """Saves settings from the form in the database."""
+
+        settings = {
+            key: getattr(self, name).get().strip() for key, name in self.FIELDS.items()
+        }
+        settings["company_logo"] = self.logo_path
+        # written only when something changed - the cached PDF company header
+        # (core.pdf.company_header) is rebuilt only for changed settings
+        if settings != self.master.storage.load_settings():
+            self.master.storage.save_settings(settings)
+        self.l_save_settings.configure(text="uspešno sačuvano")
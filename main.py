@@ -6,48 +6,206 @@ Author: Dušan Miletić
 Date: Avgust, 2022
 """
 
+import os
+import time
 import tkinter as tk
+from functools import partial
+from tkinter import messagebox
 
 # from tkinter import ttk
 # from tkcalendar import DateEntry as ttkDateEntry
-from layout import Sidebar, Invoices, ReviewInvoices, Customers, Settings
+from layout import Sidebar, Invoices, ReviewInvoices, Customers, Reports, Settings
+from screens import ScreenManager
+from core.catalog import ServiceCatalog
+from core.drafts import DraftJournal
+from core.jobs import RenderJobs, SearchExecutor
+from core.monitor import HEARTBEAT_INTERVAL, MONITOR
+from core.search_index import CustomerIndex
+from core.storage import Storage
 
 
 # from tkinter import filedialog as fd ## for logo filedialog
 
 
+# how often (ms) background PDF renders are checked for progress
+POLL_INTERVAL = 100
+# how often (ms) background searches are checked for results
+SEARCH_POLL_INTERVAL = 20
+
+
 class App(tk.Tk):
     """Main app window (root) class. For object creation, the following is needed:
 
     title: str - Title that appears on the top window bar;
-    size: tuple(int, int) - Values for window size in width, height manner."""
+    size: tuple(int, int) - Values for window size in width, height manner;
+    screen_max_idle: float | None - Seconds after which unused screens are evicted
+        from the screen cache. None (default) keeps them for the whole session;
+    monitor: str - "" (default) no monitoring, "log" to log main loop stalls,
+        button timings and query counts (see core.monitor), "overlay" to also
+        show them in the sidebar."""
 
-    def __init__(self, title: str, size: tuple[int, int]):
+    def __init__(
+        self, title: str, size: tuple[int, int], screen_max_idle=None, monitor=""
+    ):
         # main setup
         super().__init__()
         self.title(title)
         self.geometry(f"{size[0]}x{size[1]}")
         self.minsize(size[0], size[1])
 
-        # widgets
+        # before the storage is opened, so its queries are counted
+        if monitor:
+            MONITOR.enable()
+        self.monitor_overlay = monitor == "overlay"
+
+        # services used by screens
+        self.storage = Storage()
+        self.customer_index = CustomerIndex()
+        self.customer_index.load(self.storage.customer_index_rows())
+        self.render_jobs = RenderJobs()
+        self._poll_after = None
+        self.searches = SearchExecutor(self.storage.path)
+        self._search_after = None
+        # service autocomplete, learned from the monthly service uses
+        self.service_catalog = ServiceCatalog()
+        self.service_catalog.load(self.storage.service_history())
+        # autosave journal of the Invoices form, with the draft of the last session
+        self.drafts = DraftJournal(ignore=Invoices.DRAFT_DEFAULTS)
+
+        # widgets - sidebar is always shown, other screens are built on first use
         self.sidebar = Sidebar(self)
-        # self.settings = Settings(self)
-        # self.customers = Customers(self)
-        # self.review_invoices = ReviewInvoices(self)
-        self.invoices = Invoices(self)
+        self.screens = ScreenManager(
+            self,
+            {
+                "invoices": Invoices,
+                "review_invoices": ReviewInvoices,
+                "customers": Customers,
+                "reports": Reports,
+                "settings": Settings,
+            },
+            max_idle=screen_max_idle,
+            # new invoice form holds unsaved data, never evict it
+            pinned={"invoices"},
+        )
+        self.screens.show("invoices")
 
         # define commands for buttons
-        # self.sidebar.btn_invoice_new.configure(
-        #     command=self.invoices.pack)
+        self.sidebar.btn_invoice_new.configure(
+            command=lambda: self.screens.show("invoices").new_invoice()
+        )
+        self.sidebar.btn_invoice_review.configure(
+            command=lambda: self.screens.show("review_invoices")
+        )
+        self.sidebar.btn_customers.configure(
+            command=lambda: self.screens.show("customers")
+        )
+        self.sidebar.btn_reports.configure(command=lambda: self.screens.show("reports"))
+        self.sidebar.btn_settings.configure(
+            command=lambda: self.screens.show("settings")
+        )
+        self.sidebar.btn_pdf_cancel.configure(command=self.cancel_pdf)
+        self.sidebar.btn_quit.configure(command=self.close)
+        self.protocol("WM_DELETE_WINDOW", self.close)
 
-        # self.sidebar.btn_quit.configure(command=self.invoices.pla)
-        # self.sidebar.btn_settings.configure(
-        #     command=lambda: self.settings.__init__(self)
-        # )
+        if MONITOR.enabled:
+            self._heartbeat_due = time.perf_counter() + HEARTBEAT_INTERVAL / 1000
+            self.after(HEARTBEAT_INTERVAL, self.heartbeat)
 
         # run
         self.mainloop()
 
+    def render_pdf(self, invoice, path: str):
+        """Starts rendering invoice to PDF at path in the background, with the
+        current company settings."""
+
+        job_id = self.render_jobs.submit(invoice, self.storage.load_settings(), path)
+        self.sidebar.add_pdf_job(job_id, path)
+        if self._poll_after is None:
+            self._poll_after = self.after(POLL_INTERVAL, self.poll_render_jobs)
+
+    def poll_render_jobs(self):
+        """Shows progress of background PDF renders. Reschedules itself while
+        renders are running."""
+
+        for kind, job_id, value in self.render_jobs.poll():
+            self.sidebar.update_pdf_job(kind, job_id, value)
+            if kind == "error":
+                messagebox.showerror("Greška", f"PDF nije sačuvan: {value}")
+
+        if self.render_jobs.active:
+            self._poll_after = self.after(POLL_INTERVAL, self.poll_render_jobs)
+        else:
+            self._poll_after = None
+
+    def heartbeat(self):
+        """Measures how late it runs (the main loop was blocked meanwhile) while
+        monitoring is on. Reschedules itself."""
+
+        now = time.perf_counter()
+        MONITOR.heartbeat((now - self._heartbeat_due) * 1000)
+        if self.monitor_overlay:
+            self.sidebar.show_monitor(MONITOR.overview())
+        self._heartbeat_due = now + HEARTBEAT_INTERVAL / 1000
+        self.after(HEARTBEAT_INTERVAL, self.heartbeat)
+
+    def search(self, channel: str, func, callback):
+        """Runs func(storage) on the search worker thread and calls callback with
+        its result on the Tk thread. A newer search on the same channel (search
+        box) cancels this one, its callback is never called."""
+
+        if MONITOR.enabled:
+            func = partial(MONITOR.call, f"search.{channel}", func)
+        self.searches.submit(channel, func, callback)
+        if self._search_after is None:
+            self._search_after = self.after(SEARCH_POLL_INTERVAL, self.poll_searches)
+
+    def poll_searches(self):
+        """Delivers results of finished searches. Reschedules itself while searches
+        are running."""
+
+        for callback, result, error in self.searches.poll():
+            if error is not None:
+                messagebox.showerror("Greška", f"Pretraga nije uspela: {error}")
+                continue
+            try:
+                callback(result)
+            except tk.TclError:
+                # screen of the search was evicted meanwhile
+                pass
+
+        if self.searches.pending:
+            self._search_after = self.after(SEARCH_POLL_INTERVAL, self.poll_searches)
+        else:
+            self._search_after = None
+
+    def cancel_pdf(self):
+        """Cancels PDF render selected in the sidebar."""
+
+        job_id = self.sidebar.selected_pdf_job()
+        if job_id is not None:
+            self.render_jobs.cancel(job_id)
+
+    def close(self):
+        """Stops background renders and searches, writes pending autosave of the
+        invoice draft (if the form was edited since it was saved), closes the
+        database and the window."""
+
+        invoices = self.screens.screens.get("invoices")
+        if invoices is not None and invoices.draft_dirty:
+            invoices.autosave_later.cancel()
+            invoices.autosave()
+        self.drafts.close()
+        self.render_jobs.shutdown()
+        self.searches.shutdown()
+        self.storage.close()
+        MONITOR.disable()
+        self.destroy()
+
 
 if __name__ == "__main__":
-    App("Invoice Creator v0.1", (960, 1015))
+    # INVOICE_APP_MONITOR=log (or overlay) turns on monitoring, see core.monitor
+    App(
+        "Invoice Creator v0.1",
+        (960, 1015),
+        monitor=os.environ.get("INVOICE_APP_MONITOR", ""),
+    )
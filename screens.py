@@ -0,0 +1,88 @@
+"""
+Screen manager - builds main screens (Invoices, Review Invoices, Customers,
+Reports, Settings) the first time they are needed and keeps them cached.
+
+Switching to an already built screen only places it back in the window and
+raises it, while the previous screen is hidden with place_forget(). Screens
+that were not used for a while can optionally be evicted (destroyed) and are
+rebuilt on the next use. A screen whose job_running() method returns True (a
+background job still polled with after()) is not evicted until the job ends.
+"""
+import time
+
+from layout import SCREEN_PLACE
+
+
+class ScreenManager:
+    """Lazy, cached screen construction. For object creation, the following is needed:
+
+    master: tk.Tk - Window in which screens are placed;
+    factories: dict[str, callable] - Screen name mapped to a callable that takes
+        master and returns a built screen (ttk.Frame);
+    max_idle: float | None - Seconds after which an unused, hidden screen is
+        evicted. None (default) keeps screens cached forever;
+    pinned: set[str] - Screens that are never evicted (e.g. screens holding
+        unsaved form data)."""
+
+    def __init__(self, master, factories: dict, max_idle=None, pinned=()):
+        self.master = master
+        self.factories = factories
+        self.max_idle = max_idle
+        self.pinned = set(pinned)
+
+        # name -> built screen, name -> time of last use
+        self.screens = {}
+        self.last_used = {}
+        self.current = None
+
+    def get(self, name: str):
+        """Returns screen by name, building it if it was not built yet (or was
+        evicted). Does not change which screen is shown."""
+
+        screen = self.screens.get(name)
+        if screen is None:
+            screen = self.factories[name](self.master)
+            # screens place themselves when built, hide until shown
+            screen.place_forget()
+            self.screens[name] = screen
+        return screen
+
+    def show(self, name: str):
+        """Shows screen by name and hides the currently shown one. Returns the screen."""
+
+        screen = self.get(name)
+        if name != self.current:
+            if self.current in self.screens:
+                self.screens[self.current].place_forget()
+            screen.place(**SCREEN_PLACE)
+            self.current = name
+        screen.tkraise()
+        self.last_used[name] = time.monotonic()
+
+        self.evict_idle()
+        return screen
+
+    def evict(self, name: str):
+        """Destroys cached screen. It will be built again on the next show()."""
+
+        screen = self.screens.pop(name, None)
+        self.last_used.pop(name, None)
+        if screen is not None:
+            screen.destroy()
+        if name == self.current:
+            self.current = None
+
+    def evict_idle(self):
+        """Evicts hidden, not pinned screens without a running job that were not
+        used for max_idle seconds."""
+
+        if self.max_idle is None:
+            return
+        now = time.monotonic()
+        for name, screen in list(self.screens.items()):
+            if name == self.current or name in self.pinned:
+                continue
+            if hasattr(screen, "job_running") and screen.job_running():
+                continue
+            if now - self.last_used.get(name, now) > self.max_idle:
+                self.evict(name)
@@ -0,0 +1,321 @@
+"""
+Widgets file - contains helper widgets/controllers shared by layout classes.
+
+Contains following classes and functions:
+    - VirtualTreeview - keeps only visible rows (plus a small buffer) as
+      Treeview items and fetches more pages with keyset queries on scroll
+    - Debouncer - runs a callback once input pauses (e.g. search while typing)
+    - SuggestionList - drop-down list of suggestions under an entry
+    - set_entry() - replaces text of an entry
+    - sort_headings() - heading texts of a Treeview with the sort direction arrow
+    - date_entry() - calendar date entry, tkcalendar is imported on first use
+    - tk_image() - cached Tk image of a logo (see core.images)
+"""
+import tkinter as tk
+
+from core.images import ImageCache, image_key, scaled_path
+
+# Tk images (PhotoImage) of logos
+_tk_images = ImageCache()
+
+
+def set_entry(entry, text):
+    """Replaces text of ttk.Entry (or tk.Text) with text. None clears it."""
+
+    text = "" if text is None else str(text)
+    if hasattr(entry, "edit_modified"):
+        # tk.Text
+        entry.delete("1.0", "end")
+        entry.insert("1.0", text)
+    else:
+        entry.delete(0, "end")
+        entry.insert(0, text)
+
+
+def sort_headings(tree, titles: dict, column=None, descending: bool = False):
+    """Sets heading texts of tree from titles (column -> text), the sorted column
+    gets an arrow (▲ ascending, ▼ descending). column None marks no column."""
+
+    for name, text in titles.items():
+        if name == column:
+            text = f"{text} {'▼' if descending else '▲'}"
+        tree.heading(name, text=text)
+
+
+def date_entry(master, **kwargs):
+    """Returns tkcalendar DateEntry with dd/MM/yyyy date pattern. tkcalendar (and
+    Babel through it) is imported on the first call, not at app startup."""
+
+    from tkcalendar import DateEntry
+
+    return DateEntry(master, date_pattern="dd/MM/yyyy", **kwargs)
+
+
+def tk_image(path: str, size: tuple[int, int] | None = None) -> tk.PhotoImage:
+    """Returns cached tk.PhotoImage of the image at path, downscaled to fit size."""
+
+    return _tk_images.get(
+        image_key(path, size), lambda: tk.PhotoImage(file=scaled_path(path, size))
+    )
+
+
+class Debouncer:
+    """Calls callback delay ms after the last call (event). For object creation,
+    the following is needed:
+
+    widget: tk widget - Widget used for scheduling with after();
+    delay: int - Delay in ms;
+    callback: callable - Called without arguments once calls pause."""
+
+    def __init__(self, widget, delay: int, callback):
+        self.widget = widget
+        self.delay = delay
+        self.callback = callback
+        self._after = None
+
+    def __call__(self, event=None):
+        self.cancel()
+        self._after = self.widget.after(self.delay, self._run)
+
+    def cancel(self):
+        """Cancels scheduled call."""
+
+        if self._after is not None:
+            self.widget.after_cancel(self._after)
+            self._after = None
+
+    def _run(self):
+        self._after = None
+        self.callback()
+
+
+class SuggestionList:
+    """Drop-down list of suggestions under an entry, updated while typing. For
+    object creation, the following is needed:
+
+    entry: ttk.Entry - Entry typed in, the list is placed under it;
+    suggest: callable - suggest(text) returns a list of (label, value) tuples;
+    choose: callable - Called with the value of the chosen suggestion;
+    height: int - Number of rows of the list.
+
+    Return in the entry chooses the first suggestion, Down moves to the list
+    (Return or a double click chooses there), Escape closes the list."""
+
+    # keys that do not change the text of the entry
+    IGNORED = {"Up", "Down", "Return", "Escape", "Tab", "Shift_L", "Shift_R"}
+
+    def __init__(self, entry, suggest, choose, height: int = 8):
+        self.entry = entry
+        self.suggest = suggest
+        self.choose = choose
+        self.values = []
+        self.listbox = tk.Listbox(entry.master, height=height, exportselection=False)
+
+        entry.bind("<KeyRelease>", self.update, add="+")
+        entry.bind("<Return>", lambda event: self._choose(0), add="+")
+        entry.bind("<Down>", self._focus_list, add="+")
+        entry.bind("<Escape>", lambda event: self.hide(), add="+")
+        entry.bind("<FocusOut>", self._focus_out, add="+")
+        self.listbox.bind("<Return>", self._choose_selected)
+        self.listbox.bind("<Double-Button-1>", self._choose_selected)
+        self.listbox.bind("<Escape>", lambda event: self.hide())
+        self.listbox.bind("<FocusOut>", self._focus_out)
+
+    def update(self, event=None):
+        """Shows suggestions of the entry text, hides the list when there are none."""
+
+        if event is not None and event.keysym in self.IGNORED:
+            return
+        suggestions = self.suggest(self.entry.get())
+        if not suggestions:
+            self.hide()
+            return
+        self.listbox.delete(0, "end")
+        self.listbox.insert("end", *(label for label, _ in suggestions))
+        self.values = [value for _, value in suggestions]
+        self.listbox.place(in_=self.entry, x=0, rely=1, relwidth=1)
+        self.listbox.lift()
+
+    def hide(self):
+        """Closes the list."""
+
+        self.listbox.place_forget()
+        self.values = []
+
+    def _choose(self, index: int):
+        if index >= len(self.values):
+            return
+        value = self.values[index]
+        self.hide()
+        self.entry.focus_set()
+        self.choose(value)
+        return "break"
+
+    def _choose_selected(self, event=None):
+        selection = self.listbox.curselection()
+        return self._choose(selection[0] if selection else 0)
+
+    def _focus_list(self, event=None):
+        if not self.values:
+            return
+        self.listbox.focus_set()
+        self.listbox.selection_clear(0, "end")
+        self.listbox.selection_set(0)
+        self.listbox.activate(0)
+        return "break"
+
+    def _focus_out(self, event=None):
+        # focus moves between the entry and the list, check once it settled
+        self.entry.after_idle(self._hide_unfocused)
+
+    def _hide_unfocused(self):
+        if self.entry.focus_get() not in (self.entry, self.listbox):
+            self.hide()
+
+
+class VirtualTreeview:
+    """Virtual list mode for ttk.Treeview. For object creation, the following is needed:
+
+    tree: ttk.Treeview - Treeview which shows the rows;
+    fetch: callable | None - Page source, fetch(key, limit, forward) returns a list
+        of (key, values) tuples. With forward=True returns rows after key in
+        ascending order, with forward=False rows before key in descending order.
+        key=None means start (or end) of the list;
+    scrollbar: ttk.Scrollbar | None - Scrollbar connected to the tree;
+    page_size: int - Number of rows fetched at once;
+    max_pages: int - Maximum number of pages kept as Treeview items.
+
+    Keys must be unique and sortable in the same order as rows (e.g. invoice id
+    or (sort_value, id) tuple). Only a window of page_size * max_pages rows exists
+    in the Treeview at any time, rows scrolled far away are deleted."""
+
+    # load next/previous page when view is this close to the edge of the window
+    EDGE = 0.1
+
+    def __init__(self, tree, fetch=None, scrollbar=None, page_size=50, max_pages=3):
+        self.tree = tree
+        self.fetch = fetch
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.max_rows = page_size * max_pages
+
+        # iid -> key for rows currently in the tree
+        self.keys = {}
+        self.at_start = True
+        self.at_end = True
+        self._pending = None
+
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        if scrollbar is not None:
+            scrollbar.configure(command=self.tree.yview)
+
+    def set_source(self, fetch, rows=None):
+        """Sets new page source (e.g. after search text changed) and reloads the list.
+        rows is the first page when it was already fetched (e.g. on a worker
+        thread)."""
+
+        self.fetch = fetch
+        self.reload(rows)
+
+    def reload(self, rows=None):
+        """Clears the tree and loads the first page (or shows rows as the first page)."""
+
+        self.clear()
+        if self.fetch is None:
+            return
+        if rows is None:
+            rows = self.fetch(None, self.page_size, True)
+        self.at_start = True
+        self.at_end = len(rows) < self.page_size
+        self._insert(rows, "end")
+
+    def clear(self):
+        """Deletes all rows from the tree."""
+
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.keys.clear()
+        self.at_start = True
+        self.at_end = True
+
+    def key_of(self, iid):
+        """Returns key of the row with iid (e.g. selected row)."""
+
+        return self.keys.get(iid)
+
+    def selected_key(self):
+        """Returns key of the first selected row or None."""
+
+        selection = self.tree.selection()
+        return self.keys.get(selection[0]) if selection else None
+
+    def load_next(self):
+        """Appends next page to the end of the window and trims rows from the top."""
+
+        children = self.tree.get_children()
+        if self.at_end or self.fetch is None or not children:
+            return
+        rows = self.fetch(self.keys[children[-1]], self.page_size, True)
+        self.at_end = len(rows) < self.page_size
+        if rows:
+            self._insert(rows, "end")
+            self._trim(top=True)
+
+    def load_previous(self):
+        """Prepends previous page to the start of the window and trims rows from the bottom."""
+
+        children = self.tree.get_children()
+        if self.at_start or self.fetch is None or not children:
+            return
+        rows = self.fetch(self.keys[children[0]], self.page_size, False)
+        self.at_start = len(rows) < self.page_size
+        if rows:
+            # rows come in descending order, inserting each at index 0 restores order
+            self._insert(rows, 0)
+            self._trim(top=False)
+
+    def _insert(self, rows, index):
+        for key, values in rows:
+            iid = self.tree.insert("", index, values=values)
+            self.keys[iid] = key
+
+    def _trim(self, top: bool):
+        """Deletes rows over max_rows from the top or bottom of the window, keeping
+        the first visible row in place."""
+
+        children = self.tree.get_children()
+        extra = len(children) - self.max_rows
+        if extra <= 0:
+            return
+
+        # first visible row, from the scroll position
+        first = self.tree.yview()[0]
+        visible = children[min(int(round(first * len(children))), len(children) - 1)]
+        drop = children[:extra] if top else children[-extra:]
+        self.tree.delete(*drop)
+        for iid in drop:
+            del self.keys[iid]
+        if top:
+            self.at_start = False
+        else:
+            self.at_end = False
+
+        if self.tree.exists(visible):
+            self.tree.yview_moveto(self.tree.index(visible) / self.max_rows)
+
+    def _on_scroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+
+        # fetch outside of the scroll callback, once per idle
+        if self._pending is not None:
+            return
+        if float(last) >= 1 - self.EDGE and not self.at_end:
+            self._pending = self.tree.after_idle(self._run_pending, self.load_next)
+        elif float(first) <= self.EDGE and not self.at_start:
+            self._pending = self.tree.after_idle(self._run_pending, self.load_previous)
+
+    def _run_pending(self, load):
+        self._pending = None
+        load()